@@ -1,5 +1,53 @@
+import argparse
+import sys
+
 from chess.game import ChessMajsterGame
+from chess.session_runner import ChessGameBatchRunner
+from chess.ui import (
+    FenRenderer,
+    JsonRenderer,
+    UnicodeBoardRenderer,
+)
+
+LOG_RENDERERS = {
+    'board': UnicodeBoardRenderer,
+    'fen': FenRenderer,
+    'json': JsonRenderer,
+}
 
-def main():
-    game = ChessMajsterGame()
-    game.run()
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='run_chess.py')
+    parser.add_argument('--batch', metavar='PATH',
+                        help='replay chess games headlessly: one move per '
+                             'line, an empty line between games '
+                             '("-" means the standard input)')
+    parser.add_argument('--ansi', action='store_true',
+                        help='redraw only the changed fields of the board, '
+                             'using ANSI escape sequences')
+    parser.add_argument('--log', metavar='PATH',
+                        help='batch mode: log every position of the games '
+                             'to that file')
+    parser.add_argument('--log-format', choices=sorted(LOG_RENDERERS),
+                        help='batch mode: how the logged positions are '
+                             'rendered (default: fen)')
+    args = parser.parse_args(argv)
+    if args.batch is None:
+        if args.log is not None or args.log_format is not None:
+            parser.error('--log and --log-format require --batch')
+        game = ChessMajsterGame(args.ansi)
+        game.run()
+        return 0
+    log = renderer = None
+    if args.log is not None:
+        log = open(args.log, 'w')
+        renderer = LOG_RENDERERS[args.log_format or 'fen']()
+    try:
+        if args.batch == '-':
+            errors = ChessGameBatchRunner(sys.stdin, renderer, log).run()
+        else:
+            with open(args.batch) as lines:
+                errors = ChessGameBatchRunner(lines, renderer, log).run()
+    finally:
+        if log is not None:
+            log.close()
+    return 1 if errors else 0
@@ -0,0 +1,224 @@
+"""
+Compact binary game archive.
+
+Each move is stored as its 16-bit code (see `Move.get_code()`) and an
+index of game offsets at the end of the file lets the reader -- which
+memory-maps the file -- access any game directly, without reading or
+parsing the other ones.  Layout (all integers little-endian):
+
+    header:     b'CMA1', game count (uint32), index offset (uint64)
+    each game:  start FEN length (uint16; 0 means the initial position),
+                move count (uint16), start FEN, move codes (uint16 each)
+    index:      game offsets (uint64 each)
+
+    python -m chess.archive pack games.pgn games.cma
+    python -m chess.archive scan games.cma --replay
+"""
+
+import argparse
+import array
+import collections
+import mmap
+import os
+import struct
+import sys
+
+from chess.exceptions import UserActionError
+from chess.move import MoveFactory
+from chess.pgn import (
+    RateCounter,
+    iter_games,
+    replay,
+)
+from chess.session import (
+    INITIAL_FEN,
+    ChessGameSession,
+)
+
+
+MAGIC = b'CMA1'
+
+_HEADER = struct.Struct('<4sIQ')
+_GAME_HEADER = struct.Struct('<HH')
+_OFFSET = struct.Struct('<Q')
+
+# offsets are written that many at a time
+_INDEX_CHUNK_SIZE = 4096
+
+ArchivedGame = collections.namedtuple('ArchivedGame',
+                                      ['start_fen', 'move_codes'])
+
+
+class ArchiveWriter(object):
+
+    """
+    Writes games to a new archive file (use it as a context manager,
+    or call close() -- the archive is not readable until then).
+    """
+
+    def __init__(self, path):
+        self._file = open(path, 'wb')
+        self._file.write(_HEADER.pack(MAGIC, 0, 0))
+        # (a list: array typecodes of 64-bit ints are Python 3 only)
+        self._offsets = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.close()
+
+    def add_game(self, session):
+        """
+        Add the game played so far in the session (i.e. its move
+        history, see ChessGameSession.get_move_history(), from the
+        session's start_fen).
+        """
+        assert session.start_fen is not None
+        self.add_move_codes(
+            [move.get_code() for move in session.get_move_history()],
+            session.start_fen)
+
+    def add_move_codes(self, move_codes, start_fen=INITIAL_FEN):
+        assert len(move_codes) <= 0xffff
+        fen = b'' if start_fen == INITIAL_FEN else start_fen.encode('ascii')
+        codes = array.array('H', move_codes)
+        if sys.byteorder == 'big':
+            codes.byteswap()
+        self._offsets.append(self._file.tell())
+        self._file.write(_GAME_HEADER.pack(len(fen), len(codes)))
+        self._file.write(fen)
+        self._file.write(codes.tostring())
+
+    def close(self):
+        if self._file.closed:
+            return
+        index_offset = self._file.tell()
+        offsets = self._offsets
+        for start in xrange(0, len(offsets), _INDEX_CHUNK_SIZE):
+            chunk = offsets[start:start + _INDEX_CHUNK_SIZE]
+            self._file.write(struct.pack('<{}Q'.format(len(chunk)), *chunk))
+        self._file.seek(0)
+        self._file.write(_HEADER.pack(MAGIC, len(offsets), index_offset))
+        self._file.close()
+
+
+class ArchiveReader(object):
+
+    """
+    Gives random access to the games of an archive file, which is
+    memory-mapped rather than read.
+    """
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size < _HEADER.size:
+                raise UserActionError(
+                    '{!r} is not a game archive.'.format(path))
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self._game_count, self._index_offset = _HEADER.unpack_from(
+            self._mmap)
+        if magic != MAGIC:
+            self._mmap.close()
+            raise UserActionError('{!r} is not a game archive.'.format(path))
+        self._move_factory = MoveFactory()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.close()
+
+    def __len__(self):
+        return self._game_count
+
+    def __getitem__(self, game_index):
+        """
+        :return: ArchivedGame (move_codes is an array of 16-bit ints)
+        """
+        if not 0 <= game_index < self._game_count:
+            raise IndexError('game index out of range')
+        offset, = _OFFSET.unpack_from(
+            self._mmap, self._index_offset + game_index * _OFFSET.size)
+        fen_length, move_count = _GAME_HEADER.unpack_from(self._mmap, offset)
+        offset += _GAME_HEADER.size
+        start_fen = self._mmap[offset:offset + fen_length] or INITIAL_FEN
+        offset += fen_length
+        move_codes = array.array('H')
+        move_codes.fromstring(self._mmap[offset:offset + 2 * move_count])
+        if sys.byteorder == 'big':
+            move_codes.byteswap()
+        return ArchivedGame(start_fen, move_codes)
+
+    def __iter__(self):
+        for game_index in xrange(self._game_count):
+            yield self[game_index]
+
+    def iter_positions(self, game_index):
+        """
+        Replay the game, yielding (<session>, <move>) after each of its
+        moves (the same session object every time).  The moves are not
+        validated: the archive is trusted to contain legal games.
+        """
+        start_fen, move_codes = self[game_index]
+        session = ChessGameSession.from_fen(start_fen)
+        create_from_code = self._move_factory.create_from_code
+        for code in move_codes:
+            move = create_from_code(session, code)
+            session.push(move)
+            yield session, move
+
+    def close(self):
+        self._mmap.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m chess.archive',
+        description='Pack PGN games into a binary archive, or scan one.')
+    subparsers = parser.add_subparsers(dest='command')
+    pack_parser = subparsers.add_parser('pack', help='convert PGN files')
+    pack_parser.add_argument('pgn_paths', nargs='+', metavar='PGN_PATH')
+    pack_parser.add_argument('archive_path', metavar='ARCHIVE_PATH')
+    scan_parser = subparsers.add_parser('scan', help='read all games')
+    scan_parser.add_argument('archive_path', metavar='ARCHIVE_PATH')
+    scan_parser.add_argument('--replay', action='store_true',
+                             help='replay the moves on a board too')
+    args = parser.parse_args(argv)
+
+    games = RateCounter()
+    moves = 0
+    if args.command == 'pack':
+        with ArchiveWriter(args.archive_path) as writer:
+            for path in args.pgn_paths:
+
+                def skip_game(exc):
+                    sys.stderr.write('{}: skipped a game: {}\n'.format(
+                        path, exc))
+
+                with open(path) as stream:
+                    for game in iter_games(stream, on_error=skip_game):
+                        try:
+                            session = replay(game)
+                        except UserActionError as exc:
+                            skip_game(exc)
+                            continue
+                        writer.add_game(session)
+                        games.add()
+                        moves += len(game.sans)
+    else:
+        with ArchiveReader(args.archive_path) as reader:
+            for game_index in xrange(len(reader)):
+                if args.replay:
+                    for _ in reader.iter_positions(game_index):
+                        moves += 1
+                else:
+                    moves += len(reader[game_index].move_codes)
+                games.add()
+    print '{} games, {} moves in {:.2f}s: {:.1f} games/s'.format(
+        games.count, moves, games.elapsed, games.rate)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
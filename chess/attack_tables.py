@@ -0,0 +1,126 @@
+"""
+Attack tables precomputed at import time.
+
+All tables are indexed by `Location.index` and hold bitboards (see
+`chess.bitboard`).  Jumping pieces (knights, kings, pawns) are fully
+described by their tables; for sliding pieces there are per-direction
+ray tables plus the functions below that cut the rays at the first
+blocker found in a given occupancy mask.
+"""
+
+from chess.bitboard import (
+    lsb_index,
+    msb_index,
+)
+
+
+_SIZE = 8
+
+# (x step, y step) -- note that y grows from row '8' towards row '1'
+_DIAGONAL_STEPS = [(-1, -1), (1, -1), (-1, 1), (1, 1)]
+_STRAIGHT_STEPS = [(0, -1), (-1, 0), (1, 0), (0, 1)]
+_KNIGHT_STEPS = [(1, 2), (2, 1), (2, -1), (1, -2),
+                 (-1, -2), (-2, -1), (-2, 1), (-1, 2)]
+_KING_STEPS = _DIAGONAL_STEPS + _STRAIGHT_STEPS
+
+
+def _iter_squares():
+    for y in range(_SIZE):
+        for x in range(_SIZE):
+            yield x, y
+
+
+def _on_board(x, y):
+    return 0 <= x < _SIZE and 0 <= y < _SIZE
+
+
+def _bit(x, y):
+    return 1 << (y * _SIZE + x)
+
+
+def _make_jump_table(steps):
+    table = []
+    for x, y in _iter_squares():
+        mask = 0
+        for x_step, y_step in steps:
+            if _on_board(x + x_step, y + y_step):
+                mask |= _bit(x + x_step, y + y_step)
+        table.append(mask)
+    return table
+
+
+def _make_ray_table(x_step, y_step):
+    table = []
+    for x, y in _iter_squares():
+        mask = 0
+        ray_x, ray_y = x + x_step, y + y_step
+        while _on_board(ray_x, ray_y):
+            mask |= _bit(ray_x, ray_y)
+            ray_x += x_step
+            ray_y += y_step
+        table.append(mask)
+    return table
+
+
+def _make_rays(steps):
+    # (ray table, whether the index grows along the ray)
+    return [(_make_ray_table(x_step, y_step), x_step + _SIZE * y_step > 0)
+            for x_step, y_step in steps]
+
+
+def _join_rays(rays):
+    joined = [0] * (_SIZE * _SIZE)
+    for table, _ in rays:
+        for index, mask in enumerate(table):
+            joined[index] |= mask
+    return joined
+
+
+DIAGONAL_RAYS = _make_rays(_DIAGONAL_STEPS)
+STRAIGHT_RAYS = _make_rays(_STRAIGHT_STEPS)
+
+KNIGHT_ATTACKS = _make_jump_table(_KNIGHT_STEPS)
+KING_ATTACKS = _make_jump_table(_KING_STEPS)
+PAWN_ATTACKS = {
+    # white pawns attack towards row '8', i.e. towards lower y
+    True: _make_jump_table([(-1, -1), (1, -1)]),
+    False: _make_jump_table([(-1, 1), (1, 1)]),
+}
+
+# attacks on an empty board
+BISHOP_ATTACKS = _join_rays(DIAGONAL_RAYS)
+ROOK_ATTACKS = _join_rays(STRAIGHT_RAYS)
+QUEEN_ATTACKS = [bishop | rook
+                 for bishop, rook in zip(BISHOP_ATTACKS, ROOK_ATTACKS)]
+
+# the light fields (a8 -- i.e. index 0 -- is one of them)
+LIGHT_SQUARES = sum(_bit(x, y) for x, y in _iter_squares()
+                    if (x + y) % 2 == 0)
+DARK_SQUARES = ~LIGHT_SQUARES & ((1 << _SIZE * _SIZE) - 1)
+
+
+def _slider_attacks(rays, index, occupied):
+    attacks = 0
+    for table, is_growing in rays:
+        ray = table[index]
+        blockers = ray & occupied
+        if blockers:
+            if is_growing:
+                ray ^= table[lsb_index(blockers)]
+            else:
+                ray ^= table[msb_index(blockers)]
+        attacks |= ray
+    return attacks
+
+
+def bishop_attacks(index, occupied):
+    return _slider_attacks(DIAGONAL_RAYS, index, occupied)
+
+
+def rook_attacks(index, occupied):
+    return _slider_attacks(STRAIGHT_RAYS, index, occupied)
+
+
+def queen_attacks(index, occupied):
+    return (_slider_attacks(DIAGONAL_RAYS, index, occupied) |
+            _slider_attacks(STRAIGHT_RAYS, index, occupied))
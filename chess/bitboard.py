@@ -0,0 +1,32 @@
+"""
+Helpers for 64-bit integer bitboards.
+
+Bit `i` of a bitboard corresponds to the square whose `Location.index`
+is `i` (`a8` is bit 0, `h1` is bit 63).
+"""
+
+FULL_MASK = (1 << 64) - 1
+
+
+def popcount(mask):
+    return bin(mask).count('1')
+
+
+def lsb_index(mask):
+    assert mask
+    return (mask & -mask).bit_length() - 1
+
+
+def msb_index(mask):
+    assert mask
+    return mask.bit_length() - 1
+
+
+def iter_indices(mask):
+    """
+    Yield the indices of the set bits, lowest first.
+    """
+    while mask:
+        low_bit = mask & -mask
+        yield low_bit.bit_length() - 1
+        mask ^= low_bit
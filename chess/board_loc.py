@@ -1,5 +1,7 @@
 import chess.piece
+from chess.bitboard import iter_indices
 from chess.exceptions import UserActionError
+from chess.zobrist import PIECE_KEYS
 
 
 _X_LABELS = 'abcdefgh'
@@ -8,13 +10,40 @@ _Y_LABELS = '87654321'
 _LABEL_TO_X = {label: x for x, label in enumerate(_X_LABELS)}
 _LABEL_TO_Y = {label: y for y, label in enumerate(_Y_LABELS)}
 
+_BOARD_SIZE = len(_X_LABELS)
+
+# piece symbols by their 4-bit codes (see Board.get_packed_placement())
+PACKED_SYMBOLS = ' PNBRQKpnbrqk'
+PACKED_PLACEMENT_SIZE = _BOARD_SIZE * _BOARD_SIZE // 2
+
+_SYMBOL_TO_PACKED_CODE = {symbol: code
+                          for code, symbol in enumerate(PACKED_SYMBOLS)
+                          if code}
+
 
 class Board(object):
 
+    """
+    The board: an 8x8 grid of fields, each empty or holding a piece.
+
+    The board also maintains `zobrist_key` -- a 64-bit Zobrist hash
+    (see `chess.zobrist`) updated incrementally on every change of the
+    fields.  A session may additionally XOR into it the keys of the
+    position parts not stored on the board (side to move, castling
+    rights, en passant).  The numbers of pieces of each kind are
+    maintained incrementally as well (see get_piece_count()).
+
+    Boards compare equal if they have the same pieces on the same
+    fields and the same key; note that (as for any mutable object) the
+    hash changes when the board is changed.
+    """
+
     def __init__(self):
         self._piece_factory = chess.piece.PieceFactory()
         self._rows_of_fields = [[None for _ in _X_LABELS]
                                 for _ in _Y_LABELS]
+        self._piece_counts = dict.fromkeys(self._piece_factory.symbols_dir, 0)
+        self.zobrist_key = 0
 
     def setup(self):
         self._set_row_from_symbols('8', 'rnbqkbnr')
@@ -29,20 +58,158 @@ class Board(object):
     def __setitem__(self, loc, piece):
         assert isinstance(loc, Location)
         assert isinstance(piece, chess.piece.Piece)
-        self._rows_of_fields[loc._y][loc._x] = piece
+        row = self._rows_of_fields[loc._y]
+        old_piece = row[loc._x]
+        if old_piece is not None:
+            self.zobrist_key ^= PIECE_KEYS[old_piece.symbol][loc._index]
+            self._piece_counts[old_piece.symbol] -= 1
+        row[loc._x] = piece
+        self.zobrist_key ^= PIECE_KEYS[piece.symbol][loc._index]
+        self._piece_counts[piece.symbol] += 1
 
     def __delitem__(self, loc):
         assert isinstance(loc, Location)
-        self._rows_of_fields[loc._y][loc._x] = None
+        row = self._rows_of_fields[loc._y]
+        old_piece = row[loc._x]
+        if old_piece is not None:
+            self.zobrist_key ^= PIECE_KEYS[old_piece.symbol][loc._index]
+            self._piece_counts[old_piece.symbol] -= 1
+            row[loc._x] = None
+
+    def __eq__(self, other):
+        if not isinstance(other, Board):
+            return NotImplemented
+        return (self.zobrist_key == other.zobrist_key and
+                list(self.iter_symbol_rows()) == list(other.iter_symbol_rows()))
+
+    def __ne__(self, other):
+        return not (self == other)
+
+    def __hash__(self):
+        return hash(self.zobrist_key)
 
     def pop_piece(self, loc):
         f = self[loc]
         del self[loc]
         return f
 
+    def create_piece(self, symbol):
+        return self._piece_factory.create(symbol)
+
+    def get_piece_count(self, symbol):
+        """
+        :param symbol: piece symbol (e.g. 'N' or 'n')
+        :return: the number of such pieces on the board
+        """
+        return self._piece_counts[symbol]
+
+    def is_path_clear(self, path):
+        return all(self[loc] is None for loc in path)
+
+    def is_mask_clear(self, mask):
+        """
+        :param mask: bitboard of fields (see chess.bitboard)
+        :return: whether all the fields are empty
+        """
+        return all(self[Location.from_index(index)] is None
+                   for index in iter_indices(mask))
+
     def iter_rows(self):
         return (tuple(row) for row in self._rows_of_fields)
 
+    def iter_symbol_rows(self):
+        return (tuple(piece and piece.symbol for piece in row)
+                for row in self._rows_of_fields)
+
+    def compute_zobrist_key(self):
+        """
+        Compute the pieces' part of the Zobrist key from scratch.
+        """
+        key = 0
+        for y, row in enumerate(self._rows_of_fields):
+            for x, piece in enumerate(row):
+                if piece is not None:
+                    key ^= PIECE_KEYS[piece.symbol][y * _BOARD_SIZE + x]
+        return key
+
+    def set_fen_placement(self, placement):
+        """
+        Set all fields according to the piece placement field of a FEN
+        (e.g. 'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR').
+        """
+        symbols_dir = self._piece_factory.symbols_dir
+        rows = []
+        for fen_row in placement.split('/'):
+            row = []
+            for char in fen_row:
+                if char in symbols_dir:
+                    row.append(symbols_dir[char])
+                elif char in '12345678':
+                    row.extend([None] * int(char))
+                else:
+                    row = None
+                    break
+            if row is None or len(row) != _BOARD_SIZE:
+                raise UserActionError(
+                    'Bad FEN row: {!r}.'.format(fen_row))
+            rows.append(row)
+        if len(rows) != _BOARD_SIZE:
+            raise UserActionError(
+                '{!r} should have {} rows.'.format(placement, _BOARD_SIZE))
+        self._set_rows_of_fields(rows)
+
+    def get_fen_placement(self):
+        """
+        Get the piece placement field of a FEN describing the board.
+        """
+        fen_rows = []
+        for row in self._rows_of_fields:
+            fen_row = []
+            empty_count = 0
+            for piece in row:
+                if piece is None:
+                    empty_count += 1
+                    continue
+                if empty_count:
+                    fen_row.append(str(empty_count))
+                    empty_count = 0
+                fen_row.append(piece.symbol)
+            if empty_count:
+                fen_row.append(str(empty_count))
+            fen_rows.append(''.join(fen_row))
+        return '/'.join(fen_rows)
+
+    def get_packed_placement(self):
+        """
+        Get all fields packed into 32 bytes: 4 bits per field (0 for
+        an empty one, see PACKED_SYMBOLS), in the order of Location.index.
+
+        :return: str
+        """
+        codes = [0 if piece is None else _SYMBOL_TO_PACKED_CODE[piece.symbol]
+                 for row in self._rows_of_fields for piece in row]
+        return str(bytearray(codes[i] << 4 | codes[i + 1]
+                             for i in xrange(0, len(codes), 2)))
+
+    def set_packed_placement(self, data):
+        """
+        Set all fields from the result of get_packed_placement().
+        """
+        if len(data) != PACKED_PLACEMENT_SIZE:
+            raise UserActionError('Packed placement must have {} bytes.'.format(
+                PACKED_PLACEMENT_SIZE))
+        symbols_dir = self._piece_factory.symbols_dir
+        pieces = [None] + [symbols_dir[symbol] for symbol in PACKED_SYMBOLS[1:]]
+        fields = []
+        try:
+            for byte in bytearray(data):
+                fields.append(pieces[byte >> 4])
+                fields.append(pieces[byte & 0xf])
+        except IndexError:
+            raise UserActionError('Bad packed placement.')
+        self._set_rows_of_fields([fields[i:i + _BOARD_SIZE]
+                                  for i in xrange(0, len(fields), _BOARD_SIZE)])
+
     @staticmethod
     def iter_x_labels():
         return iter(_X_LABELS)
@@ -53,6 +220,16 @@ class Board(object):
 
     # non-public helpers:
 
+    def _set_rows_of_fields(self, rows):
+        self._rows_of_fields = rows
+        piece_counts = dict.fromkeys(self._piece_counts, 0)
+        for row in rows:
+            for piece in row:
+                if piece is not None:
+                    piece_counts[piece.symbol] += 1
+        self._piece_counts = piece_counts
+        self.zobrist_key = self.compute_zobrist_key()
+
     def _set_row_from_symbols(self, y_label, symbols):
         assert len(symbols) == len(_X_LABELS), (
             'wrong number of symbols: {} -- '
@@ -62,20 +239,125 @@ class Board(object):
                 symbols,
                 _X_LABELS))
         y = Location._parse_y_label(y_label)
-        self._rows_of_fields[y][:] = [
-            (None if s == ' ' else self._piece_factory.create(s))
-            for s in symbols]
+        for x, _ in enumerate(_X_LABELS):
+            del self[Location.from_xy(x, y)]
+        for x, s in enumerate(symbols):
+            if s != ' ':
+                self[Location.from_xy(x, y)] = self._piece_factory.create(s)
+
+
+class BitboardBoard(Board):
+
+    """
+    A board that, apart from the grid of fields, keeps 64-bit integer
+    bitboards: one per piece symbol (i.e. per piece type and colour),
+    one per colour and one for the combined occupancy.
+
+    Bit `i` of each mask corresponds to `Location.from_index(i)`.
+    """
+
+    def __init__(self):
+        super(BitboardBoard, self).__init__()
+        self._piece_masks = dict.fromkeys(self._piece_factory.symbols_dir, 0)
+        self._color_masks = {True: 0, False: 0}
+        self.occupied = 0
+
+    def __setitem__(self, loc, piece):
+        old_piece = self[loc]
+        super(BitboardBoard, self).__setitem__(loc, piece)
+        bit = 1 << loc._index
+        if old_piece is not None:
+            self._clear_bit(old_piece, bit)
+        self._set_bit(piece, bit)
+
+    def __delitem__(self, loc):
+        old_piece = self[loc]
+        super(BitboardBoard, self).__delitem__(loc)
+        if old_piece is not None:
+            self._clear_bit(old_piece, 1 << loc._index)
+
+    def is_path_clear(self, path):
+        mask = 0
+        for loc in path:
+            mask |= 1 << loc._index
+        return not (self.occupied & mask)
+
+    def is_mask_clear(self, mask):
+        return not (self.occupied & mask)
+
+    def get_piece_mask(self, symbol):
+        return self._piece_masks[symbol]
+
+    def get_color_mask(self, is_white):
+        return self._color_masks[is_white]
+
+    def iter_piece_locations(self, symbol):
+        return (Location.from_index(index)
+                for index in iter_indices(self._piece_masks[symbol]))
+
+    # non-public helpers:
+
+    def _set_rows_of_fields(self, rows):
+        # the masks, the counts and the key are computed in a single pass
+        self._rows_of_fields = rows
+        piece_masks = dict.fromkeys(self._piece_masks, 0)
+        piece_counts = dict.fromkeys(self._piece_counts, 0)
+        key = 0
+        index = 0
+        for row in rows:
+            for piece in row:
+                if piece is not None:
+                    piece_masks[piece.symbol] |= 1 << index
+                    piece_counts[piece.symbol] += 1
+                    key ^= PIECE_KEYS[piece.symbol][index]
+                index += 1
+        white = black = 0
+        for symbol, mask in piece_masks.iteritems():
+            if symbol.isupper():
+                white |= mask
+            else:
+                black |= mask
+        self._piece_masks = piece_masks
+        self._piece_counts = piece_counts
+        self._color_masks = {True: white, False: black}
+        self.occupied = white | black
+        self.zobrist_key = key
+
+    def _set_bit(self, piece, bit):
+        symbol = piece.symbol
+        self._piece_masks[symbol] |= bit
+        self._color_masks[piece.is_white] |= bit
+        self.occupied |= bit
+
+    def _clear_bit(self, piece, bit):
+        symbol = piece.symbol
+        self._piece_masks[symbol] &= ~bit
+        self._color_masks[piece.is_white] &= ~bit
+        self.occupied &= ~bit
 
 
 class Location(object):
 
-    def __init__(self, loc_label):
+    """
+    A board field location.
+
+    Instances are interned: there are exactly 64 of them, built once at
+    import time, and both `Location('e4')` and the `from_index()` /
+    `from_xy()` constructors return the canonical instance.  The square
+    index is `y * 8 + x`, so it grows in the board's row order: `a8` is
+    0, `h8` is 7, ..., `h1` is 63.
+    """
+
+    __slots__ = ('loc_label', 'x_label', 'y_label',
+                 '_x', '_y', '_index', '_hash')
+
+    def __new__(cls, loc_label):
         assert isinstance(loc_label, str)
-        self.loc_label = loc_label.lower()
-        (self.x_label,
-         self.y_label,
-         self._x,
-         self._y) = self._parse_loc_label(self.loc_label)
+        try:
+            return _LABEL_TO_LOCATION[loc_label.lower()]
+        except KeyError:
+            raise UserActionError(
+                '{!r} is not a valid location label.'.format(loc_label))
 
     def __repr__(self):
         return '{0.__class__.__name__}({0.loc_label!r})'.format(self)
@@ -86,13 +368,36 @@ class Location(object):
     def __eq__(self, other):
         if not isinstance(other, Location):
             return NotImplemented
-        return self.loc_label == other.loc_label
+        return self._index == other._index
 
     def __ne__(self, other):
         return not (self == other)
 
     def __hash__(self):
-        return hash(self.loc_label)
+        return self._hash
+
+    def __reduce__(self):
+        return Location, (self.loc_label,)
+
+    @property
+    def x(self):
+        return self._x
+
+    @property
+    def y(self):
+        return self._y
+
+    @property
+    def index(self):
+        return self._index
+
+    @staticmethod
+    def from_index(index):
+        return _LOCATIONS[index]
+
+    @staticmethod
+    def from_xy(x, y):
+        return _LOCATIONS[y * _BOARD_SIZE + x]
 
     def get_vector(self, dst):
         assert isinstance(dst, Location)
@@ -109,11 +414,24 @@ class Location(object):
 
     # non-public helpers:
 
-    def _parse_loc_label(self, loc_label):
+    @classmethod
+    def _create_canonical(cls, loc_label):
+        loc = object.__new__(cls)
+        loc.loc_label = loc_label
+        (loc.x_label,
+         loc.y_label,
+         loc._x,
+         loc._y) = cls._parse_loc_label(loc_label)
+        loc._index = loc._y * _BOARD_SIZE + loc._x
+        loc._hash = hash(loc_label)
+        return loc
+
+    @classmethod
+    def _parse_loc_label(cls, loc_label):
         try:
             x_label, y_label = loc_label
-            x = self._parse_x_label(x_label)
-            y = self._parse_y_label(y_label)
+            x = cls._parse_x_label(x_label)
+            y = cls._parse_y_label(y_label)
         except (ValueError, KeyError):
             raise UserActionError(
                 '{!r} is not a valid location label.'.format(loc_label))
@@ -143,7 +461,7 @@ class Location(object):
                     0 <= y <= len(_Y_LABELS))
             if (x, y) == (dst._x, dst._y):
                 break
-            yield self._new_from_x_y(x, y)
+            yield _LOCATIONS[y * _BOARD_SIZE + x]
 
     def _in_straight_line(self, x_delta, y_delta):
         return (x_delta == 0 or
@@ -155,7 +473,10 @@ class Location(object):
         assert -1 <= step <= 1
         return step
 
-    @classmethod
-    def _new_from_x_y(cls, x, y):
-        loc_label = cls.make_loc_label(_X_LABELS[x], _Y_LABELS[y])
-        return cls(loc_label)
+
+_LOCATIONS = tuple(
+    Location._create_canonical(Location.make_loc_label(x_label, y_label))
+    for y_label in _Y_LABELS
+    for x_label in _X_LABELS)
+
+_LABEL_TO_LOCATION = {loc.loc_label: loc for loc in _LOCATIONS}
@@ -0,0 +1,11 @@
+from chess.engine.evaluation import (
+    PIECE_VALUES,
+    evaluate,
+)
+from chess.engine.parallel import search_parallel
+from chess.engine.search import (
+    MATE_SCORE,
+    SearchResult,
+    Searcher,
+)
+from chess.engine.transposition import TranspositionTable
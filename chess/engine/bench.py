@@ -0,0 +1,59 @@
+"""
+Measure how the search speed scales with the number of worker processes.
+
+    python -m chess.engine.bench --time 5
+    python -m chess.engine.bench --workers 1 2 4 8 --time 10
+"""
+
+import argparse
+import multiprocessing
+import sys
+
+from chess.engine.parallel import search_parallel
+from chess.engine.transposition import (
+    DEFAULT_SIZE_MB,
+    TranspositionTable,
+)
+from chess.perft import REFERENCE_POSITIONS
+from chess.session import ChessGameSession
+from chess.util import per_second
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m chess.engine.bench',
+        description='Compare search speed for various worker counts.')
+    parser.add_argument('--workers', '--threads', type=int, nargs='+',
+                        default=sorted({1, multiprocessing.cpu_count()}),
+                        help='worker process counts to compare')
+    parser.add_argument('--time', type=float, default=3.0,
+                        help='seconds of search per position')
+    parser.add_argument('--hash', type=int, default=DEFAULT_SIZE_MB,
+                        help='transposition table size in megabytes')
+    args = parser.parse_args(argv)
+    if min(args.workers) < 1 or args.time <= 0 or args.hash < 1:
+        parser.error('--workers, --time and --hash must be positive')
+
+    base_speed = None
+    for workers in args.workers:
+        total_nodes = 0
+        total_time = 0.0
+        for name, fen, _ in REFERENCE_POSITIONS:
+            session = ChessGameSession.from_fen(fen)
+            table = TranspositionTable(args.hash, shared=True)
+            result = search_parallel(session, workers,
+                                     time_limit=args.time, table=table)
+            total_nodes += result.nodes
+            total_time += result.elapsed
+            print '{} worker(s), {:<12} depth {:>2}  {:<8} {:>9} nodes'.format(
+                workers, name, result.depth, result.move, result.nodes)
+        speed = per_second(total_nodes, total_time)
+        if base_speed is None:
+            base_speed = speed
+        print '{} worker(s): {:.0f} n/s, {:.2f}x\n'.format(
+            workers, speed, speed / base_speed if base_speed else 0.0)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
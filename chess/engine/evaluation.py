@@ -0,0 +1,123 @@
+"""
+Static evaluation of chess positions: material plus piece-square tables.
+
+Scores are in centipawns, from the point of view of the side to move.
+"""
+
+from chess.bitboard import iter_indices
+
+
+PIECE_VALUES = {
+    'P': 100,
+    'N': 320,
+    'B': 330,
+    'R': 500,
+    'Q': 900,
+    'K': 0,
+}
+
+# Piece-square tables from white's point of view, listed row by row
+# from row '8' to row '1' -- i.e. indexed by Location.index for white
+# pieces and by (Location.index ^ 56) for black ones (mirrored rows).
+_PIECE_SQUARE_TABLES = {
+    'P': [
+        0,   0,   0,   0,   0,   0,   0,   0,
+        50,  50,  50,  50,  50,  50,  50,  50,
+        10,  10,  20,  30,  30,  20,  10,  10,
+        5,   5,   10,  25,  25,  10,  5,   5,
+        0,   0,   0,   20,  20,  0,   0,   0,
+        5,   -5,  -10, 0,   0,   -10, -5,  5,
+        5,   10,  10,  -20, -20, 10,  10,  5,
+        0,   0,   0,   0,   0,   0,   0,   0,
+    ],
+    'N': [
+        -50, -40, -30, -30, -30, -30, -40, -50,
+        -40, -20, 0,   0,   0,   0,   -20, -40,
+        -30, 0,   10,  15,  15,  10,  0,   -30,
+        -30, 5,   15,  20,  20,  15,  5,   -30,
+        -30, 0,   15,  20,  20,  15,  0,   -30,
+        -30, 5,   10,  15,  15,  10,  5,   -30,
+        -40, -20, 0,   5,   5,   0,   -20, -40,
+        -50, -40, -30, -30, -30, -30, -40, -50,
+    ],
+    'B': [
+        -20, -10, -10, -10, -10, -10, -10, -20,
+        -10, 0,   0,   0,   0,   0,   0,   -10,
+        -10, 0,   5,   10,  10,  5,   0,   -10,
+        -10, 5,   5,   10,  10,  5,   5,   -10,
+        -10, 0,   10,  10,  10,  10,  0,   -10,
+        -10, 10,  10,  10,  10,  10,  10,  -10,
+        -10, 5,   0,   0,   0,   0,   5,   -10,
+        -20, -10, -10, -10, -10, -10, -10, -20,
+    ],
+    'R': [
+        0,   0,   0,   0,   0,   0,   0,   0,
+        5,   10,  10,  10,  10,  10,  10,  5,
+        -5,  0,   0,   0,   0,   0,   0,   -5,
+        -5,  0,   0,   0,   0,   0,   0,   -5,
+        -5,  0,   0,   0,   0,   0,   0,   -5,
+        -5,  0,   0,   0,   0,   0,   0,   -5,
+        -5,  0,   0,   0,   0,   0,   0,   -5,
+        0,   0,   0,   5,   5,   0,   0,   0,
+    ],
+    'Q': [
+        -20, -10, -10, -5,  -5,  -10, -10, -20,
+        -10, 0,   0,   0,   0,   0,   0,   -10,
+        -10, 0,   5,   5,   5,   5,   0,   -10,
+        -5,  0,   5,   5,   5,   5,   0,   -5,
+        0,   0,   5,   5,   5,   5,   0,   -5,
+        -10, 5,   5,   5,   5,   5,   0,   -10,
+        -10, 0,   5,   0,   0,   0,   0,   -10,
+        -20, -10, -10, -5,  -5,  -10, -10, -20,
+    ],
+    'K': [
+        -30, -40, -40, -50, -50, -40, -40, -30,
+        -30, -40, -40, -50, -50, -40, -40, -30,
+        -30, -40, -40, -50, -50, -40, -40, -30,
+        -30, -40, -40, -50, -50, -40, -40, -30,
+        -20, -30, -30, -40, -40, -30, -30, -20,
+        -10, -20, -20, -20, -20, -20, -20, -10,
+        20,  20,  0,   0,   0,   0,   20,  20,
+        20,  30,  10,  0,   0,   10,  30,  20,
+    ],
+}
+
+
+def _make_square_values():
+    # {<piece symbol>: [<material + positional value> for each index]}
+    square_values = {}
+    for symbol, table in _PIECE_SQUARE_TABLES.items():
+        value = PIECE_VALUES[symbol]
+        square_values[symbol] = [value + bonus for bonus in table]
+        square_values[symbol.lower()] = [value + table[index ^ 56]
+                                         for index in range(64)]
+    return square_values
+
+
+_SQUARE_VALUES = _make_square_values()
+
+
+def evaluate(session):
+    """
+    Evaluate the position of the session, from the point of view
+    of the side to move.
+
+    :param session: ChessGameSession
+    :return: int (centipawns)
+    """
+    board = session.board
+    score = 0
+    for symbol, values in _SQUARE_VALUES.iteritems():
+        mask = board.get_piece_mask(symbol)
+        if not mask:
+            continue
+        subtotal = 0
+        for index in iter_indices(mask):
+            subtotal += values[index]
+        if symbol.isupper():
+            score += subtotal
+        else:
+            score -= subtotal
+    if session.is_white_turn:
+        return score
+    return -score
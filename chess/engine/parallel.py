@@ -0,0 +1,84 @@
+"""
+Lazy SMP: a parallel search in a process pool sharing a transposition
+table.
+
+Every worker searches the whole position with iterative deepening;
+they cooperate only through the shared table, where each one finds the
+results (and the best moves) stored by the others.  Odd workers start
+one iteration deeper, so that the workers do not just repeat each
+other's work.
+"""
+
+import multiprocessing
+import time
+
+from chess.engine.search import (
+    MAX_PLY,
+    SearchResult,
+    Searcher,
+)
+from chess.engine.transposition import (
+    DEFAULT_SIZE_MB,
+    TranspositionTable,
+)
+
+
+# set in every worker process by _init_worker()
+_worker_table = None
+
+
+def search_parallel(session, workers=None, max_depth=MAX_PLY,
+                    time_limit=None, node_limit=None, table=None):
+    """
+    Search the position of the session in a process pool (see
+    Searcher.search() for the meaning of the limits, which apply to
+    each worker).
+
+    :param workers: number of worker processes (default: CPU count;
+                    1 means a plain search in the current process)
+    :param table: TranspositionTable allocated with shared=True
+                  (a new one of the default size is made if not given)
+    :return: SearchResult of the worker which completed the deepest
+             iteration (its move is one of the session's legal moves;
+             nodes are summed over all workers)
+    """
+    if workers is None:
+        workers = multiprocessing.cpu_count()
+    if table is None:
+        table = TranspositionTable(DEFAULT_SIZE_MB, shared=True)
+    assert table.shared
+    if workers == 1:
+        return Searcher(table=table).search(
+            session, max_depth, time_limit, node_limit)
+    start = time.time()
+    tasks = [(session, worker_id, max_depth, time_limit, node_limit)
+             for worker_id in range(workers)]
+    # the pool must be created after the table: its processes are forked
+    # with the table's shared memory already mapped
+    pool = multiprocessing.Pool(workers, _init_worker, (table,))
+    try:
+        results = pool.map(_search_task, tasks, chunksize=1)
+    finally:
+        pool.terminate()
+        pool.join()
+    worker_id, move_label, score, depth = max(
+        results, key=lambda result: (result[3], -result[0]))[:4]
+    moves_by_label = {str(move): move
+                      for move in session.generate_legal_moves()}
+    return SearchResult(moves_by_label.get(move_label), score, depth,
+                        sum(result[4] for result in results),
+                        time.time() - start)
+
+
+def _init_worker(table):
+    global _worker_table
+    _worker_table = table
+
+
+def _search_task(task):
+    session, worker_id, max_depth, time_limit, node_limit = task
+    result = Searcher(table=_worker_table).search(
+        session, max_depth, time_limit, node_limit,
+        start_depth=1 + worker_id % 2)
+    move_label = None if result.move is None else str(result.move)
+    return worker_id, move_label, result.score, result.depth, result.nodes
@@ -0,0 +1,260 @@
+"""
+Negamax alpha-beta search with iterative deepening.
+"""
+
+import collections
+import time
+
+from chess.engine.evaluation import (
+    PIECE_VALUES,
+    evaluate,
+)
+from chess.engine.transposition import (
+    EXACT,
+    LOWER_BOUND,
+    UPPER_BOUND,
+    TranspositionTable,
+)
+
+
+MATE_SCORE = 100000
+INFINITY = 10 * MATE_SCORE
+
+MAX_PLY = 64
+
+# the budget is checked every that many nodes
+_BUDGET_CHECK_INTERVAL = 512
+
+# scores beyond that are mates (in at most MAX_PLY plies)
+_MATE_THRESHOLD = MATE_SCORE - MAX_PLY
+
+# ordering: TT/PV move, captures (MVV-LVA), killers, then history
+_PV_MOVE_ORDER = 1 << 30
+_CAPTURE_ORDER = 1 << 20
+_KILLER_ORDER = 1 << 19
+
+
+SearchResult = collections.namedtuple(
+    'SearchResult', ['move', 'score', 'depth', 'nodes', 'elapsed'])
+
+
+class SearchTimeout(Exception):
+
+    """
+    Raised internally when the search budget is exhausted.
+    """
+
+
+class Searcher(object):
+
+    """
+    Finds the best move for the side to move of a ChessGameSession.
+
+    The search walks the game tree with the session's push()/pop(), so
+    the session is left exactly as it was given.  Results are cached in
+    a TranspositionTable keyed by the session's Zobrist key (the table
+    is kept between searches).  The moves are ordered by: the best move
+    known from the table or the previous iteration, captures by MVV-LVA
+    (most valuable victim, least valuable attacker), killer moves (quiet
+    moves which caused a beta cutoff at the same ply) and the history
+    heuristic (quiet moves which caused cutoffs anywhere).
+
+    Positions repeated (in the search or the game played so far) and
+    those in which the fifty-move rule applies are scored as draws.
+    """
+
+    def __init__(self, evaluate=evaluate, table=None):
+        """
+        :param table: TranspositionTable (a new one of the default size
+                      is made if not given)
+        """
+        self._evaluate = evaluate
+        self.table = TranspositionTable() if table is None else table
+        self._killers = None
+        self._history = None
+        self._nodes = 0
+        self._deadline = None
+        self._node_limit = None
+
+    def search(self, session, max_depth=MAX_PLY, time_limit=None,
+               node_limit=None, start_depth=1):
+        """
+        Search the position with iterative deepening, until `max_depth`
+        is completed or the time (in seconds) or the node budget is
+        exhausted.  The iterations start at `start_depth`.
+
+        :return: SearchResult (its move is None if there are no legal
+                 moves; depth is that of the last completed iteration)
+        """
+        start = time.time()
+        self._deadline = None if time_limit is None else start + time_limit
+        self._node_limit = node_limit
+        self._nodes = 0
+        self._killers = [[None, None] for _ in range(MAX_PLY + 1)]
+        self._history = collections.defaultdict(int)
+        self.table.new_search()
+
+        root_moves = list(session.generate_legal_moves())
+        if not root_moves:
+            score = -MATE_SCORE if session.is_check() else 0
+            return SearchResult(None, score, 0, 0, time.time() - start)
+        best_move, best_score, completed_depth = root_moves[0], 0, 0
+        for depth in range(min(start_depth, max_depth), max_depth + 1):
+            try:
+                best_move, best_score = self._search_root(
+                    session, root_moves, depth, best_move)
+            except SearchTimeout:
+                break
+            completed_depth = depth
+            if abs(best_score) >= _MATE_THRESHOLD:
+                break
+        return SearchResult(best_move, best_score, completed_depth,
+                            self._nodes, time.time() - start)
+
+    # non-public helpers:
+
+    def _search_root(self, session, root_moves, depth, pv_move):
+        alpha = -INFINITY
+        best_move = None
+        for move in self._order_moves(session, root_moves, 0,
+                                      pv_move.get_code()):
+            session.push(move)
+            try:
+                score = -self._negamax(session, depth - 1, -INFINITY, -alpha, 1)
+            finally:
+                session.pop()
+            if score > alpha:
+                alpha = score
+                best_move = move
+        self.table.store(session.zobrist_key, best_move.get_code(), depth,
+                         EXACT, _score_to_table(alpha, 0))
+        return best_move, alpha
+
+    def _negamax(self, session, depth, alpha, beta, ply):
+        self._count_node()
+        # (a single repetition is enough: if it was worth repeating the
+        # position once, it is worth repeating it again)
+        if (session.get_repetition_count() > 1 or
+                session.halfmove_clock >= 100):
+            return 0
+        if depth <= 0 or ply >= MAX_PLY:
+            return self._quiesce(session, alpha, beta, ply)
+        key = session.zobrist_key
+        table_move_code = None
+        entry = self.table.probe(key)
+        if entry is not None:
+            table_move_code, entry_depth, flag, score = entry
+            if entry_depth >= depth:
+                score = _score_from_table(score, ply)
+                if (flag == EXACT or
+                        (flag == LOWER_BOUND and score >= beta) or
+                        (flag == UPPER_BOUND and score <= alpha)):
+                    return score
+        moves = list(session.generate_legal_moves())
+        if not moves:
+            return -MATE_SCORE + ply if session.is_check() else 0
+        original_alpha = alpha
+        best_score = -INFINITY
+        best_move_code = 0
+        for move in self._order_moves(session, moves, ply, table_move_code):
+            is_capture = move.is_capture()
+            session.push(move)
+            try:
+                score = -self._negamax(session, depth - 1, -beta, -alpha, ply + 1)
+            finally:
+                session.pop()
+            if score > best_score:
+                best_score = score
+                best_move_code = move.get_code()
+            if score > alpha:
+                alpha = score
+            if alpha >= beta:
+                if not is_capture:
+                    self._remember_quiet_cutoff(move, depth, ply)
+                break
+        if best_score >= beta:
+            flag = LOWER_BOUND
+        elif best_score > original_alpha:
+            flag = EXACT
+        else:
+            flag = UPPER_BOUND
+        self.table.store(key, best_move_code, depth, flag,
+                         _score_to_table(best_score, ply))
+        return best_score
+
+    def _quiesce(self, session, alpha, beta, ply):
+        stand_pat = self._evaluate(session)
+        if stand_pat >= beta:
+            return stand_pat
+        if stand_pat > alpha:
+            alpha = stand_pat
+        captures = [move for move in session.generate_legal_moves()
+                    if move.is_capture()]
+        for move in self._order_moves(session, captures, ply):
+            self._count_node()
+            session.push(move)
+            try:
+                score = -self._quiesce(session, -beta, -alpha, ply + 1)
+            finally:
+                session.pop()
+            if score >= beta:
+                return score
+            if score > alpha:
+                alpha = score
+        return alpha
+
+    def _order_moves(self, session, moves, ply, pv_code=None):
+        killers = self._killers[ply]
+        history = self._history
+        board = session.board
+
+        def get_order(move):
+            code = move.get_code()
+            if code == pv_code:
+                return _PV_MOVE_ORDER
+            if move.is_capture():
+                victim = board[move.dst]
+                victim_value = PIECE_VALUES[
+                    'P' if victim is None else victim.symbol.upper()]
+                attacker_value = PIECE_VALUES[move.piece.symbol.upper()]
+                return _CAPTURE_ORDER + 10 * victim_value - attacker_value
+            if code in killers:
+                return _KILLER_ORDER
+            return history[code]
+
+        return sorted(moves, key=get_order, reverse=True)
+
+    def _remember_quiet_cutoff(self, move, depth, ply):
+        code = move.get_code()
+        killers = self._killers[ply]
+        if killers[0] != code:
+            killers[1] = killers[0]
+            killers[0] = code
+        self._history[code] += depth * depth
+
+    def _count_node(self):
+        self._nodes += 1
+        if self._nodes % _BUDGET_CHECK_INTERVAL == 0:
+            if self._node_limit is not None and self._nodes >= self._node_limit:
+                raise SearchTimeout
+            if self._deadline is not None and time.time() >= self._deadline:
+                raise SearchTimeout
+
+
+# mate scores are stored relative to the stored position (not to the
+# root), so that they stay correct when reached at another ply
+
+def _score_to_table(score, ply):
+    if score >= _MATE_THRESHOLD:
+        return score + ply
+    if score <= -_MATE_THRESHOLD:
+        return score - ply
+    return score
+
+
+def _score_from_table(score, ply):
+    if score >= _MATE_THRESHOLD:
+        return score - ply
+    if score <= -_MATE_THRESHOLD:
+        return score + ply
+    return score
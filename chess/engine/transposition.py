@@ -0,0 +1,157 @@
+"""
+A fixed-size transposition table for the search.
+
+The table is preallocated as flat arrays of 32-bit ints (no Python
+object per entry), so its memory footprint is known in advance and
+does not change during a search.  The arrays can be allocated in shared
+memory, so that worker processes forked afterwards use the same table
+(see `chess.engine.parallel`).
+"""
+
+import array
+import ctypes
+import multiprocessing.sharedctypes
+
+
+EXACT = 1
+LOWER_BOUND = 2
+UPPER_BOUND = 3
+
+DEFAULT_SIZE_MB = 16
+
+# each bucket has two slots: the depth-preferred one (replaced only by
+# deeper results, or by anything when its entry is from an older search)
+# and the always-replace one
+_SLOTS_PER_BUCKET = 2
+
+# per slot: key check ('I'), packed info ('I') and score ('i'); the
+# check is stored XORed with the info and the score (see probe())
+_SLOT_SIZE = 3 * array.array('I').itemsize
+
+_WORD_MASK = 0xffffffff
+
+# info layout: move code (bits 0-15), depth (16-23), flag (24-25)
+# and search generation (26-31); flag 0 means an empty slot
+_DEPTH_SHIFT = 16
+_FLAG_SHIFT = 24
+_GENERATION_SHIFT = 26
+_MOVE_MASK = 0xffff
+_DEPTH_MASK = 0xff
+_FLAG_MASK = 0x3
+_GENERATION_MASK = 0x3f
+
+
+class TranspositionTable(object):
+
+    """
+    Maps position keys (see `chess.zobrist`) to search results:
+    (<move code>, <depth>, <flag>, <score>), where the flag tells if
+    the score is EXACT, a LOWER_BOUND or an UPPER_BOUND.
+
+    The low bits of a key select the bucket and its high 32 bits are
+    stored to verify the match -- XORed with the rest of the entry, so
+    that an entry mixed up by concurrent writers (see the `shared`
+    option) does not match any key (save for a hash collision) and is
+    never returned.
+    """
+
+    def __init__(self, size_mb=DEFAULT_SIZE_MB, shared=False):
+        """
+        :param size_mb: the memory cap, in megabytes
+        :param shared: if true, the table is allocated in shared memory
+                       (accesses are not locked: mixed-up entries are
+                       detected instead, see above)
+        """
+        assert size_mb > 0
+        bucket_count = 1
+        while (2 * bucket_count * _SLOTS_PER_BUCKET * _SLOT_SIZE <=
+               size_mb * 1024 * 1024):
+            bucket_count *= 2
+        self.size_mb = size_mb
+        self.shared = shared
+        self.capacity = bucket_count * _SLOTS_PER_BUCKET
+        self._bucket_mask = bucket_count - 1
+        self._allocate()
+
+    def clear(self):
+        if self.shared:
+            # must stay in place: other processes refer to the same memory
+            for arr in (self._checks, self._infos, self._scores):
+                ctypes.memset(arr, 0, ctypes.sizeof(arr))
+            self._generation = 0
+        else:
+            self._allocate()
+
+    def new_search(self):
+        """
+        Mark the entries stored so far as older, so that the
+        depth-preferred slots can be reused by the next search.
+        """
+        self._generation = (self._generation + 1) & _GENERATION_MASK
+
+    def probe(self, key):
+        """
+        :return: (<move code>, <depth>, <flag>, <score>) or None
+        """
+        check = key >> 32
+        slot = (key & self._bucket_mask) * _SLOTS_PER_BUCKET
+        for slot in (slot, slot + 1):
+            # each word is read once: the check is verified against
+            # exactly the info and the score which are returned
+            info = self._infos[slot]
+            score = self._scores[slot]
+            if info and _get_check(self._checks[slot], info, score) == check:
+                return (info & _MOVE_MASK,
+                        info >> _DEPTH_SHIFT & _DEPTH_MASK,
+                        info >> _FLAG_SHIFT & _FLAG_MASK,
+                        score)
+        return None
+
+    def store(self, key, move_code, depth, flag, score):
+        """
+        :param move_code: the best move's code (see `Move.get_code()`)
+                          or 0 if there is none
+        """
+        assert flag in (EXACT, LOWER_BOUND, UPPER_BOUND)
+        check = key >> 32
+        slot = (key & self._bucket_mask) * _SLOTS_PER_BUCKET
+        info = self._infos[slot]
+        is_same_position = info and _get_check(
+            self._checks[slot], info, self._scores[slot]) == check
+        if (info and
+                not is_same_position and
+                info >> _GENERATION_SHIFT == self._generation and
+                info >> _DEPTH_SHIFT & _DEPTH_MASK > depth):
+            slot += 1
+        elif not move_code and is_same_position:
+            # do not forget the best move known for the same position
+            move_code = info & _MOVE_MASK
+        info = (move_code |
+                min(depth, _DEPTH_MASK) << _DEPTH_SHIFT |
+                flag << _FLAG_SHIFT |
+                self._generation << _GENERATION_SHIFT)
+        self._checks[slot] = _get_check(check, info, score)
+        self._infos[slot] = info
+        self._scores[slot] = score
+
+    def count_used_slots(self):
+        return sum(1 for info in self._infos if info)
+
+    # non-public helpers:
+
+    def _allocate(self):
+        if self.shared:
+            make_array = multiprocessing.sharedctypes.RawArray
+        else:
+            make_array = lambda typecode, size: (
+                array.array(typecode, [0]) * size)
+        self._checks = make_array('I', self.capacity)
+        self._infos = make_array('I', self.capacity)
+        self._scores = make_array('i', self.capacity)
+        self._generation = 0
+
+
+def _get_check(check, info, score):
+    # XORing the stored check with the entry's other words gives the
+    # key's check back (and XORing the key's check gives what is stored)
+    return check ^ info ^ (score & _WORD_MASK)
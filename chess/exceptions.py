@@ -7,3 +7,8 @@ class UserActionError(Exception):
             msg = self.default_msg
         super(UserActionError, self).__init__(msg, *args)
         self.msg = msg
+
+
+class PgnError(UserActionError):
+
+    default_msg = 'The PGN data is not valid.'
@@ -1,5 +1,6 @@
 from chess.session_runner import (
     ChessGameSessionRunner,
+    ChessGameVsComputerSessionRunner,
     QueensPuzzleSessionRunner,
 )
 from chess.ui import UserInputMixin
@@ -7,6 +8,9 @@ from chess.ui import UserInputMixin
 
 class ChessMajsterGame(UserInputMixin):
 
+    def __init__(self, ansi=False):
+        self.ansi = ansi
+
     def run(self):
         self.welcome()
         session_runner = self.choose_session_runner()
@@ -25,11 +29,14 @@ class ChessMajsterGame(UserInputMixin):
             print
             print '1) chess game'
             print '2) queens puzzle'
+            print '3) chess game against the computer'
             print
             choice = self.input('Your choice:')
             if choice == '1':
-                return ChessGameSessionRunner()
+                return ChessGameSessionRunner(self.ansi)
             elif choice == '2':
-                return QueensPuzzleSessionRunner()
+                return QueensPuzzleSessionRunner(self.ansi)
+            elif choice == '3':
+                return ChessGameVsComputerSessionRunner(self.ansi)
             else:
-                print '1 or 2 expected...\n'
+                print '1, 2 or 3 expected...\n'
@@ -1,3 +1,4 @@
+import chess.movegen
 from chess.board_loc import Location
 from chess.exceptions import UserActionError
 from chess.piece import (
@@ -5,7 +6,48 @@ from chess.piece import (
     Pawn,
     Rook,
 )
-from chess.util import critical_part
+
+
+PROMOTION_CODES = {
+    'N': 1,
+    'B': 2,
+    'R': 3,
+    'Q': 4,
+}
+
+_PROMOTION_CODE_TO_SYMBOL = {code: symbol
+                             for symbol, code in PROMOTION_CODES.items()}
+
+# move validation results (see Move.validate())
+LEGAL = 0
+NO_PIECE = 1
+NOT_OWN_PIECE = 2
+SAME_LOCATION = 3
+INVALID_ROUTE = 4
+PATH_BLOCKED = 5
+ATTACK_REQUIRED = 6
+ATTACK_FORBIDDEN = 7
+OWN_PIECE_ATTACKED = 8
+INVALID_EN_PASSANT = 9
+INVALID_PROMOTION = 10
+KING_LEFT_IN_CHECK = 11
+CASTLING_IMPOSSIBLE = 12
+
+VALIDATION_MESSAGES = {
+    NO_PIECE: 'Source location does not contain any figure.',
+    NOT_OWN_PIECE: 'You tried to move not your piece.',
+    SAME_LOCATION: 'You tried to move to the same location.',
+    INVALID_ROUTE: UserActionError.default_msg,
+    PATH_BLOCKED: 'Other piece on move path.',
+    ATTACK_REQUIRED: 'This move has to be an attack.',
+    ATTACK_FORBIDDEN: 'This move can\'t be an attack.',
+    OWN_PIECE_ATTACKED: 'You tried to attack your\'s piece.',
+    INVALID_EN_PASSANT: 'Invalid en passant attack.',
+    INVALID_PROMOTION: 'Only a pawn reaching the last row can be promoted '
+                       '(and it must be).',
+    KING_LEFT_IN_CHECK: 'This move would leave your king in check.',
+    CASTLING_IMPOSSIBLE: 'Castling is not possible.',
+}
 
 
 class MoveFactory(object):
@@ -13,13 +55,23 @@ class MoveFactory(object):
     _queenside_castling_label = '0-0-0'
     _kingside_castling_label = '0-0'
 
+    _promotion_symbols = 'QRBN'
+
     def create(self, session, move_spec):
         from chess.session import ChessGameSession
         assert isinstance(session, ChessGameSession)
         assert isinstance(move_spec, list)
         assert all(isinstance(item, str) for item in move_spec)
         if len(move_spec) == 2:
-            move = NormalMove(session, *move_spec)
+            src_label, dst_label = move_spec
+            move = NormalMove(session, Location(src_label), Location(dst_label))
+        elif len(move_spec) == 3:
+            src_label, dst_label, promotion_label = move_spec
+            move = NormalMove(
+                session,
+                Location(src_label),
+                Location(dst_label),
+                self._create_promotion(session, promotion_label))
         elif len(move_spec) == 1:
             if move_spec[0] == self._queenside_castling_label:
                 move = QueensideCastlingMove(session)
@@ -31,6 +83,38 @@ class MoveFactory(object):
             raise UserActionError
         return move
 
+    def create_from_code(self, session, code):
+        """
+        Create a move from its 16-bit code (see Move.get_code()).
+
+        The move is not validated (just as with create()).
+        """
+        src = Location.from_index(code & 0x3f)
+        dst = Location.from_index(code >> 6 & 0x3f)
+        promotion_code = code >> 12 & 0x7
+        if isinstance(session.board[src], King) and abs(dst.x - src.x) == 2:
+            if dst.x > src.x:
+                return KingsideCastlingMove(session)
+            return QueensideCastlingMove(session)
+        if promotion_code:
+            return NormalMove(
+                session, src, dst,
+                self._create_promotion(
+                    session, _PROMOTION_CODE_TO_SYMBOL[promotion_code]))
+        return NormalMove(session, src, dst)
+
+    # non-public helpers:
+
+    def _create_promotion(self, session, promotion_label):
+        # (a membership test on a string would accept '' and 'QR' too)
+        if (len(promotion_label) != 1 or
+                promotion_label.upper() not in self._promotion_symbols):
+            raise UserActionError(
+                '{!r} is not a valid promotion piece.'.format(promotion_label))
+        if session.is_white_turn:
+            return session.board.create_piece(promotion_label.upper())
+        return session.board.create_piece(promotion_label.lower())
+
 
 class Move(object):
 
@@ -38,17 +122,94 @@ class Move(object):
         self._session = session
 
     def execute(self):
+        """
+        Validate the move and, if it is valid, make it in the session
+        (otherwise raise UserActionError).
+        """
+        reason = self.validate()
+        if reason != LEGAL:
+            raise UserActionError(self.get_error_msg(reason))
+        self._session.push(self)
+
+    def validate(self):
+        """
+        Check whether the move is legal in the current position of the
+        session, without raising any exception.
+
+        :return: LEGAL, or the reason why the move is not legal (one
+                 of the other validation result constants)
+        """
+        raise NotImplementedError
+
+    def is_legal(self):
+        return self.validate() == LEGAL
+
+    def get_error_msg(self, reason):
+        """
+        :param reason: a validation result (see validate())
+        :return: the message explaining it to the user
+        """
+        return VALIDATION_MESSAGES[reason]
+
+    def make(self):
+        """
+        Mutate the board (and castling rights) without any validation.
+
+        Do not call it directly -- use the session's push().
+
+        :return: (<captured piece or None>, <its location or None>)
+        """
+        raise NotImplementedError
+
+    def unmake(self, captured_piece, captured_loc):
+        """
+        Revert the board changes done by make().
+        """
         raise NotImplementedError
 
+    def get_en_passant_target(self):
+        """
+        Get the field which can be attacked en passant after this move.
+        """
+        return None
+
+    def get_code(self):
+        """
+        Get the move encoded as a 16-bit int: the source field index
+        (bits 0-5), the destination field index (bits 6-11) and the
+        promotion piece (bits 12-14, see PROMOTION_CODES; 0 if none).
+        Castlings are encoded as the king's move.
+        """
+        raise NotImplementedError
+
+    def is_capture(self):
+        return False
+
+    def is_pawn_move(self):
+        return False
+
 
 class NormalMove(Move):
 
-    def __init__(self, session, src_label, dst_label):
+    _is_white_to_promotion_y_label = {
+        True: '8',
+        False: '1',
+    }
+
+    def __init__(self, session, src, dst, promotion=None):
+        assert isinstance(src, Location)
+        assert isinstance(dst, Location)
         super(NormalMove, self).__init__(session)
-        self.src = Location(src_label)
-        self.dst = Location(dst_label)
-        self.piece = session.board[self.src]
-        self._en_passant_attack_dst = None
+        self.src = src
+        self.dst = dst
+        self.piece = session.board[src]
+        self.promotion = promotion
+
+    def __str__(self):
+        if self.promotion is None:
+            return '{} {}'.format(self.src, self.dst)
+        return '{} {} {}'.format(
+            self.src, self.dst, self.promotion.get_symbol().lower())
 
     def get_vector(self):
         return self.src.get_vector(self.dst)
@@ -56,28 +217,90 @@ class NormalMove(Move):
     def get_path(self):
         return self.src.get_path(self.dst)
 
-    def execute(self):
-        self._validate_and_prepare()
-        with critical_part():
-            self._mutate_board()
-            self._maintain_future_castlings()
+    def get_code(self):
+        code = self.src.index | self.dst.index << 6
+        if self.promotion is not None:
+            code |= PROMOTION_CODES[self.promotion.symbol.upper()] << 12
+        return code
 
-    # non-public helpers:
+    def is_capture(self):
+        return (self._session.board[self.dst] is not None or
+                self.is_en_passant())
+
+    def is_pawn_move(self):
+        return isinstance(self.piece, Pawn)
+
+    def is_en_passant(self):
+        return (isinstance(self.piece, Pawn) and
+                self.src.x != self.dst.x and
+                self._session.board[self.dst] is None)
+
+    def get_captured_location(self):
+        if self.is_en_passant():
+            return Location.from_xy(self.dst.x, self.src.y)
+        return self.dst
 
-    def _validate_and_prepare(self):
-        self._check_src_not_empty()
-        self._check_if_player_owns_src_piece()
-        self._check_src_dst_are_distinct()
-        route = self.piece.get_route(self)
-        self._check_path(route)
-        self._check_dst_field(route)
+    def get_en_passant_target(self):
+        if isinstance(self.piece, Pawn) and abs(self.dst.y - self.src.y) == 2:
+            return Location.from_xy(self.src.x, (self.src.y + self.dst.y) // 2)
+        return None
 
-    def _mutate_board(self):
-        moved_piece = self._session.board.pop_piece(self.src)
+    def validate(self):
+        return self._validate(self.promotion)
+
+    def execute(self):
+        promotion = self.promotion
+        if (promotion is None and self.piece is not None and
+                self._is_promoting()):
+            # promote to a queen unless told otherwise
+            promotion = self._session.board.create_piece(
+                'Q' if self.piece.is_white else 'q')
+        reason = self._validate(promotion)
+        if reason != LEGAL:
+            raise UserActionError(self.get_error_msg(reason))
+        self.promotion = promotion
+        self._session.push(self)
+
+    def make(self):
+        board = self._session.board
+        captured_loc = self.get_captured_location()
+        moved_piece = board.pop_piece(self.src)
         assert moved_piece is self.piece
-        self._session.board[self.dst] = moved_piece
-        if self._en_passant_attack_dst:
-            del self._session.board[self._en_passant_attack_dst]
+        captured_piece = board.pop_piece(captured_loc)
+        board[self.dst] = self.promotion or moved_piece
+        self._maintain_future_castlings()
+        return captured_piece, captured_loc
+
+    def unmake(self, captured_piece, captured_loc):
+        board = self._session.board
+        del board[self.dst]
+        board[self.src] = self.piece
+        if captured_piece is not None:
+            board[captured_loc] = captured_piece
+
+    # non-public helpers:
+
+    def _validate(self, promotion):
+        piece = self.piece
+        if piece is None:
+            return NO_PIECE
+        session = self._session
+        if piece.is_white != session.is_white_turn:
+            return NOT_OWN_PIECE
+        if self.src is self.dst:
+            return SAME_LOCATION
+        route = piece.find_route(self.src, self.dst)
+        if route is None:
+            return INVALID_ROUTE
+        if not session.board.is_mask_clear(route.path_mask):
+            return PATH_BLOCKED
+        reason = self._validate_dst_field(route)
+        if reason == LEGAL:
+            reason = self._validate_promotion(promotion)
+        if reason == LEGAL and not chess.movegen.is_move_safe_for_king(
+                session, self):
+            reason = KING_LEFT_IN_CHECK
+        return reason
 
     def _maintain_future_castlings(self):
         player = self._session.current_player
@@ -85,55 +308,41 @@ class NormalMove(Move):
             player.queenside_castling_enabled = False
         if self._should_disable_kingside_castlings():
             player.kingside_castling_enabled = False
-
-    def _check_src_not_empty(self):
-        if self.piece is None:
-            raise UserActionError('Source location does not contain any figure.')
-
-    def _check_if_player_owns_src_piece(self):
-        if self.piece.is_white != self._session.is_white_turn:
-            raise UserActionError('You tried to move not your piece.')
-
-    def _check_src_dst_are_distinct(self):
-        if self.get_vector() == (0, 0):
-            raise UserActionError('You tried to move to the same location.')
-
-    def _check_path(self, route):
-        for loc in route.path:
-            if self._session.board[loc] is not None:
-                raise UserActionError('Other piece on move path.')
-
-    def _check_dst_field(self, route):
+        # capturing a rook in its corner takes the castling away
+        opponent = self._session.players[not self._session.is_white_turn]
+        opponent_y_label = self._is_white_to_promotion_y_label[
+            self._session.is_white_turn]
+        if self.dst.y_label == opponent_y_label:
+            if self.dst.x_label == 'a':
+                opponent.queenside_castling_enabled = False
+            elif self.dst.x_label == 'h':
+                opponent.kingside_castling_enabled = False
+
+    def _validate_dst_field(self, route):
         dst_piece = self._session.board[self.dst]
         if route.attack_required:
-            assert isinstance(self.piece, Pawn)
-            if not dst_piece:
-                self._check_en_passant()
+            if dst_piece is None:
+                if self.dst != self._session.en_passant_target:
+                    return INVALID_EN_PASSANT
             elif self.piece.is_white == dst_piece.is_white:
-                raise UserActionError('This move has to be an attack.')
-        if route.attack_forbidden:
-            if dst_piece:
-                raise UserActionError('This move can\'t be an attack.')
-        if dst_piece and self.piece.is_white == dst_piece.is_white:
-            raise UserActionError('You tried to attack your\'s piece.')
-
-    def _check_en_passant(self):
-        if not self._session.last_move:
-            raise UserActionError('Invalid en passant attack.')
-        last_move = self._session.last_move
-        if not isinstance(self.piece, Pawn) or not isinstance(last_move.piece, Pawn):
-            raise UserActionError('Invalid en passant attack.')
-        if not self._between(
-                self.dst.y_label,
-                last_move.src.y_label,
-                last_move.dst.y_label):
-            raise UserActionError('Invalid en passant attack.')
-        self._en_passant_attack_dst = last_move.dst
-
-    def _between(self, value, first, second):
-        if first < second:
-            return first < value < second
-        return second < value < first
+                return ATTACK_REQUIRED
+        if route.attack_forbidden and dst_piece is not None:
+            return ATTACK_FORBIDDEN
+        if dst_piece is not None and self.piece.is_white == dst_piece.is_white:
+            return OWN_PIECE_ATTACKED
+        return LEGAL
+
+    def _validate_promotion(self, promotion):
+        # a pawn reaching the last row must be promoted
+        if (promotion is not None) != self._is_promoting():
+            return INVALID_PROMOTION
+        return LEGAL
+
+    def _is_promoting(self):
+        promotion_y_label = self._is_white_to_promotion_y_label[
+            self.piece.is_white]
+        return (isinstance(self.piece, Pawn) and
+                self.dst.y_label == promotion_y_label)
 
     def _should_disable_queenside_castlings(self):
         is_white_turn = self._session.is_white_turn
@@ -157,6 +366,7 @@ class CastlingMove(Move):
         False: '8',
     }
 
+    move_label = None        # must be overridden
     move_error_msg = None    # must be overridden
 
     rook_src_x_label = None  # must be overridden
@@ -165,22 +375,52 @@ class CastlingMove(Move):
     king_src_x_label = 'e'
     king_dst_x_label = None  # must be overridden
 
-    def execute(self):
-        try:
-            if not self.can_be_done():
-                raise UserActionError
-            self._move_the_rook()
-        except UserActionError:
-            raise UserActionError(self.move_error_msg)
-        with critical_part():
-            # *no* exception should occur here because
-            # self._move_the_rook() mutated the session
-            self._move_the_king()
-            self._disable_future_castlings()
+    def __str__(self):
+        return self.move_label
+
+    def validate(self):
+        if not self.can_be_done():
+            return CASTLING_IMPOSSIBLE
+        return LEGAL
+
+    def get_error_msg(self, reason):
+        if reason == CASTLING_IMPOSSIBLE:
+            return self.move_error_msg
+        return super(CastlingMove, self).get_error_msg(reason)
+
+    def make(self):
+        self._move_piece(self.get_rook_src(), self.get_rook_dst())
+        self._move_piece(self.get_king_src(), self.get_king_dst())
+        self._disable_future_castlings()
+        return None, None
+
+    def unmake(self, captured_piece, captured_loc):
+        assert captured_piece is None
+        self._move_piece(self.get_king_dst(), self.get_king_src())
+        self._move_piece(self.get_rook_dst(), self.get_rook_src())
+
+    def get_code(self):
+        return self.get_king_src().index | self.get_king_dst().index << 6
 
     def can_be_done(self):
+        return (self.is_enabled() and
+                chess.movegen.is_castling_possible(self._session, self))
+
+    def is_enabled(self):
         raise NotImplementedError
 
+    def get_king_src(self):
+        return self._get_location(self.king_src_x_label)
+
+    def get_king_dst(self):
+        return self._get_location(self.king_dst_x_label)
+
+    def get_rook_src(self):
+        return self._get_location(self.rook_src_x_label)
+
+    def get_rook_dst(self):
+        return self._get_location(self.rook_dst_x_label)
+
     # non-public helpers:
 
     def _disable_future_castlings(self):
@@ -188,44 +428,12 @@ class CastlingMove(Move):
         player.queenside_castling_enabled = False
         player.kingside_castling_enabled = False
 
-    def _move_the_rook(self):
-        rook_move = self._get_rook_move()
-        rook_move.execute()
-
-    def _get_rook_move(self):
-        return NormalMove(
-            self._session,
-            self._get_rook_src_label(),
-            self._get_rook_dst_label())
-
-    def _get_rook_src_label(self):
-        return Location.make_loc_label(
-            self.rook_src_x_label,
-            self._get_y_label())
-
-    def _get_rook_dst_label(self):
-        return Location.make_loc_label(
-            self.rook_dst_x_label,
-            self._get_y_label())
-
-    def _move_the_king(self):
+    def _move_piece(self, src, dst):
         board = self._session.board
-        king_src = self._get_king_src()
-        king_dst = self._get_king_dst()
-        king = board.pop_piece(king_src)
-        board[king_dst] = king
-
-    def _get_king_src(self):
-        loc_label = Location.make_loc_label(
-            self.king_src_x_label,
-            self._get_y_label())
-        return Location(loc_label)
-
-    def _get_king_dst(self):
-        loc_label = Location.make_loc_label(
-            self.king_dst_x_label,
-            self._get_y_label())
-        return Location(loc_label)
+        board[dst] = board.pop_piece(src)
+
+    def _get_location(self, x_label):
+        return Location(Location.make_loc_label(x_label, self._get_y_label()))
 
     def _get_y_label(self):
         return self._is_white_to_y_label[self._session.is_white_turn]
@@ -233,6 +441,7 @@ class CastlingMove(Move):
 
 class QueensideCastlingMove(CastlingMove):
 
+    move_label = MoveFactory._queenside_castling_label
     move_error_msg = 'Queenside castling is not possible.'
 
     rook_src_x_label = 'a'
@@ -240,12 +449,13 @@ class QueensideCastlingMove(CastlingMove):
 
     king_dst_x_label = 'c'
 
-    def can_be_done(self):
+    def is_enabled(self):
         return self._session.current_player.queenside_castling_enabled
 
 
 class KingsideCastlingMove(CastlingMove):
 
+    move_label = MoveFactory._kingside_castling_label
     move_error_msg = 'Kingside castling is not possible.'
 
     rook_src_x_label = 'h'
@@ -253,5 +463,5 @@ class KingsideCastlingMove(CastlingMove):
 
     king_dst_x_label = 'g'
 
-    def can_be_done(self):
+    def is_enabled(self):
         return self._session.current_player.kingside_castling_enabled
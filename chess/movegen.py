@@ -0,0 +1,270 @@
+"""
+Legal move generation and check detection for chess game sessions.
+
+Everything here works on the bitboards of `chess.board_loc.BitboardBoard`
+and on the tables from `chess.attack_tables`: pseudo-legal moves are
+produced from attack masks and every candidate which could expose the
+own king is verified by recomputing the attacks on the king square with
+the occupancy the move would leave -- no move is ever tried on the board.
+"""
+
+import chess.move
+from chess import attack_tables
+from chess.bitboard import (
+    iter_indices,
+    lsb_index,
+)
+from chess.board_loc import Location
+
+
+_PROMOTION_SYMBOLS = 'QRBN'
+
+# white pawns move towards row '8', i.e. towards lower indices
+_PAWN_STEP = {True: -8, False: 8}
+_PAWN_START_Y = {True: 6, False: 1}
+_PAWN_PROMOTION_Y = {True: 0, False: 7}
+
+
+def generate_legal_moves(session):
+    """
+    Generate all legal moves of the current player.
+
+    :param session: ChessGameSession
+    :return: iterator of Move instances (ready to be executed)
+    """
+    board = session.board
+    is_white = session.is_white_turn
+    symbols = _get_symbols(is_white)
+    own = board.get_color_mask(is_white)
+    not_own = ~own
+    occupied = board.occupied
+    king_index = _get_king_index(board, is_white)
+    if king_index is None:
+        checkers = 0
+        pin_rays = 0
+    else:
+        checkers = get_attackers_mask(board, king_index, not is_white)
+        pin_rays = attack_tables.QUEEN_ATTACKS[king_index]
+    is_safe = _KingSafetyChecker(board, is_white, king_index, checkers)
+
+    for move in _generate_pawn_moves(session, symbols['P'], is_safe, pin_rays):
+        yield move
+
+    pieces = [
+        (symbols['N'], lambda index: attack_tables.KNIGHT_ATTACKS[index]),
+        (symbols['B'], lambda index: attack_tables.bishop_attacks(index, occupied)),
+        (symbols['R'], lambda index: attack_tables.rook_attacks(index, occupied)),
+        (symbols['Q'], lambda index: attack_tables.queen_attacks(index, occupied)),
+    ]
+    for symbol, get_attacks in pieces:
+        for src_index in iter_indices(board.get_piece_mask(symbol)):
+            src = Location.from_index(src_index)
+            src_bit = 1 << src_index
+            targets = get_attacks(src_index) & not_own
+            for dst_index in iter_indices(targets):
+                if ((checkers or pin_rays & src_bit) and
+                        not is_safe(src_index, dst_index)):
+                    continue
+                yield chess.move.NormalMove(
+                    session, src, Location.from_index(dst_index))
+
+    if king_index is not None:
+        src = Location.from_index(king_index)
+        targets = attack_tables.KING_ATTACKS[king_index] & not_own
+        for dst_index in iter_indices(targets):
+            if is_safe(king_index, dst_index):
+                yield chess.move.NormalMove(
+                    session, src, Location.from_index(dst_index))
+        if not checkers:
+            for move_class in (chess.move.KingsideCastlingMove,
+                               chess.move.QueensideCastlingMove):
+                move = move_class(session)
+                if move.is_enabled() and is_castling_possible(session, move):
+                    yield move
+
+
+def has_legal_moves(session):
+    """
+    Tell whether the current player has any legal move (the generation
+    stops at the first one found).
+    """
+    for _ in generate_legal_moves(session):
+        return True
+    return False
+
+
+def is_check(session):
+    """
+    Tell whether the current player's king is attacked.
+    """
+    return is_king_attacked(session.board, session.is_white_turn)
+
+
+def is_king_attacked(board, is_white):
+    king_index = _get_king_index(board, is_white)
+    if king_index is None:
+        return False
+    return bool(get_attackers_mask(board, king_index, not is_white))
+
+
+def get_attackers_mask(board, index, by_white, occupied=None, ignored=0):
+    """
+    Get the bitboard of `by_white` pieces attacking the field `index`.
+
+    :param board: BitboardBoard
+    :param index: the attacked field (as in Location.index)
+    :param by_white: colour of the attackers
+    :param occupied: occupancy to use instead of board.occupied
+    :param ignored: bitboard of fields whose pieces are not considered
+                    (e.g. pieces which are to be captured)
+    :return: int
+    """
+    if occupied is None:
+        occupied = board.occupied
+    symbols = _get_symbols(by_white)
+    get_mask = board.get_piece_mask
+    queens = get_mask(symbols['Q'])
+    attackers = (
+        (attack_tables.KNIGHT_ATTACKS[index] & get_mask(symbols['N'])) |
+        (attack_tables.KING_ATTACKS[index] & get_mask(symbols['K'])) |
+        # the attacking pawns stand where a pawn of
+        # the other colour would attack from `index`
+        (attack_tables.PAWN_ATTACKS[not by_white][index] &
+         get_mask(symbols['P'])))
+    diagonal = queens | get_mask(symbols['B'])
+    if attack_tables.BISHOP_ATTACKS[index] & diagonal:
+        attackers |= attack_tables.bishop_attacks(index, occupied) & diagonal
+    straight = queens | get_mask(symbols['R'])
+    if attack_tables.ROOK_ATTACKS[index] & straight:
+        attackers |= attack_tables.rook_attacks(index, occupied) & straight
+    return attackers & ~ignored
+
+
+def is_move_safe_for_king(session, move):
+    """
+    Tell whether the given (otherwise valid) normal move
+    does not leave the moving player's king attacked.
+    """
+    board = session.board
+    is_white = move.piece.is_white
+    king_index = _get_king_index(board, is_white)
+    if king_index is None:
+        return True
+    checkers = get_attackers_mask(board, king_index, not is_white)
+    is_safe = _KingSafetyChecker(board, is_white, king_index, checkers)
+    captured_index = None
+    if move.is_en_passant():
+        captured_index = move.get_captured_location().index
+    return is_safe(move.src.index, move.dst.index, captured_index)
+
+
+def is_castling_possible(session, move):
+    """
+    Tell whether the given castling is possible in the current position
+    (castling rights are *not* checked here, see CastlingMove.is_enabled).
+
+    The king and the rook must be on their initial fields, the fields
+    between them must be empty, and the king must not be in check nor
+    pass through or land on an attacked field.
+    """
+    board = session.board
+    is_white = session.is_white_turn
+    symbols = _get_symbols(is_white)
+    king_src = move.get_king_src()
+    king_dst = move.get_king_dst()
+    rook_src = move.get_rook_src()
+    if not (board.get_piece_mask(symbols['K']) & (1 << king_src.index) and
+            board.get_piece_mask(symbols['R']) & (1 << rook_src.index)):
+        return False
+    if not board.is_path_clear(king_src.get_path(rook_src)):
+        return False
+    king_walk = [king_src] + king_src.get_path(king_dst) + [king_dst]
+    return not any(get_attackers_mask(board, loc.index, not is_white)
+                   for loc in king_walk)
+
+
+# non-public helpers:
+
+def _get_symbols(is_white):
+    if is_white:
+        return _WHITE_SYMBOLS
+    return _BLACK_SYMBOLS
+
+
+_WHITE_SYMBOLS = {symbol: symbol for symbol in 'PNBRQK'}
+_BLACK_SYMBOLS = {symbol: symbol.lower() for symbol in 'PNBRQK'}
+
+
+def _get_king_index(board, is_white):
+    king_mask = board.get_piece_mask(_get_symbols(is_white)['K'])
+    if not king_mask:
+        return None
+    return lsb_index(king_mask)
+
+
+def _generate_pawn_moves(session, pawn_symbol, is_safe, pin_rays):
+    board = session.board
+    is_white = session.is_white_turn
+    occupied = board.occupied
+    enemy = board.get_color_mask(not is_white)
+    step = _PAWN_STEP[is_white]
+    start_y = _PAWN_START_Y[is_white]
+    promotion_y = _PAWN_PROMOTION_Y[is_white]
+    promotions = [board.create_piece(symbol if is_white else symbol.lower())
+                  for symbol in _PROMOTION_SYMBOLS]
+    pawn_attacks = attack_tables.PAWN_ATTACKS[is_white]
+    ep_target = session.en_passant_target
+
+    for src_index in iter_indices(board.get_piece_mask(pawn_symbol)):
+        src = Location.from_index(src_index)
+        verify = is_safe.checkers or pin_rays & (1 << src_index)
+        dst_indices = []
+        dst_index = src_index + step
+        if not occupied & (1 << dst_index):
+            dst_indices.append(dst_index)
+            if src.y == start_y and not occupied & (1 << (dst_index + step)):
+                dst_indices.append(dst_index + step)
+        dst_indices.extend(iter_indices(pawn_attacks[src_index] & enemy))
+        for dst_index in dst_indices:
+            if verify and not is_safe(src_index, dst_index):
+                continue
+            dst = Location.from_index(dst_index)
+            if dst.y == promotion_y:
+                for promotion in promotions:
+                    yield chess.move.NormalMove(session, src, dst, promotion)
+            else:
+                yield chess.move.NormalMove(session, src, dst)
+        if ep_target is not None and pawn_attacks[src_index] & (1 << ep_target.index):
+            captured_index = ep_target.index - step
+            if is_safe(src_index, ep_target.index, captured_index):
+                yield chess.move.NormalMove(session, src, ep_target)
+
+
+class _KingSafetyChecker(object):
+
+    """
+    Callable telling whether a move (given as field indices) leaves
+    the king of the given colour safe.
+    """
+
+    def __init__(self, board, is_white, king_index, checkers):
+        self.board = board
+        self.is_white = is_white
+        self.king_index = king_index
+        self.checkers = checkers
+
+    def __call__(self, src_index, dst_index, captured_index=None):
+        king_index = self.king_index
+        if king_index is None:
+            return True
+        src_bit = 1 << src_index
+        dst_bit = 1 << dst_index
+        captured_bit = dst_bit
+        if captured_index is not None:
+            captured_bit |= 1 << captured_index
+        occupied = (self.board.occupied & ~src_bit & ~captured_bit) | dst_bit
+        if src_index == king_index:
+            king_index = dst_index
+        return not get_attackers_mask(
+            self.board, king_index, not self.is_white,
+            occupied=occupied, ignored=captured_bit)
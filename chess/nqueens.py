@@ -0,0 +1,58 @@
+"""
+Count N-queens puzzle solutions, serially or with a process pool.
+
+    python -m chess.nqueens --size 12
+    python -m chess.nqueens --size 14 --workers 4 --compare
+"""
+
+import argparse
+import multiprocessing
+import sys
+import time
+
+from chess.resolver import (
+    QueensPuzzleSolver,
+    solve_parallel,
+)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m chess.nqueens',
+        description='Count all solutions of the N-queens puzzle.')
+    parser.add_argument('--size', type=int, default=8)
+    parser.add_argument('--workers', type=int,
+                        default=multiprocessing.cpu_count(),
+                        help='number of worker processes '
+                             '(1 means the serial solver)')
+    parser.add_argument('--compare', action='store_true',
+                        help='run the serial solver too and '
+                             'report the speed-up')
+    args = parser.parse_args(argv)
+    if args.size < 1 or args.workers < 1:
+        parser.error('--size and --workers must be positive')
+
+    if args.workers == 1:
+        count, elapsed = _timed(QueensPuzzleSolver(args.size).count_solutions)
+    else:
+        count, elapsed = _timed(solve_parallel, args.size, args.workers)
+    print 'size {}: {} solutions in {:.2f}s ({} worker(s))'.format(
+        args.size, count, elapsed, args.workers)
+
+    if args.compare and args.workers > 1:
+        serial_count, serial_elapsed = _timed(
+            QueensPuzzleSolver(args.size).count_solutions)
+        assert serial_count == count
+        print 'serial: {:.2f}s, speed-up: {:.2f}x'.format(
+            serial_elapsed, serial_elapsed / elapsed if elapsed else 0.0)
+    return 0
+
+
+def _timed(func, *args):
+    start = time.time()
+    result = func(*args)
+    return result, time.time() - start
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,135 @@
+"""
+Perft: count the leaf nodes of the legal move tree of a position.
+
+It both checks the correctness of the move generator (against the
+well-known node counts of the reference positions below) and measures
+its speed.  Usage examples:
+
+    python -m chess.perft --depth 3
+    python -m chess.perft --depth 2 --divide --fen '<FEN>'
+    python -m chess.perft --bench --depth 3
+"""
+
+import argparse
+import sys
+import time
+
+from chess.session import (
+    INITIAL_FEN,
+    ChessGameSession,
+)
+from chess.util import per_second
+
+
+# (<name>, <FEN>, <node counts for depths 1, 2, 3...>)
+REFERENCE_POSITIONS = [
+    ('initial',
+     INITIAL_FEN,
+     [20, 400, 8902, 197281, 4865609]),
+    ('kiwipete',
+     'r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1',
+     [48, 2039, 97862, 4085603]),
+    ('position 3',
+     '8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1',
+     [14, 191, 2812, 43238, 674624]),
+    ('position 4',
+     'r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1',
+     [6, 264, 9467, 422333]),
+    ('position 5',
+     'rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8',
+     [44, 1486, 62379, 2103487]),
+]
+
+
+def perft(session, depth):
+    """
+    Count the leaf nodes of the legal move tree of the given depth.
+    """
+    if depth == 0:
+        return 1
+    moves = list(session.generate_legal_moves())
+    if depth == 1:
+        return len(moves)
+    nodes = 0
+    for move in moves:
+        session.push(move)
+        nodes += perft(session, depth - 1)
+        session.pop()
+    return nodes
+
+
+def divide(session, depth):
+    """
+    Get the list of (<move label>, <node count>) pairs for all
+    root moves, i.e. perft split by the first move.
+    """
+    assert depth >= 1
+    result = []
+    for move in list(session.generate_legal_moves()):
+        session.push(move)
+        result.append((str(move), perft(session, depth - 1)))
+        session.pop()
+    return result
+
+
+def run_bench(depth, out=sys.stdout):
+    """
+    Run perft for all reference positions (up to the given depth),
+    report the speed and tell whether all node counts were correct.
+    """
+    all_correct = True
+    total_nodes = 0
+    total_time = 0.0
+    for name, fen, expected_counts in REFERENCE_POSITIONS:
+        position_depth = min(depth, len(expected_counts))
+        session = ChessGameSession.from_fen(fen)
+        start = time.time()
+        nodes = perft(session, position_depth)
+        elapsed = time.time() - start
+        total_nodes += nodes
+        total_time += elapsed
+        expected = expected_counts[position_depth - 1]
+        is_correct = (nodes == expected)
+        all_correct = all_correct and is_correct
+        out.write('{:<12} depth {}: {:>9} nodes {:>9.0f} n/s  {}\n'.format(
+            name, position_depth, nodes, per_second(nodes, elapsed),
+            'ok' if is_correct else 'WRONG (expected {})'.format(expected)))
+    out.write('total: {} nodes in {:.2f}s, {:.0f} n/s\n'.format(
+        total_nodes, total_time, per_second(total_nodes, total_time)))
+    return all_correct
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m chess.perft',
+        description='Count leaf nodes of the legal move tree.')
+    parser.add_argument('--depth', type=int, default=3)
+    parser.add_argument('--fen', default=INITIAL_FEN)
+    parser.add_argument('--divide', action='store_true',
+                        help='print node counts for every root move')
+    parser.add_argument('--bench', action='store_true',
+                        help='run all reference positions and '
+                             'check their node counts')
+    args = parser.parse_args(argv)
+    if args.depth < 1:
+        parser.error('--depth must be at least 1')
+    if args.bench:
+        return 0 if run_bench(args.depth) else 1
+    session = ChessGameSession.from_fen(args.fen)
+    start = time.time()
+    if args.divide:
+        results = divide(session, args.depth)
+        for move_label, nodes in results:
+            print '{}: {}'.format(move_label, nodes)
+        nodes = sum(nodes for _, nodes in results)
+        print
+    else:
+        nodes = perft(session, args.depth)
+    elapsed = time.time() - start
+    print 'depth {}: {} nodes in {:.2f}s ({:.0f} n/s)'.format(
+        args.depth, nodes, elapsed, per_second(nodes, elapsed))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
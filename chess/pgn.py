@@ -0,0 +1,300 @@
+"""
+Streaming PGN reader: games are read, parsed and replayed one at a time,
+so even huge archives are processed in constant memory.
+
+    python -m chess.pgn games.pgn
+    python -m chess.pgn --report-every 1000 big-archive.pgn
+"""
+
+import argparse
+import collections
+import re
+import sys
+import time
+
+from chess.exceptions import (
+    PgnError,
+    UserActionError,
+)
+from chess.move import (
+    KingsideCastlingMove,
+    NormalMove,
+    QueensideCastlingMove,
+)
+from chess.session import (
+    INITIAL_FEN,
+    ChessGameSession,
+)
+from chess.util import per_second
+
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+_UTF8_BOM = '\xef\xbb\xbf'
+
+PgnGame = collections.namedtuple('PgnGame', ['headers', 'sans', 'result'])
+
+_TAG_RE = re.compile(r'^\[\s*(\w+)\s+"((?:[^"\\]|\\.)*)"\s*\]\s*$')
+
+_TOKEN_RE = re.compile(r'''
+    (?P<comment> \{[^}]*\} | ;[^\n]* )
+  | (?P<nag> \$\d+ )
+  | (?P<open> \( )
+  | (?P<close> \) )
+  | (?P<move_number> \d+\.+ )
+  | (?P<result> 1-0 | 0-1 | 1/2-1/2 | \* )
+  | (?P<san> [^\s{}();$]+ )
+''', re.VERBOSE)
+
+_SAN_RE = re.compile(
+    r'^([NBRQK])?([a-h])?([1-8])?x?([a-h][1-8])(?:=?([NBRQ]))?[+#]?[!?]*$')
+
+_CASTLING_SAN_RE = re.compile(r'^(O-O-O|O-O|0-0-0|0-0)[+#]?[!?]*$')
+
+_CASTLING_SAN_TO_CLASS = {
+    'O-O': KingsideCastlingMove,
+    '0-0': KingsideCastlingMove,
+    'O-O-O': QueensideCastlingMove,
+    '0-0-0': QueensideCastlingMove,
+}
+
+
+def iter_games(stream, chunk_size=DEFAULT_CHUNK_SIZE, on_error=None):
+    """
+    Yield the games of a PGN stream one by one (variations, comments
+    and NAGs are skipped).
+
+    :param stream: a file-like object opened for reading
+    :param on_error: if given, a game with a malformed tag pair is
+                     skipped (up to the next game's tag pairs) and the
+                     function is called with the PgnError; otherwise
+                     the error is raised (ending the iteration)
+    :return: generator of PgnGame (headers is an OrderedDict of tag
+             pairs; sans is the list of the main line's moves in SAN)
+    """
+    headers = collections.OrderedDict()
+    movetext = []
+    # the number of unclosed '{' comments (a line starting with '['
+    # inside a comment is not a tag pair)
+    open_comments = 0
+    # while a malformed game is skipped: whether its movetext began
+    skipping = False
+    skipped_movetext = False
+    for line_number, line in enumerate(_iter_lines(stream, chunk_size), 1):
+        if line_number == 1 and line.startswith(_UTF8_BOM):
+            line = line[len(_UTF8_BOM):]
+        stripped = line.strip()
+        if not open_comments and line.startswith('%'):
+            # an escaped line
+            continue
+        is_tag_line = not open_comments and stripped.startswith('[')
+        if skipping:
+            if is_tag_line and skipped_movetext:
+                skipping = False
+            else:
+                if stripped and not is_tag_line:
+                    skipped_movetext = True
+                    open_comments = _count_open_comments(open_comments, line)
+                continue
+        if is_tag_line:
+            if movetext:
+                yield _make_game(headers, movetext)
+                headers = collections.OrderedDict()
+                movetext = []
+            match = _TAG_RE.match(stripped)
+            if match is None:
+                error = PgnError('Bad tag pair (line {}): {!r}.'.format(
+                    line_number, stripped))
+                if on_error is None:
+                    raise error
+                on_error(error)
+                headers = collections.OrderedDict()
+                skipping = True
+                skipped_movetext = False
+                continue
+            name, value = match.groups()
+            headers[name] = value.replace('\\"', '"').replace('\\\\', '\\')
+        elif stripped:
+            movetext.append(line)
+            open_comments = _count_open_comments(open_comments, line)
+    if headers or movetext:
+        yield _make_game(headers, movetext)
+
+
+def iter_positions(game):
+    """
+    Replay the game, yielding (<session>, <move>) after each of its
+    moves; note that it is the same session object every time, with
+    the move already pushed.
+
+    :param game: PgnGame
+    """
+    fen = game.headers.get('FEN', INITIAL_FEN)
+    session = ChessGameSession.from_fen(fen)
+    for san in game.sans:
+        move = find_move(session, san)
+        session.push(move)
+        yield session, move
+
+
+def replay(game):
+    """
+    Replay the whole game.
+
+    :param game: PgnGame
+    :return: ChessGameSession (at the end of the game)
+    """
+    session = ChessGameSession.from_fen(game.headers.get('FEN', INITIAL_FEN))
+    for san in game.sans:
+        session.push(find_move(session, san))
+    return session
+
+
+def find_move(session, san):
+    """
+    Resolve a move in SAN (e.g. 'Nbd7', 'exd6', 'e8=Q+', 'O-O')
+    against the current position of the session.
+
+    :return: Move (one of the session's legal moves)
+    """
+    match = _CASTLING_SAN_RE.match(san)
+    if match is not None:
+        move_class = _CASTLING_SAN_TO_CLASS[match.group(1)]
+        for move in session.generate_legal_moves():
+            if isinstance(move, move_class):
+                return move
+        raise PgnError('Illegal move: {}.'.format(san))
+    match = _SAN_RE.match(san)
+    if match is None:
+        raise PgnError('Bad move: {!r}.'.format(san))
+    piece_symbol, x_label, y_label, dst_label, promotion_symbol = (
+        match.groups())
+    piece_symbol = piece_symbol or 'P'
+    candidates = []
+    for move in session.generate_legal_moves():
+        if not isinstance(move, NormalMove):
+            continue
+        if (move.dst.loc_label != dst_label or
+                move.piece.symbol.upper() != piece_symbol):
+            continue
+        if x_label is not None and move.src.x_label != x_label:
+            continue
+        if y_label is not None and move.src.y_label != y_label:
+            continue
+        if move.promotion is None:
+            if promotion_symbol is not None:
+                continue
+        elif move.promotion.symbol.upper() != (promotion_symbol or 'Q'):
+            continue
+        candidates.append(move)
+    if not candidates:
+        raise PgnError('Illegal move: {}.'.format(san))
+    if len(candidates) > 1:
+        raise PgnError('Ambiguous move: {}.'.format(san))
+    return candidates[0]
+
+
+class RateCounter(object):
+
+    """
+    Counts events (e.g. replayed games) and tells their rate per second.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self._start = time.time()
+
+    def add(self, count=1):
+        self.count += count
+
+    @property
+    def elapsed(self):
+        return time.time() - self._start
+
+    @property
+    def rate(self):
+        return per_second(self.count, self.elapsed)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m chess.pgn',
+        description='Replay (and so validate) all games of PGN files.')
+    parser.add_argument('paths', nargs='+', metavar='PATH')
+    parser.add_argument('--report-every', type=int, default=100,
+                        help='print the progress every that many games')
+    args = parser.parse_args(argv)
+    if args.report_every < 1:
+        parser.error('--report-every must be positive')
+    games = RateCounter()
+    moves = 0
+    errors = []
+    for path in args.paths:
+
+        def report_error(exc):
+            errors.append(exc)
+            sys.stderr.write('{}, game {}: {}\n'.format(
+                path, games.count + 1, exc))
+
+        def skip_game(exc):
+            report_error(exc)
+            games.add()
+
+        with open(path) as stream:
+            for game in iter_games(stream, on_error=skip_game):
+                try:
+                    for _ in iter_positions(game):
+                        moves += 1
+                except UserActionError as exc:
+                    report_error(exc)
+                games.add()
+                if games.count % args.report_every == 0:
+                    _report(games, moves, errors)
+    _report(games, moves, errors)
+    return 1 if errors else 0
+
+
+def _report(games, moves, errors):
+    print '{} games ({} with errors), {} moves in {:.2f}s: {:.1f} games/s'.format(
+        games.count, len(errors), moves, games.elapsed, games.rate)
+
+
+def _iter_lines(stream, chunk_size):
+    rest = ''
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            break
+        lines = (rest + chunk).split('\n')
+        rest = lines.pop()
+        for line in lines:
+            yield line
+    if rest:
+        yield rest
+
+
+def _count_open_comments(open_comments, line):
+    return max(open_comments + line.count('{') - line.count('}'), 0)
+
+
+def _make_game(headers, movetext):
+    sans = []
+    result = headers.get('Result', '*')
+    variation_depth = 0
+    for match in _TOKEN_RE.finditer('\n'.join(movetext)):
+        kind = match.lastgroup
+        if kind == 'open':
+            variation_depth += 1
+        elif kind == 'close':
+            variation_depth = max(variation_depth - 1, 0)
+        elif variation_depth:
+            continue
+        elif kind == 'result':
+            result = match.group()
+        elif kind == 'san':
+            sans.append(match.group())
+    return PgnGame(headers, sans, result)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,10 +1,17 @@
 from itertools import product
 
 import chess.board_loc
+from chess import attack_tables
+from chess.bitboard import iter_indices
 from chess.exceptions import UserActionError
 from chess.route import Route
 
 
+# route tables, by piece symbols (see Piece.get_route()); the
+# tables of pieces moving alike regardless of colour are shared
+_ROUTE_TABLES = {}
+
+
 class PieceFactory(object):
 
     def __init__(self):
@@ -31,17 +38,40 @@ class Piece(object):
 
     raw_symbol = None
 
+    # whether the piece's possible moves depend on its colour
+    moves_depend_on_color = False
+
     def __init__(self, is_white):
         self.is_white = is_white
+        self.symbol = self.get_symbol()
+        self._route_table = None
 
     def get_route(self, move):
         """
         Get piece's route for given move.
 
         :param move: Move
-        :return: List of Locations
+        :return: Route (shared: it must not be modified)
         """
-        raise NotImplementedError
+        route = self.find_route(move.src, move.dst)
+        if route is None:
+            raise UserActionError
+        return route
+
+    def find_route(self, src, dst):
+        """
+        Get piece's route from `src` to `dst`, or None if the piece
+        cannot move that way.  Routes are precomputed (on first use)
+        for all pairs of locations, so this is just a table lookup.
+
+        :param src: Location
+        :param dst: Location
+        :return: Route (shared: it must not be modified) or None
+        """
+        route_table = self._route_table
+        if route_table is None:
+            route_table = self._route_table = self._get_route_table()
+        return route_table[src.index << 6 | dst.index]
 
     def get_symbol(self):
         """
@@ -55,101 +85,91 @@ class Piece(object):
 
     def get_attacked_locations(self, location):
         """
-        Get the iterator with locations which can
-        be attacked by piece for given location.
+        Get the list of locations which can be attacked
+        by piece from given location (on an empty board).
+        """
+        from_index = chess.board_loc.Location.from_index
+        return [from_index(index)
+                for index in iter_indices(self.get_attack_mask(location))]
+
+    def get_attack_mask(self, location, occupied=0):
+        """
+        Get the bitboard of fields attacked by piece from given
+        location, with sliding attacks stopped by `occupied` fields.
+
+        :param location: Location
+        :param occupied: bitboard of occupied fields
+        :return: int
         """
         raise NotImplementedError
 
-    @staticmethod
-    def _get_left_diagonal_negative_attack_locations(location):
-        x_symbol = location.x_label
-        y_symbol = location.y_label
-        while x_symbol != 'a' and y_symbol != '1':
-            x_symbol = chr(ord(x_symbol) - 1)
-            y_symbol = chr(ord(y_symbol) - 1)
-            yield chess.board_loc.Location("{}{}".format(x_symbol, y_symbol))
+    # non-public helpers:
 
-    @staticmethod
-    def _get_left_diagonal_positive_attack_locations(location):
-        x_symbol = location.x_label
-        y_symbol = location.y_label
-        while x_symbol != 'a' and y_symbol != '8':
-            x_symbol = chr(ord(x_symbol) - 1)
-            y_symbol = chr(ord(y_symbol) + 1)
-            yield chess.board_loc.Location("{}{}".format(x_symbol, y_symbol))
+    def _make_route(self, src, dst):
+        """
+        Compute piece's route from `src` to `dst` (raise UserActionError
+        if the piece cannot move that way).
+        """
+        raise NotImplementedError
 
-    @staticmethod
-    def _get_right_diagonal_negative_attack_locations(location):
-        x_symbol = location.x_label
-        y_symbol = location.y_label
-        while x_symbol != 'h' and y_symbol != '1':
-            x_symbol = chr(ord(x_symbol) + 1)
-            y_symbol = chr(ord(y_symbol) - 1)
-            yield chess.board_loc.Location("{}{}".format(x_symbol, y_symbol))
+    def _get_route_table(self):
+        # a list indexed by `src.index << 6 | dst.index`, of Routes
+        # (None where the piece cannot move)
+        key = self.symbol if self.moves_depend_on_color else self.raw_symbol
+        route_table = _ROUTE_TABLES.get(key)
+        if route_table is None:
+            from_index = chess.board_loc.Location.from_index
+            route_table = [None] * (64 * 64)
+            for src_index in range(64):
+                src = from_index(src_index)
+                # no piece moves other than a queen or a knight would
+                reachable = (attack_tables.QUEEN_ATTACKS[src_index] |
+                             attack_tables.KNIGHT_ATTACKS[src_index])
+                for dst_index in iter_indices(reachable):
+                    try:
+                        route = self._make_route(src, from_index(dst_index))
+                    except UserActionError:
+                        continue
+                    route_table[src_index << 6 | dst_index] = route
+            _ROUTE_TABLES[key] = route_table
+        return route_table
 
     @staticmethod
-    def _get_right_diagonal_positive_attack_locations(location):
-        x_symbol = location.x_label
-        y_symbol = location.y_label
-        while x_symbol != 'h' and y_symbol != '8':
-            x_symbol = chr(ord(x_symbol) + 1)
-            y_symbol = chr(ord(y_symbol) + 1)
-            yield chess.board_loc.Location("{}{}".format(x_symbol, y_symbol))
-
-    @classmethod
-    def _get_diagonal_attack_locations(cls, location):
-        left_diagonal_negative_locations = {
-            location for location in
-            cls._get_left_diagonal_negative_attack_locations(location)}
-        left_diagonal_positive_locations = {
-            location for location in
-            cls._get_left_diagonal_positive_attack_locations(location)}
-        right_diagonal_negative_locations = {
-            location for location in
-            cls._get_right_diagonal_negative_attack_locations(location)}
-        right_diagonal_positive_locations = {
-            location for location in
-            cls._get_right_diagonal_positive_attack_locations(location)}
-        return list(left_diagonal_negative_locations ^ left_diagonal_positive_locations ^
-                    right_diagonal_negative_locations ^ right_diagonal_positive_locations)
-
-    @classmethod
-    def _get_straight_line_attack_locations(cls, location):
-        Board = chess.board_loc.Board
-        Location = chess.board_loc.Location
-        x_line_locs_set = {
-            Location("{}{}".format(*loc_label))
-            for loc_label in product(location.x_label, Board.iter_y_labels())}
-        y_line_locs_set = {
-            Location("{}{}".format(*loc_label))
-            for loc_label in product(Board.iter_x_labels(), location.y_label)}
-        return list(x_line_locs_set ^ y_line_locs_set)
+    def _is_in_table(table, src, dst):
+        return bool(table[src.index] & (1 << dst.index))
 
 
 class Pawn(Piece):
 
     raw_symbol = 'P'
 
-    def get_route(self, move):
-        vector = move.get_vector()
+    moves_depend_on_color = True
+
+    def get_attack_mask(self, location, occupied=0):
+        return attack_tables.PAWN_ATTACKS[self.is_white][location.index]
+
+    # non-public helpers:
+
+    def _make_route(self, src, dst):
+        vector = src.get_vector(dst)
         try:
-            self._check_vector_y_length(vector, self._first_move(move))
+            self._check_vector_y_length(vector, self._first_move(src))
             self._check_vector_direction(vector)
         except ValueError:
             raise UserActionError
-        path = move.get_path()
+        path = src.get_path(dst)
         if self._is_attack(vector):
             return Route(path, attack_required=True, attack_forbidden=False)
         return Route(path, attack_required=False, attack_forbidden=True)
 
-    def _first_move(self, move):
+    def _first_move(self, src):
         """
-        Checks if given move is a first move
+        Checks if a move from given location is a first move
         for a pawn
         """
         if self.is_white:
-            return move.src.loc_label[1] == "2"
-        return move.src.loc_label[1] == "7"
+            return src.loc_label[1] == "2"
+        return src.loc_label[1] == "7"
 
     def _check_vector_y_length(self, vector, first_move):
         """
@@ -188,9 +208,13 @@ class Knight(Piece):
 
     raw_symbol = 'N'
 
-    def get_route(self, move):
-        vector = move.get_vector()
-        if [1, 2] != sorted(map(abs, vector)):
+    def get_attack_mask(self, location, occupied=0):
+        return attack_tables.KNIGHT_ATTACKS[location.index]
+
+    # non-public helpers:
+
+    def _make_route(self, src, dst):
+        if not self._is_in_table(attack_tables.KNIGHT_ATTACKS, src, dst):
             raise UserActionError
         return Route([])
 
@@ -199,53 +223,57 @@ class Bishop(Piece):
 
     raw_symbol = 'B'
 
-    def get_route(self, move):
-        vector = move.get_vector()
-        if abs(vector[0]) != abs(vector[1]):
-            raise UserActionError
-        return Route(move.get_path())
+    def get_attack_mask(self, location, occupied=0):
+        return attack_tables.bishop_attacks(location.index, occupied)
 
-    def get_attacked_locations(self, location):
-        return self._get_diagonal_attack_locations(location)
+    # non-public helpers:
+
+    def _make_route(self, src, dst):
+        if not self._is_in_table(attack_tables.BISHOP_ATTACKS, src, dst):
+            raise UserActionError
+        return Route(src.get_path(dst))
 
 
 class Rook(Piece):
 
     raw_symbol = 'R'
 
-    def get_route(self, move):
-        vector = move.get_vector()
-        if 0 in vector:
-            return Route(move.get_path())
-        raise UserActionError
+    def get_attack_mask(self, location, occupied=0):
+        return attack_tables.rook_attacks(location.index, occupied)
 
-    def get_attacked_locations(self, location):
-        return self._get_straight_line_attack_locations(location)
+    # non-public helpers:
+
+    def _make_route(self, src, dst):
+        if not self._is_in_table(attack_tables.ROOK_ATTACKS, src, dst):
+            raise UserActionError
+        return Route(src.get_path(dst))
 
 
 class Queen(Piece):
 
     raw_symbol = 'Q'
 
-    def get_route(self, move):
-        vector = move.get_vector()
-        if all(vector):
-            if abs(vector[0]) != abs(vector[1]):
-                raise UserActionError
-        return Route(move.get_path())
+    def get_attack_mask(self, location, occupied=0):
+        return attack_tables.queen_attacks(location.index, occupied)
 
-    def get_attacked_locations(self, location):
-        _straight_line_attack_locations = self._get_straight_line_attack_locations(location)
-        _diagonal_attack_locations = self._get_diagonal_attack_locations(location)
-        return list(set(_straight_line_attack_locations) ^ set(_diagonal_attack_locations))
+    # non-public helpers:
+
+    def _make_route(self, src, dst):
+        if not self._is_in_table(attack_tables.QUEEN_ATTACKS, src, dst):
+            raise UserActionError
+        return Route(src.get_path(dst))
 
 
 class King(Piece):
 
     raw_symbol = 'K'
 
-    def get_route(self, move):
-        vector = move.get_vector()
-        if any(i > 1 for i in map(abs, vector)):
+    def get_attack_mask(self, location, occupied=0):
+        return attack_tables.KING_ATTACKS[location.index]
+
+    # non-public helpers:
+
+    def _make_route(self, src, dst):
+        if not self._is_in_table(attack_tables.KING_ATTACKS, src, dst):
             raise UserActionError
-        return Route(move.get_path())
+        return Route([])
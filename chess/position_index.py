@@ -0,0 +1,207 @@
+"""
+An on-disk index of the positions reached in a collection of games,
+answering "which games reached this position" by the position's
+Zobrist key (see `chess.zobrist`).  It is a local SQLite file.
+
+    python -m chess.position_index build games.cma games.idx
+    python -m chess.position_index query games.idx --fen '<FEN>'
+    python -m chess.position_index bench games.idx games.cma
+"""
+
+import argparse
+import random
+import sqlite3
+import sys
+import time
+
+from chess.archive import ArchiveReader
+from chess.pgn import RateCounter
+from chess.session import ChessGameSession
+from chess.util import per_second
+
+
+# rows are inserted that many at a time
+_BATCH_SIZE = 10000
+
+_SIGN_BIT = 1 << 63
+
+
+class PositionIndex(object):
+
+    """
+    Maps Zobrist keys of positions to (<game id>, <ply>) pairs.
+
+    Rows added with add_game() are buffered and written in batches;
+    the lookup index is built by commit() (also called by close()),
+    i.e. once after a bulk load rather than on every insert.
+    """
+
+    def __init__(self, path):
+        self._connection = sqlite3.connect(path)
+        self._create_table()
+        self._rows = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.close()
+
+    def add_game(self, game_id, zobrist_keys):
+        """
+        :param game_id: int
+        :param zobrist_keys: keys of the game's positions, in the order
+                             of plies (the start position first)
+        """
+        rows = self._rows
+        for ply, key in enumerate(zobrist_keys):
+            rows.append((_to_signed(key), game_id, ply))
+        if len(rows) >= _BATCH_SIZE:
+            self._flush()
+
+    def find_games(self, zobrist_key):
+        """
+        :return: sorted list of (<game id>, <ply>) pairs
+        """
+        cursor = self._connection.execute(
+            'SELECT game_id, ply FROM positions WHERE key = ? '
+            'ORDER BY game_id, ply', (_to_signed(zobrist_key),))
+        return cursor.fetchall()
+
+    def clear(self):
+        """
+        Remove all positions (e.g. before rebuilding the index).
+        """
+        self._rows = []
+        # (the lookup index is dropped with the table)
+        self._connection.execute('DROP TABLE IF EXISTS positions')
+        self._create_table()
+
+    def commit(self):
+        self._flush()
+        self._connection.execute(
+            'CREATE INDEX IF NOT EXISTS positions_key ON positions (key)')
+        self._connection.commit()
+
+    def close(self):
+        self.commit()
+        self._connection.close()
+
+    # non-public helpers:
+
+    def _create_table(self):
+        self._connection.execute(
+            'CREATE TABLE IF NOT EXISTS positions ('
+            '  key INTEGER NOT NULL,'
+            '  game_id INTEGER NOT NULL,'
+            '  ply INTEGER NOT NULL'
+            ')')
+
+    def _flush(self):
+        if self._rows:
+            self._connection.executemany(
+                'INSERT INTO positions (key, game_id, ply) VALUES (?, ?, ?)',
+                self._rows)
+            self._rows = []
+
+
+def iter_archive_game_keys(reader, game_index):
+    """
+    Yield the Zobrist keys of the positions of an archived game
+    (see `chess.archive`), the start position first.
+    """
+    start_fen = reader[game_index].start_fen
+    yield ChessGameSession.from_fen(start_fen).zobrist_key
+    for session, _ in reader.iter_positions(game_index):
+        yield session.zobrist_key
+
+
+def build_from_archive(index, reader):
+    """
+    Replace the contents of the index with all games of an archive
+    (game ids are the games' indexes in the archive), in a single pass.
+
+    :return: the number of positions added
+    """
+    index.clear()
+    position_count = 0
+    for game_index in xrange(len(reader)):
+        keys = list(iter_archive_game_keys(reader, game_index))
+        index.add_game(game_index, keys)
+        position_count += len(keys)
+    index.commit()
+    return position_count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m chess.position_index',
+        description='Build or query an index of positions of games.')
+    subparsers = parser.add_subparsers(dest='command')
+    build_parser = subparsers.add_parser(
+        'build', help='index all games of an archive')
+    build_parser.add_argument('archive_path', metavar='ARCHIVE_PATH')
+    build_parser.add_argument('index_path', metavar='INDEX_PATH')
+    query_parser = subparsers.add_parser(
+        'query', help='list the games which reached a position')
+    query_parser.add_argument('index_path', metavar='INDEX_PATH')
+    query_parser.add_argument('--fen', required=True)
+    bench_parser = subparsers.add_parser(
+        'bench', help='measure the latency of lookups')
+    bench_parser.add_argument('index_path', metavar='INDEX_PATH')
+    bench_parser.add_argument('archive_path', metavar='ARCHIVE_PATH',
+                              help='the archive the index was built from '
+                                   '(the lookups are its positions)')
+    bench_parser.add_argument('--lookups', type=int, default=1000)
+    args = parser.parse_args(argv)
+
+    if args.command == 'build':
+        games = RateCounter()
+        with ArchiveReader(args.archive_path) as reader:
+            with PositionIndex(args.index_path) as index:
+                position_count = build_from_archive(index, reader)
+            games.add(len(reader))
+        print ('{} games, {} positions in {:.2f}s: {:.1f} games/s, '
+               '{:.0f} positions/s'.format(
+                   games.count, position_count, games.elapsed, games.rate,
+                   per_second(position_count, games.elapsed)))
+    elif args.command == 'query':
+        key = ChessGameSession.from_fen(args.fen).zobrist_key
+        with PositionIndex(args.index_path) as index:
+            start = time.time()
+            found = index.find_games(key)
+            elapsed = time.time() - start
+        for game_id, ply in found:
+            print 'game {}, ply {}'.format(game_id, ply)
+        print '{} occurrences found in {:.2f}ms'.format(
+            len(found), elapsed * 1000)
+    else:
+        rand = random.Random(0)
+        with ArchiveReader(args.archive_path) as reader:
+            if not len(reader):
+                sys.stderr.write('{}: the archive has no games.\n'.format(
+                    args.archive_path))
+                return 1
+            keys = []
+            for _ in xrange(args.lookups):
+                game_keys = list(iter_archive_game_keys(
+                    reader, rand.randrange(len(reader))))
+                keys.append(rand.choice(game_keys))
+        with PositionIndex(args.index_path) as index:
+            start = time.time()
+            found_count = sum(len(index.find_games(key)) for key in keys)
+            elapsed = time.time() - start
+        print ('{} lookups ({} occurrences) in {:.2f}s: '
+               '{:.3f}ms per lookup'.format(
+                   len(keys), found_count, elapsed,
+                   elapsed * 1000 / len(keys) if keys else 0.0))
+    return 0
+
+
+def _to_signed(key):
+    # SQLite integers are signed 64-bit
+    return key - (_SIGN_BIT << 1) if key & _SIGN_BIT else key
+
+
+if __name__ == '__main__':
+    sys.exit(main())
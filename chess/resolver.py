@@ -1,7 +1,26 @@
+import multiprocessing
+
+from chess.board_loc import Location
+
+
 class QueensPuzzleResolver(object):
 
+    """
+    Tracks the queens placed on the board.
+
+    The rows, columns and both kinds of diagonals taken by the queens
+    are kept as bitmasks, so placing a queen, removing it and checking
+    whether a field is still usable are all O(1).
+    """
+
+    board_size = 8
+
     def __init__(self):
-        self._reserved_fields = set()
+        self._rows = 0
+        self._cols = 0
+        self._diagonals = 0       # indexed by x + y
+        self._anti_diagonals = 0  # indexed by x - y + board_size - 1
+        self._queen_locations = []
 
     def is_usable_field(self, loc):
         """
@@ -10,16 +29,285 @@ class QueensPuzzleResolver(object):
         :param loc: Location
         :return: bool
         """
+        return not (self._rows & (1 << loc.y) or
+                    self._cols & (1 << loc.x) or
+                    self._diagonals & self._get_diagonal_bit(loc) or
+                    self._anti_diagonals & self._get_anti_diagonal_bit(loc))
+
+    def reserve_field(self, loc):
+        """
+        Reserve given field (i.e. place a queen there).
 
-        return not (loc in self._reserved_fields)
+        :param loc: Location
+        :return:
+        """
+        assert self.is_usable_field(loc)
+        self._toggle(loc)
+        self._queen_locations.append(loc)
 
-    def reserve_field(self, loc, piece):
+    def release_field(self, loc):
         """
-        Reserve given field
+        Release given field (i.e. remove the queen placed there).
 
         :param loc: Location
-        :param piece: Piece
         :return:
         """
-        self._reserved_fields.update(piece.get_attacked_locations(loc))
-        self._reserved_fields.add(loc)
+        self._queen_locations.remove(loc)
+        self._toggle(loc)
+
+    def get_last_reserved_field(self):
+        if not self._queen_locations:
+            return None
+        return self._queen_locations[-1]
+
+    def iter_usable_fields(self):
+        """
+        Get the iterator of the fields on which a queen can still be placed.
+        """
+        for y in range(self.board_size):
+            if self._rows & (1 << y):
+                continue
+            for x in range(self.board_size):
+                loc = Location.from_xy(x, y)
+                if self.is_usable_field(loc):
+                    yield loc
+
+    def count_usable_fields(self):
+        return sum(1 for _ in self.iter_usable_fields())
+
+    def is_solvable(self):
+        """
+        Tell whether the queens placed so far are part of any solution.
+        """
+        return self.find_solution() is not None
+
+    def find_solution(self):
+        """
+        Find a complete placement which includes all queens placed so far.
+
+        :return: list of (x, y) pairs or None if there is no solution
+        """
+        solver = QueensPuzzleSolver(self.board_size)
+        solution = solver.find_solution(
+            (loc.x, loc.y) for loc in self._queen_locations)
+        if solution is None:
+            return None
+        return [(x, y) for y, x in enumerate(solution)]
+
+    # non-public helpers:
+
+    def _toggle(self, loc):
+        self._rows ^= 1 << loc.y
+        self._cols ^= 1 << loc.x
+        self._diagonals ^= self._get_diagonal_bit(loc)
+        self._anti_diagonals ^= self._get_anti_diagonal_bit(loc)
+
+    def _get_diagonal_bit(self, loc):
+        return 1 << (loc.x + loc.y)
+
+    def _get_anti_diagonal_bit(self, loc):
+        return 1 << (loc.x - loc.y + self.board_size - 1)
+
+
+class QueensPuzzleSolver(object):
+
+    """
+    N-queens solver: bitmask backtracking, row by row.
+
+    Columns and both kinds of diagonals attacked by the queens placed in
+    the previous rows are kept as integer bitmasks (the diagonal masks
+    are shifted by one bit per row), so checking all the fields of a row
+    is a single `&`.  A solution is a tuple of queen columns (x), one
+    per row (y).
+    """
+
+    def __init__(self, size=8):
+        assert size >= 1
+        self.size = size
+        self._full_mask = (1 << size) - 1
+
+    def count_solutions(self):
+        """
+        Count all solutions.
+
+        Only queens in the left half of the first row are tried; the
+        count is doubled to include the mirror images.
+        """
+        return sum(weight * self.count_from_prefix(prefix)
+                   for prefix, weight in self.iter_prefixes(1))
+
+    def iter_solutions(self):
+        """
+        Yield all solutions (each is generated once; for every solution
+        found with the first queen in the left half of the first row,
+        its mirror image is yielded right after it).
+        """
+        for prefix, weight in self.iter_prefixes(1):
+            for solution in self.iter_from_prefix(prefix, weight == 2):
+                yield solution
+
+    def find_solution(self, placed=()):
+        """
+        Find one solution, optionally extending the given placement.
+
+        :param placed: iterable of (x, y) pairs of already placed queens
+        :return: a solution or None
+        """
+        fixed = {}
+        for x, y in placed:
+            if y in fixed:
+                return None
+            fixed[y] = 1 << x
+        for solution in self._iter(0, 0, 0, 0, queens=[], fixed=fixed):
+            return tuple(solution)
+        return None
+
+    def iter_prefixes(self, length):
+        """
+        Yield (<prefix>, <weight>) pairs which split the search: a prefix
+        is a tuple of queen columns for the first `length` rows; the
+        weight is 2 if the mirror images of the prefix's solutions are
+        to be counted as well (first queen in the left half of the row),
+        or 1 (first queen in the middle column of an odd-sized board).
+        """
+        assert 1 <= length <= self.size
+        for x in range((self.size + 1) // 2):
+            weight = 1 if 2 * x + 1 == self.size else 2
+            for prefix in self._iter_prefixes((x,), length):
+                yield prefix, weight
+
+    def count_from_prefix(self, prefix):
+        masks = self._get_prefix_masks(prefix)
+        if masks is None:
+            return 0
+        return self._count(*masks)
+
+    def iter_from_prefix(self, prefix, with_mirrors=False):
+        masks = self._get_prefix_masks(prefix)
+        if masks is None:
+            return
+        last_x = self.size - 1
+        for solution in self._iter(len(prefix), *masks,
+                                   queens=list(prefix), fixed={}):
+            yield tuple(solution)
+            if with_mirrors:
+                yield tuple(last_x - x for x in solution)
+
+    # non-public helpers:
+
+    def _iter_prefixes(self, prefix, length):
+        if len(prefix) == length:
+            yield prefix
+            return
+        masks = self._get_prefix_masks(prefix)
+        if masks is None:
+            return
+        cols, left_diagonals, right_diagonals = masks
+        free = self._full_mask & ~(cols | left_diagonals | right_diagonals)
+        for x in range(self.size):
+            if free & (1 << x):
+                for longer_prefix in self._iter_prefixes(prefix + (x,), length):
+                    yield longer_prefix
+
+    def _get_prefix_masks(self, prefix):
+        cols = left_diagonals = right_diagonals = 0
+        for x in prefix:
+            bit = 1 << x
+            if bit & (cols | left_diagonals | right_diagonals):
+                return None
+            cols |= bit
+            left_diagonals = (left_diagonals | bit) << 1
+            right_diagonals = (right_diagonals | bit) >> 1
+        return cols, left_diagonals, right_diagonals
+
+    def _count(self, cols, left_diagonals, right_diagonals):
+        full_mask = self._full_mask
+        if cols == full_mask:
+            return 1
+        count = 0
+        free = full_mask & ~(cols | left_diagonals | right_diagonals)
+        while free:
+            bit = free & -free
+            free ^= bit
+            count += self._count(
+                cols | bit,
+                (left_diagonals | bit) << 1,
+                (right_diagonals | bit) >> 1)
+        return count
+
+    def _iter(self, y, cols, left_diagonals, right_diagonals, queens, fixed):
+        if y == self.size:
+            yield queens
+            return
+        free = self._full_mask & ~(cols | left_diagonals | right_diagonals)
+        if y in fixed:
+            free &= fixed[y]
+        while free:
+            bit = free & -free
+            free ^= bit
+            queens.append(bit.bit_length() - 1)
+            for solution in self._iter(
+                    y + 1,
+                    cols | bit,
+                    (left_diagonals | bit) << 1,
+                    (right_diagonals | bit) >> 1,
+                    queens,
+                    fixed):
+                yield solution
+            queens.pop()
+
+
+def solve_parallel(size, workers=None, prefix_length=2):
+    """
+    Count all solutions of the N-queens puzzle using a process pool.
+
+    The search tree is split into tasks by the queens of the first
+    `prefix_length` rows; the tasks are handed out to the worker
+    processes one by one, so that idle workers keep taking the
+    remaining ones until all are done.
+
+    :param size: board size (N)
+    :param workers: number of worker processes (default: CPU count)
+    :return: int
+    """
+    prefix_length = min(prefix_length, size)
+    tasks = [(size, prefix, weight)
+             for prefix, weight in
+             QueensPuzzleSolver(size).iter_prefixes(prefix_length)]
+    pool = multiprocessing.Pool(workers)
+    try:
+        return sum(pool.imap_unordered(_count_task, tasks, chunksize=1))
+    finally:
+        pool.terminate()
+        pool.join()
+
+
+def iter_solutions_parallel(size, workers=None, prefix_length=2):
+    """
+    Yield all solutions of the N-queens puzzle, found using a process
+    pool (see solve_parallel()); solutions are streamed task by task,
+    in no particular order.
+    """
+    prefix_length = min(prefix_length, size)
+    tasks = [(size, prefix, weight)
+             for prefix, weight in
+             QueensPuzzleSolver(size).iter_prefixes(prefix_length)]
+    pool = multiprocessing.Pool(workers)
+    try:
+        for solutions in pool.imap_unordered(_solve_task, tasks, chunksize=1):
+            for solution in solutions:
+                yield solution
+    finally:
+        pool.terminate()
+        pool.join()
+
+
+def _count_task(task):
+    size, prefix, weight = task
+    return weight * QueensPuzzleSolver(size).count_from_prefix(prefix)
+
+
+def _solve_task(task):
+    size, prefix, weight = task
+    solver = QueensPuzzleSolver(size)
+    return list(solver.iter_from_prefix(prefix, weight == 2))
@@ -4,3 +4,7 @@ class Route(object):
         self.path = path
         self.attack_required = attack_required
         self.attack_forbidden = attack_forbidden
+        # bitboard of the path's fields (see chess.bitboard)
+        self.path_mask = 0
+        for loc in path:
+            self.path_mask |= 1 << loc.index
@@ -0,0 +1,333 @@
+"""
+A server hosting many game sessions in one process, without a thread
+per game: all connections are served by a single asyncore event loop.
+
+The protocol is newline-delimited JSON; every request is an object
+with an "op" key (and an optional "id", echoed in the response):
+
+    {"op": "new", "kind": "chess"}          -> {"ok": true, "session": 1}
+    {"op": "act", "session": 1, "action": "e2 e4"}
+                                            -> {"ok": true, "completed": false}
+    {"op": "state", "session": 1}           -> {"ok": true, "fen": "..."}
+    {"op": "close", "session": 1}           -> {"ok": true}
+
+A session is closed by the server as soon as it is completed (e.g. the
+chess game has ended); then the response to the last "act" is like
+{"ok": true, "completed": true, "outcome": "checkmate"} (the outcome
+only for chess games, see ChessGameSession.get_outcome()).
+
+Failed requests (also those with fields of wrong types) get
+{"ok": false, "error": "<message>"}.
+
+    python -m chess.server serve --port 8765
+    python -m chess.server load --port 8765 --clients 50 --sessions 20
+"""
+
+import argparse
+import asynchat
+import asyncore
+import itertools
+import json
+import socket
+import sys
+import time
+
+from chess.exceptions import UserActionError
+from chess.session import (
+    ChessGameSession,
+    QueensPuzzleSession,
+)
+from chess.util import per_second
+
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+
+SESSION_CLASSES = {
+    'chess': ChessGameSession,
+    'queens': QueensPuzzleSession,
+}
+
+# requests longer than that are rejected (and the connection closed)
+MAX_REQUEST_SIZE = 64 * 1024
+
+# the load clients play knights out and back over and over, so every
+# game ends by the threefold repetition after that many moves
+MAX_LOAD_MOVES = 16
+
+
+class SessionHost(object):
+
+    """
+    Holds sessions by their ids and executes the protocol requests
+    (independently of any networking).
+    """
+
+    def __init__(self):
+        self.sessions = {}
+        self._session_ids = itertools.count(1)
+
+    def handle_request(self, request):
+        """
+        :param request: dict (a decoded request)
+        :return: dict (the response)
+        """
+        try:
+            if not isinstance(request, dict):
+                raise UserActionError('A JSON object expected.')
+            op = request.get('op')
+            if not isinstance(op, basestring) or op not in self._handlers:
+                raise UserActionError('Unknown op: {!r}.'.format(op))
+            response = self._handlers[op](self, request)
+            response['ok'] = True
+        except UserActionError as exc:
+            response = {'ok': False, 'error': exc.msg}
+        except Exception as exc:
+            # a bug must not take the whole server (and all the other
+            # sessions) down
+            response = {'ok': False, 'error': 'Internal error ({}).'.format(
+                type(exc).__name__)}
+        if isinstance(request, dict) and 'id' in request:
+            response['id'] = request['id']
+        return response
+
+    # non-public helpers:
+
+    def _new(self, request):
+        kind = request.get('kind', 'chess')
+        if not isinstance(kind, basestring) or kind not in SESSION_CLASSES:
+            raise UserActionError('Unknown session kind: {!r}.'.format(kind))
+        session = SESSION_CLASSES[kind]()
+        session.setup()
+        session_id = next(self._session_ids)
+        self.sessions[session_id] = session
+        return {'session': session_id}
+
+    def _act(self, request):
+        session = self._get_session(request)
+        action = request.get('action')
+        try:
+            action = action.encode('ascii')
+        except (AttributeError, UnicodeError):
+            raise UserActionError('The action must be an ASCII string.')
+        if isinstance(session, ChessGameSession):
+            completed = session.act(action.split())
+        else:
+            completed = session.act(action)
+        response = {'completed': completed}
+        if completed:
+            del self.sessions[request['session']]
+            if isinstance(session, ChessGameSession):
+                response['outcome'] = session.get_outcome()
+        return response
+
+    def _state(self, request):
+        session = self._get_session(request)
+        if isinstance(session, ChessGameSession):
+            return {'fen': session.to_fen()}
+        return {'placement': session.board.get_fen_placement()}
+
+    def _close(self, request):
+        self._get_session(request)
+        del self.sessions[request['session']]
+        return {}
+
+    def _get_session(self, request):
+        session_id = request.get('session')
+        # (bool is a subclass of int, and True == 1)
+        if (isinstance(session_id, (int, long)) and
+                not isinstance(session_id, bool) and
+                session_id in self.sessions):
+            return self.sessions[session_id]
+        raise UserActionError('No such session: {!r}.'.format(session_id))
+
+    _handlers = {
+        'new': _new,
+        'act': _act,
+        'state': _state,
+        'close': _close,
+    }
+
+
+class SessionServer(asyncore.dispatcher):
+
+    """
+    Listens for connections and serves them with a SessionHost.
+    """
+
+    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT,
+                 session_host=None, socket_map=None):
+        asyncore.dispatcher.__init__(self, map=socket_map)
+        self.session_host = session_host or SessionHost()
+        self._socket_map = socket_map
+        self.create_socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.set_reuse_addr()
+        self.bind((host, port))
+        self.listen(128)
+
+    @property
+    def address(self):
+        return self.socket.getsockname()
+
+    def handle_accept(self):
+        pair = self.accept()
+        if pair is not None:
+            _ProtocolChannel(pair[0], self.session_host, self._socket_map)
+
+
+class _ProtocolChannel(asynchat.async_chat):
+
+    def __init__(self, sock, session_host, socket_map):
+        asynchat.async_chat.__init__(self, sock, map=socket_map)
+        self.set_terminator('\n')
+        self._session_host = session_host
+        self._buffer = []
+        self._buffer_size = 0
+
+    def collect_incoming_data(self, data):
+        self._buffer.append(data)
+        self._buffer_size += len(data)
+        if self._buffer_size > MAX_REQUEST_SIZE:
+            self.close()
+
+    def found_terminator(self):
+        line = ''.join(self._buffer)
+        self._buffer = []
+        self._buffer_size = 0
+        if not line.strip():
+            return
+        try:
+            request = json.loads(line)
+        except ValueError:
+            response = {'ok': False, 'error': 'Malformed JSON.'}
+        else:
+            response = self._session_host.handle_request(request)
+        self.push(json.dumps(response) + '\n')
+
+
+class _LoadClient(asynchat.async_chat):
+
+    # played over and over: knights out and back (so a session ends by
+    # the threefold repetition after MAX_LOAD_MOVES moves)
+    moves = ['g1 f3', 'g8 f6', 'b1 c3', 'b8 c6',
+             'f3 g1', 'f6 g8', 'c3 b1', 'c6 b8']
+
+    def __init__(self, address, session_count, moves_per_session, stats,
+                 socket_map):
+        asynchat.async_chat.__init__(self, map=socket_map)
+        self.create_socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.connect(address)
+        self.set_terminator('\n')
+        self._buffer = []
+        self._sessions_left = session_count
+        self._moves_per_session = moves_per_session
+        self._stats = stats
+        self._session_id = None
+        self._move_number = 0
+        self._pending_op = None
+        self._sent_at = None
+
+    def handle_connect(self):
+        self._send({'op': 'new', 'kind': 'chess'})
+
+    def collect_incoming_data(self, data):
+        self._buffer.append(data)
+
+    def found_terminator(self):
+        response = json.loads(''.join(self._buffer))
+        self._buffer = []
+        if not response['ok']:
+            self._stats['errors'] += 1
+        elif self._pending_op == 'new':
+            self._session_id = response['session']
+            self._stats['sessions'] += 1
+        elif self._pending_op == 'act':
+            self._stats['moves'] += 1
+            self._stats['latency'] += time.time() - self._sent_at
+            if response['completed']:
+                # already closed by the server
+                self._session_id = None
+                self._sessions_left -= 1
+        if (self._session_id is not None and
+                self._move_number < self._moves_per_session):
+            self._send({'op': 'act', 'session': self._session_id,
+                        'action': self.moves[self._move_number % len(self.moves)]})
+            self._move_number += 1
+        elif self._session_id is not None:
+            self._send({'op': 'close', 'session': self._session_id})
+            self._session_id = None
+            self._sessions_left -= 1
+        elif self._sessions_left:
+            self._move_number = 0
+            self._send({'op': 'new', 'kind': 'chess'})
+        else:
+            self.close()
+
+    def _send(self, request):
+        self._pending_op = request['op']
+        self._sent_at = time.time()
+        self.push(json.dumps(request) + '\n')
+
+
+def run_load(address, clients=10, sessions=10, moves=MAX_LOAD_MOVES):
+    """
+    Connect `clients` concurrent clients, each playing `sessions`
+    sessions of `moves` moves one after another (at most MAX_LOAD_MOVES:
+    then a game is drawn by the threefold repetition anyway).
+
+    :return: dict of totals: sessions, moves, errors, latency (the sum
+             of per-move round trip times) and elapsed
+    """
+    stats = dict.fromkeys(['sessions', 'moves', 'errors'], 0)
+    stats['latency'] = 0.0
+    socket_map = {}
+    start = time.time()
+    for _ in range(clients):
+        _LoadClient(address, sessions, moves, stats, socket_map)
+    asyncore.loop(timeout=1.0, map=socket_map)
+    stats['elapsed'] = time.time() - start
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m chess.server',
+        description='Serve game sessions, or generate load on a server.')
+    parser.add_argument('command', choices=['serve', 'load'])
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--clients', type=int, default=10,
+                        help='load: number of concurrent connections')
+    parser.add_argument('--sessions', type=int, default=10,
+                        help='load: sessions played by each client')
+    parser.add_argument('--moves', type=int, default=MAX_LOAD_MOVES,
+                        help='load: moves played in each session '
+                             '(at most {})'.format(MAX_LOAD_MOVES))
+    args = parser.parse_args(argv)
+    if not 0 <= args.moves <= MAX_LOAD_MOVES:
+        parser.error('--moves must be between 0 and {}'.format(
+            MAX_LOAD_MOVES))
+
+    if args.command == 'serve':
+        server = SessionServer(args.host, args.port)
+        print 'Serving on {}:{}...'.format(*server.address)
+        try:
+            asyncore.loop(timeout=1.0)
+        except KeyboardInterrupt:
+            pass
+        return 0
+    stats = run_load((args.host, args.port),
+                     args.clients, args.sessions, args.moves)
+    elapsed = stats['elapsed']
+    print ('{} sessions, {} moves ({} errors) in {:.2f}s: '
+           '{:.0f} sessions/s, {:.0f} moves/s, {:.2f}ms per move'.format(
+               stats['sessions'], stats['moves'], stats['errors'], elapsed,
+               per_second(stats['sessions'], elapsed),
+               per_second(stats['moves'], elapsed),
+               stats['latency'] * 1000 / stats['moves']
+               if stats['moves'] else 0.0))
+    return 1 if stats['errors'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,17 +1,72 @@
+import struct
+
+from chess import attack_tables
 from chess.board_loc import (
+    PACKED_PLACEMENT_SIZE,
+    BitboardBoard,
     Board,
     Location,
 )
 from chess.exceptions import UserActionError
 from chess.move import MoveFactory
+from chess.movegen import (
+    generate_legal_moves,
+    has_legal_moves,
+    is_check,
+)
 from chess.piece import PieceFactory
 from chess.resolver import QueensPuzzleResolver
+from chess.util import critical_part
+from chess.zobrist import (
+    CASTLING_KEYS,
+    EN_PASSANT_KEYS,
+    SIDE_KEY,
+)
+
+
+CASTLING_WHITE_KINGSIDE = 1
+CASTLING_WHITE_QUEENSIDE = 2
+CASTLING_BLACK_KINGSIDE = 4
+CASTLING_BLACK_QUEENSIDE = 8
+
+INITIAL_FEN = 'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1'
+
+# game outcomes (see ChessGameSession.get_outcome())
+CHECKMATE = 'checkmate'
+STALEMATE = 'stalemate'
+INSUFFICIENT_MATERIAL = 'insufficient material'
+FIFTY_MOVE_RULE = 'fifty-move rule'
+THREEFOLD_REPETITION = 'threefold repetition'
+
+# the fields of rows '8' and '1' (no pawn can stand there)
+_BACK_ROWS_MASK = 0xff | 0xff << 56
+
+# pieces which can always mate (given the other side's help)
+_MATING_SYMBOLS = 'PRQprq'
+
+# FEN castling availability symbols, in the FEN order
+_CASTLING_SYMBOLS = [
+    ('K', CASTLING_WHITE_KINGSIDE),
+    ('Q', CASTLING_WHITE_QUEENSIDE),
+    ('k', CASTLING_BLACK_KINGSIDE),
+    ('q', CASTLING_BLACK_QUEENSIDE),
+]
+_CASTLING_SYMBOL_TO_BIT = dict(_CASTLING_SYMBOLS)
+
+# snapshot state: side to move (bit 0) and castling rights (bits 1-4),
+# en passant target's index + 1 (0 if none), halfmove clock, fullmove
+# number
+_SNAPSHOT_STATE = struct.Struct('<BBHH')
+
+SNAPSHOT_SIZE = PACKED_PLACEMENT_SIZE + _SNAPSHOT_STATE.size
 
 
 class Session(object):
 
+    board_class = Board
+
     def __init__(self):
-        self.board = Board()
+        self.board = self.board_class()
 
     def setup(self):
         pass
@@ -22,20 +77,322 @@ class Session(object):
 
 class ChessGameSession(Session):
 
+    board_class = BitboardBoard
+
     def __init__(self):
         super(ChessGameSession, self).__init__()
         self.players = {is_white: ChessGamePlayer(is_white)
                         for is_white in [True, False]}
         self.is_white_turn = True
         self.last_move = None
+        self.en_passant_target = None
+        # plies since the last capture or pawn move
+        self.halfmove_clock = 0
+        self.fullmove_number = 1
+        # the FEN of the position the move history starts from (set by
+        # setup(), from_fen() and restore())
+        self.start_fen = None
         self._move_factory = MoveFactory()
+        self._undo_stack = []
+        # the number of occurrences of positions, by their Zobrist keys
+        self._position_counts = {}
+
+    @classmethod
+    def from_fen(cls, fen):
+        """
+        Make a session set up according to the given FEN (the halfmove
+        clock and fullmove number fields are optional).
+
+        :param fen: str
+        :return: ChessGameSession
+        """
+        fields = fen.split()
+        if len(fields) not in (4, 6):
+            raise UserActionError('{!r} is not a valid FEN.'.format(fen))
+        placement, side, castlings, en_passant = fields[:4]
+        session = cls()
+        session.board.set_fen_placement(placement)
+        if side not in ('w', 'b'):
+            raise UserActionError('Bad side to move: {!r}.'.format(side))
+        session.is_white_turn = (side == 'w')
+        castling_rights = 0
+        if castlings != '-':
+            for symbol in castlings:
+                if symbol not in _CASTLING_SYMBOL_TO_BIT:
+                    raise UserActionError(
+                        'Bad castling availability: {!r}.'.format(castlings))
+                castling_rights |= _CASTLING_SYMBOL_TO_BIT[symbol]
+        session.set_castling_rights(castling_rights)
+        if en_passant != '-':
+            session.en_passant_target = Location(en_passant)
+        session._check_position()
+        if len(fields) == 6:
+            try:
+                session.halfmove_clock = int(fields[4])
+                session.fullmove_number = int(fields[5])
+            except ValueError:
+                raise UserActionError('{!r} is not a valid FEN.'.format(fen))
+            if not (0 <= session.halfmove_clock <= 0xffff and
+                    1 <= session.fullmove_number <= 0xffff):
+                raise UserActionError(
+                    'Bad move counters in FEN: {!r}.'.format(fen))
+        session.reset_zobrist_key()
+        session.start_fen = session.to_fen()
+        return session
+
+    @classmethod
+    def restore(cls, data):
+        """
+        Make a session from the result of snapshot().
+
+        :param data: str
+        :return: ChessGameSession
+        """
+        if len(data) != SNAPSHOT_SIZE:
+            raise UserActionError(
+                'A snapshot must have {} bytes.'.format(SNAPSHOT_SIZE))
+        flags, en_passant_code, halfmove_clock, fullmove_number = (
+            _SNAPSHOT_STATE.unpack_from(data, PACKED_PLACEMENT_SIZE))
+        if flags >> 5 or en_passant_code > 64:
+            raise UserActionError('Bad snapshot.')
+        session = cls()
+        session.board.set_packed_placement(data[:PACKED_PLACEMENT_SIZE])
+        session.is_white_turn = not flags & 1
+        session.set_castling_rights(flags >> 1)
+        if en_passant_code:
+            session.en_passant_target = Location.from_index(
+                en_passant_code - 1)
+        session._check_position()
+        session.halfmove_clock = halfmove_clock
+        session.fullmove_number = fullmove_number
+        # the board's part of the key is already computed
+        session.board.zobrist_key ^= session._get_state_zobrist_key(
+            session.get_castling_rights())
+        session._position_counts = {session.board.zobrist_key: 1}
+        session.start_fen = session.to_fen()
+        return session
+
+    def snapshot(self):
+        """
+        Get the position packed into SNAPSHOT_SIZE (38) bytes: the board
+        (see Board.get_packed_placement()), the side to move, castling
+        rights, en passant target and the move counters (but not the
+        move history).
+
+        :return: str
+        """
+        target = self.en_passant_target
+        return self.board.get_packed_placement() + _SNAPSHOT_STATE.pack(
+            (not self.is_white_turn) | self.get_castling_rights() << 1,
+            0 if target is None else target.index + 1,
+            min(self.halfmove_clock, 0xffff),
+            min(self.fullmove_number, 0xffff))
+
+    def to_fen(self):
+        """
+        Get the FEN describing the position.
+
+        :return: str
+        """
+        castling_rights = self.get_castling_rights()
+        castlings = ''.join(symbol for symbol, bit in _CASTLING_SYMBOLS
+                            if castling_rights & bit)
+        return '{} {} {} {} {} {}'.format(
+            self.board.get_fen_placement(),
+            'w' if self.is_white_turn else 'b',
+            castlings or '-',
+            self.en_passant_target or '-',
+            self.halfmove_clock,
+            self.fullmove_number)
 
     @property
     def current_player(self):
         return self.players[self.is_white_turn]
 
+    @property
+    def zobrist_key(self):
+        """
+        The Zobrist key of the position (see `chess.zobrist`), covering
+        the pieces, the side to move, the castling rights and the en
+        passant file (the latter only if the capture is possible).
+        """
+        return self.board.zobrist_key
+
     def setup(self):
         self.board.setup()
+        self.reset_zobrist_key()
+        self.start_fen = INITIAL_FEN
+
+    def reset_zobrist_key(self):
+        """
+        Recompute the Zobrist key from scratch -- needed only after
+        the position has been set up by hand.
+        """
+        self.board.zobrist_key = (
+            self.board.compute_zobrist_key() ^
+            self._get_state_zobrist_key(self.get_castling_rights()))
+        # the position history starts anew, too
+        self._position_counts = {self.board.zobrist_key: 1}
+
+    def push(self, move):
+        """
+        Make the given move without validating it (the move must be
+        legal, e.g. produced by generate_legal_moves()), remembering
+        what is needed to take it back with pop().
+
+        :param move: Move
+        """
+        castling_rights = self.get_castling_rights()
+        zobrist_key = self.board.zobrist_key
+        state_key = self._get_state_zobrist_key(castling_rights)
+        resets_halfmove_clock = move.is_capture() or move.is_pawn_move()
+        with critical_part():
+            captured_piece, captured_loc = move.make()
+            self._undo_stack.append((
+                move,
+                captured_piece,
+                captured_loc,
+                castling_rights,
+                self.en_passant_target,
+                self.last_move,
+                zobrist_key,
+                self.halfmove_clock,
+                self.fullmove_number,
+            ))
+            self.en_passant_target = move.get_en_passant_target()
+            self.last_move = move
+            if resets_halfmove_clock:
+                self.halfmove_clock = 0
+            else:
+                self.halfmove_clock += 1
+            if not self.is_white_turn:
+                self.fullmove_number += 1
+            self.is_white_turn = not self.is_white_turn
+            self.board.zobrist_key ^= state_key ^ self._get_state_zobrist_key(
+                self.get_castling_rights())
+            key = self.board.zobrist_key
+            self._position_counts[key] = self._position_counts.get(key, 0) + 1
+
+    def pop(self):
+        """
+        Take back the last move made with push() (or act()).
+
+        :return: Move
+        """
+        (move,
+         captured_piece,
+         captured_loc,
+         castling_rights,
+         en_passant_target,
+         last_move,
+         zobrist_key,
+         halfmove_clock,
+         fullmove_number) = self._undo_stack.pop()
+        with critical_part():
+            key = self.board.zobrist_key
+            count = self._position_counts.get(key, 0) - 1
+            if count > 0:
+                self._position_counts[key] = count
+            else:
+                self._position_counts.pop(key, None)
+            self.is_white_turn = not self.is_white_turn
+            move.unmake(captured_piece, captured_loc)
+            self.set_castling_rights(castling_rights)
+            self.en_passant_target = en_passant_target
+            self.last_move = last_move
+            self.board.zobrist_key = zobrist_key
+            self.halfmove_clock = halfmove_clock
+            self.fullmove_number = fullmove_number
+        return move
+
+    def get_move_history(self):
+        """
+        Get the list of the moves made so far (those which can be
+        taken back with pop()), the oldest first.
+        """
+        return [record[0] for record in self._undo_stack]
+
+    def get_castling_rights(self):
+        """
+        Get the castling rights of both players packed into an int
+        (see the CASTLING_* constants).
+        """
+        white = self.players[True]
+        black = self.players[False]
+        castling_rights = 0
+        if white.kingside_castling_enabled:
+            castling_rights |= CASTLING_WHITE_KINGSIDE
+        if white.queenside_castling_enabled:
+            castling_rights |= CASTLING_WHITE_QUEENSIDE
+        if black.kingside_castling_enabled:
+            castling_rights |= CASTLING_BLACK_KINGSIDE
+        if black.queenside_castling_enabled:
+            castling_rights |= CASTLING_BLACK_QUEENSIDE
+        return castling_rights
+
+    def set_castling_rights(self, castling_rights):
+        white = self.players[True]
+        black = self.players[False]
+        white.kingside_castling_enabled = bool(
+            castling_rights & CASTLING_WHITE_KINGSIDE)
+        white.queenside_castling_enabled = bool(
+            castling_rights & CASTLING_WHITE_QUEENSIDE)
+        black.kingside_castling_enabled = bool(
+            castling_rights & CASTLING_BLACK_KINGSIDE)
+        black.queenside_castling_enabled = bool(
+            castling_rights & CASTLING_BLACK_QUEENSIDE)
+
+    def generate_legal_moves(self):
+        return generate_legal_moves(self)
+
+    def is_check(self):
+        return is_check(self)
+
+    def get_repetition_count(self):
+        """
+        Get the number of times the current position has occurred
+        (since the session was set up, as far as push() and pop() tell).
+        """
+        return self._position_counts.get(self.board.zobrist_key, 0)
+
+    def is_material_insufficient(self):
+        """
+        Tell whether neither player can checkmate with the pieces left:
+        there are no pawns, rooks nor queens, and there is at most one
+        minor piece, or there are only bishops, all on fields of the
+        same colour.
+        """
+        count = self.board.get_piece_count
+        if any(count(symbol) for symbol in _MATING_SYMBOLS):
+            return False
+        knight_count = count('N') + count('n')
+        bishop_count = count('B') + count('b')
+        if knight_count + bishop_count <= 1:
+            return True
+        if knight_count:
+            return False
+        bishops = (self.board.get_piece_mask('B') |
+                   self.board.get_piece_mask('b'))
+        return not (bishops & attack_tables.LIGHT_SQUARES and
+                    bishops & attack_tables.DARK_SQUARES)
+
+    def get_outcome(self):
+        """
+        Tell whether (and how) the game has ended.
+
+        :return: CHECKMATE (the current player is mated), STALEMATE,
+                 INSUFFICIENT_MATERIAL, FIFTY_MOVE_RULE,
+                 THREEFOLD_REPETITION or None
+        """
+        if not has_legal_moves(self):
+            return CHECKMATE if self.is_check() else STALEMATE
+        if self.is_material_insufficient():
+            return INSUFFICIENT_MATERIAL
+        if self.halfmove_clock >= 100:
+            return FIFTY_MOVE_RULE
+        if self.get_repetition_count() >= 3:
+            return THREEFOLD_REPETITION
+        return None
 
     def act(self, move_spec):
         self._do_move(move_spec)
@@ -44,11 +401,45 @@ class ChessGameSession(Session):
     def _do_move(self, move_spec):
         move = self._move_factory.create(self, move_spec)
         move.execute()
-        self.last_move = move
-        self.is_white_turn = not self.is_white_turn
+
+    def _check_position(self):
+        # reject what could not happen in a game (and what the move
+        # generator is not prepared for) -- for from_fen() and restore()
+        board = self.board
+        if (board.get_piece_mask('P') | board.get_piece_mask('p')) & (
+                _BACK_ROWS_MASK):
+            raise UserActionError('Pawns cannot stand on rows 1 and 8.')
+        target = self.en_passant_target
+        if target is None:
+            return
+        # the target must be just behind a pawn of the player who
+        # has just moved, i.e. on row '6' if white is to move
+        if self.is_white_turn:
+            y_label, pawn_y, pawn_symbol = '6', target.y + 1, 'p'
+        else:
+            y_label, pawn_y, pawn_symbol = '3', target.y - 1, 'P'
+        pawn = (board[Location.from_xy(target.x, pawn_y)]
+                if target.y_label == y_label else None)
+        if pawn is None or pawn.symbol != pawn_symbol:
+            raise UserActionError(
+                'Bad en passant target: {}.'.format(target))
+
+    def _get_state_zobrist_key(self, castling_rights):
+        key = CASTLING_KEYS[castling_rights]
+        if not self.is_white_turn:
+            key ^= SIDE_KEY
+        target = self.en_passant_target
+        if target is not None:
+            pawn_symbol = 'P' if self.is_white_turn else 'p'
+            capturing_pawns = (
+                attack_tables.PAWN_ATTACKS[not self.is_white_turn][target.index] &
+                self.board.get_piece_mask(pawn_symbol))
+            if capturing_pawns:
+                key ^= EN_PASSANT_KEYS[target.x]
+        return key
 
     def _is_game_finished(self):
-        return False  # TODO something smarter :-)
+        return self.get_outcome() is not None
 
 
 class ChessGamePlayer(object):
@@ -87,9 +478,44 @@ class QueensPuzzleSession(PuzzleSession):
         dst = Location(loc_label)
         return self._set_queen(dst)
 
+    def remove_queen(self, loc_label):
+        loc = Location(loc_label)
+        if self.board[loc] is None:
+            raise UserActionError('There is no queen here!')
+        self._remove_queen(loc)
+
+    def undo(self):
+        """
+        Remove the queen placed most recently.
+        """
+        loc = self._queen_resolver.get_last_reserved_field()
+        if loc is None:
+            raise UserActionError('There is no queen to remove!')
+        self._remove_queen(loc)
+
+    def count_usable_fields(self):
+        return self._queen_resolver.count_usable_fields()
+
+    def is_solvable(self):
+        return self._queen_resolver.is_solvable()
+
+    def get_hint(self):
+        """
+        Get a location where a queen can be placed so that the
+        puzzle remains solvable (or None if it is not solvable).
+        """
+        solution = self._queen_resolver.find_solution()
+        if solution is None:
+            return None
+        for x, y in solution:
+            loc = Location.from_xy(x, y)
+            if self.board[loc] is None:
+                return loc
+        return None
+
     def _set_queen(self, dst):
         if self._queen_resolver.is_usable_field(dst):
-            self._queen_resolver.reserve_field(dst, self._queen)
+            self._queen_resolver.reserve_field(dst)
             self.board[dst] = self._queen
             self._queen_count += 1
             if self._queen_count == self.max_queen_count:
@@ -97,3 +523,8 @@ class QueensPuzzleSession(PuzzleSession):
         else:
             raise UserActionError('You cannot place a queen here!')
         return False
+
+    def _remove_queen(self, loc):
+        self._queen_resolver.release_field(loc)
+        del self.board[loc]
+        self._queen_count -= 1
@@ -1,21 +1,34 @@
+import collections
+import json
+import sys
+import time
+
+from chess.engine import Searcher
 from chess.exceptions import UserActionError
 from chess.session import (
+    CHECKMATE,
     ChessGameSession,
     QueensPuzzleSession,
 )
 from chess.ui import (
     Drawer,
+    NullRenderer,
     UserInputMixin,
 )
+from chess.util import per_second
 
 
 class SessionRunner(UserInputMixin):
 
     session_class = None   # must be set in subclasses
 
-    def __init__(self):
+    def __init__(self, ansi=False):
+        """
+        :param ansi: whether the board should be redrawn in place, using
+                     ANSI escape sequences (see Drawer)
+        """
         self.session = self.session_class()
-        self.drawer = Drawer(self)
+        self.drawer = Drawer(self, ansi=ansi)
 
     def run(self):
         try:
@@ -23,6 +36,7 @@ class SessionRunner(UserInputMixin):
             self.at_start()
             self.main()
         finally:
+            self.drawer.close()
             self.at_end()
 
     def main(self):
@@ -61,7 +75,7 @@ class ChessGameSessionRunner(SessionRunner):
 
     session_class = ChessGameSession
 
-    _input_msg_pattern = '{}\'s move: (please enter something like "b4 d6" or "0-0-0"...):'
+    _input_msg_pattern = '{}\'s move: (please enter something like "b4 d6", "b7 b8 q" or "0-0-0"...):'
 
     def at_start(self):
         print '\nStarting a chess game...\n'
@@ -71,21 +85,188 @@ class ChessGameSessionRunner(SessionRunner):
         user_input = self.input(input_msg)
         return self._parse_user_input(user_input)
 
+    def at_completed(self):
+        self.drawer.show()
+        outcome = self.session.get_outcome()
+        if outcome == CHECKMATE:
+            print '\nCheckmate! {} wins.\n'.format(
+                self.session.players[not self.session.is_white_turn])
+        else:
+            print '\nDraw by {}.\n'.format(outcome)
+
     def _parse_user_input(self, user_input):
         return map(str.strip, user_input.split())
 
 
+class ChessGameVsComputerSessionRunner(ChessGameSessionRunner):
+
+    # the computer plays black
+    computer_is_white = False
+
+    # seconds the computer may think about a move
+    time_limit = 2.0
+
+    def __init__(self, ansi=False):
+        super(ChessGameVsComputerSessionRunner, self).__init__(ansi)
+        self.searcher = Searcher()
+
+    def at_start(self):
+        print '\nStarting a chess game against the computer...\n'
+
+    def get_action_arg(self):
+        if self.session.is_white_turn != self.computer_is_white:
+            return super(ChessGameVsComputerSessionRunner,
+                         self).get_action_arg()
+        print '{} is thinking...'.format(self.session.current_player)
+        result = self.searcher.search(self.session, time_limit=self.time_limit)
+        # (without legal moves the game would have been completed)
+        assert result.move is not None
+        print '{} plays: {}'.format(self.session.current_player, result.move)
+        return str(result.move).split()
+
+
+BatchError = collections.namedtuple(
+    'BatchError', ['game_number', 'move_number', 'move', 'message'])
+
+
+class ChessGameBatchRunner(ChessGameSessionRunner):
+
+    """
+    Runs chess games headlessly, taking the moves from an iterable of
+    lines: one move per line, written as in the interactive mode, and
+    an empty line between games.  An invalid move ends the validation
+    of its game and is recorded as a BatchError.
+
+    Nothing is drawn unless a renderer is given: then every position
+    of the games (up to their invalid moves) is rendered to the log
+    stream, `log_batch_size` positions per write.
+    """
+
+    new_game_line = ''
+
+    log_batch_size = 1024
+
+    def __init__(self, lines, renderer=None, log=None):
+        """
+        :param renderer: Renderer (see chess.ui)
+        :param log: the stream to log the positions to
+                    (default: sys.stdout)
+        """
+        self._lines = lines
+        self.session = None
+        self.drawer = Drawer(self, log,
+                             renderer=renderer or NullRenderer(),
+                             batch_size=self.log_batch_size)
+        self.errors = []
+        self.game_count = 0
+        self.move_count = 0
+
+    def run(self, out=sys.stdout):
+        """
+        Replay all games, writing each error as a JSON object on its own
+        line, followed by a summary line.
+
+        :return: list of BatchError
+        """
+        start = time.time()
+        for error in self.iter_errors():
+            out.write(json.dumps(error._asdict()) + '\n')
+        elapsed = time.time() - start
+        out.write('{} games ({} with errors), {} moves in {:.2f}s: '
+                  '{:.0f} games/min, {:.0f} moves/s\n'.format(
+                      self.game_count, len(self.errors), self.move_count,
+                      elapsed, per_second(self.game_count, elapsed) * 60,
+                      per_second(self.move_count, elapsed)))
+        return self.errors
+
+    def iter_errors(self):
+        """
+        Replay the games, yielding a BatchError for every game which
+        contains an invalid move.
+        """
+        move_number = 0
+        failed = False
+        try:
+            for line in self._lines:
+                line = line.strip()
+                if line == self.new_game_line:
+                    move_number = 0
+                    failed = False
+                    continue
+                if move_number == 0:
+                    self._start_game()
+                move_number += 1
+                if failed:
+                    continue
+                try:
+                    self.session.act(self._parse_user_input(line))
+                except UserActionError as exc:
+                    failed = True
+                    error = BatchError(self.game_count, move_number, line,
+                                       exc.msg)
+                    self.errors.append(error)
+                    yield error
+                else:
+                    self.move_count += 1
+                    self.drawer.show()
+        finally:
+            self.drawer.close()
+
+    # non-public helpers:
+
+    def _start_game(self):
+        self.session = self.session_class()
+        self.session.setup()
+        self.game_count += 1
+        self.drawer.show()
+
+
 class QueensPuzzleSessionRunner(SessionRunner):
 
     session_class = QueensPuzzleSession
 
-    _input_msg = 'Please, place a queen (enter something like "b4"):'
+    _input_msg = ('Please, place a queen (enter something like "b4"; '
+                  'or "hint", or "undo"):')
+
+    hint_cmd = 'hint'
+    undo_cmd = 'undo'
 
     def at_start(self):
         print '\nStarting the 8-queens puzzle...'
 
     def get_action_arg(self):
-        return self.input(self._input_msg)
+        self._show_status()
+        while True:
+            user_input = self.input(self._input_msg)
+            if user_input == self.hint_cmd:
+                self._show_hint()
+            elif user_input == self.undo_cmd:
+                self._undo()
+            else:
+                return user_input
 
     def at_completed(self):
         print '\nCongratulations! You solved it!\n'
+
+    def _show_status(self):
+        print 'Usable fields left: {}.'.format(
+            self.session.count_usable_fields())
+        if not self.session.is_solvable():
+            print ('The puzzle cannot be solved from here '
+                   '(type "{}" to take a queen back).'.format(self.undo_cmd))
+
+    def _show_hint(self):
+        hint = self.session.get_hint()
+        if hint is None:
+            print 'The puzzle cannot be solved from here, sorry.'
+        else:
+            print 'Try {}.'.format(hint)
+
+    def _undo(self):
+        try:
+            self.session.undo()
+        except UserActionError as exc:
+            print exc
+        else:
+            self.drawer.show()
+            self._show_status()
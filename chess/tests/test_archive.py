@@ -0,0 +1,106 @@
+import os
+import random
+import shutil
+import tempfile
+import unittest
+
+from chess.archive import (
+    ArchiveReader,
+    ArchiveWriter,
+)
+from chess.exceptions import UserActionError
+from chess.move import MoveFactory
+from chess.session import (
+    INITIAL_FEN,
+    ChessGameSession,
+)
+
+
+def play_random_game(fen, seed, max_plies=80):
+    session = ChessGameSession.from_fen(fen)
+    rand = random.Random(seed)
+    for _ in range(max_plies):
+        moves = list(session.generate_legal_moves())
+        if not moves:
+            break
+        session.push(rand.choice(moves))
+    return session
+
+
+class TestCreateFromCode(unittest.TestCase):
+
+    def test_every_legal_move_round_trips(self):
+        factory = MoveFactory()
+        for fen in [
+                INITIAL_FEN,
+                'r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1',
+                'rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8',
+                'r3k2r/8/8/8/8/8/1p6/R3K2R b KQkq - 0 1']:
+            session = ChessGameSession.from_fen(fen)
+            for move in session.generate_legal_moves():
+                decoded = factory.create_from_code(session, move.get_code())
+                self.assertEqual(str(decoded), str(move))
+                self.assertIs(type(decoded), type(move))
+
+
+class TestArchive(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp_dir, 'games.cma')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_round_trip(self):
+        fens = [INITIAL_FEN,
+                'r3k2r/8/8/8/8/8/1p6/R3K2R b KQkq - 0 1',
+                INITIAL_FEN]
+        sessions = [play_random_game(fen, seed)
+                    for seed, fen in enumerate(fens)]
+        with ArchiveWriter(self.path) as writer:
+            for session in sessions:
+                writer.add_game(session)
+            writer.add_move_codes([])
+        with ArchiveReader(self.path) as reader:
+            self.assertEqual(len(reader), 4)
+            # random access, in reverse order
+            for game_index in reversed(range(len(sessions))):
+                session = sessions[game_index]
+                game = reader[game_index]
+                self.assertEqual(game.start_fen, fens[game_index])
+                self.assertEqual(
+                    list(game.move_codes),
+                    [move.get_code() for move in session.get_move_history()])
+                for replayed, _ in reader.iter_positions(game_index):
+                    pass
+                self.assertEqual(replayed.to_fen(), session.to_fen())
+                self.assertEqual(replayed.zobrist_key, session.zobrist_key)
+            self.assertEqual(len(reader[3].move_codes), 0)
+            self.assertEqual(len(list(reader)), 4)
+            self.assertRaises(IndexError, reader.__getitem__, 4)
+
+    def test_add_game_leaves_the_session_unchanged(self):
+        session = play_random_game(INITIAL_FEN, 42, max_plies=10)
+        fen = session.to_fen()
+        with ArchiveWriter(self.path) as writer:
+            writer.add_game(session)
+        self.assertEqual(session.to_fen(), fen)
+        self.assertEqual(len(session.get_move_history()), 10)
+
+    def test_game_of_a_restored_session(self):
+        session = play_random_game(INITIAL_FEN, 7, max_plies=6)
+        restored = ChessGameSession.restore(session.snapshot())
+        restored.push(next(restored.generate_legal_moves()))
+        with ArchiveWriter(self.path) as writer:
+            writer.add_game(restored)
+        with ArchiveReader(self.path) as reader:
+            self.assertEqual(reader[0].start_fen, session.to_fen())
+            self.assertEqual(len(reader[0].move_codes), 1)
+
+    def test_not_an_archive(self):
+        with open(self.path, 'wb') as f:
+            f.write(b'[Event "?"]\n\n1. e4 *\n')
+        self.assertRaises(UserActionError, ArchiveReader, self.path)
+        open(self.path, 'wb').close()
+        self.assertRaises(UserActionError, ArchiveReader, self.path)
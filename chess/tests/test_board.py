@@ -1,4 +1,5 @@
 import collections
+import pickle
 import unittest
 
 from unittest_expander import (
@@ -7,6 +8,7 @@ from unittest_expander import (
 )
 
 from chess.board_loc import (
+    BitboardBoard,
     Board,
     Location,
 )
@@ -20,6 +22,8 @@ from chess.piece import (
 @expand
 class TestBoard(unittest.TestCase):
 
+    board_class = Board
+
     getitem_piece_cases = [
         # (<location label>, <piece symbol>)
         ('a1', 'R'),
@@ -67,12 +71,12 @@ class TestBoard(unittest.TestCase):
 
 
     def setUp(self):
-        self.board = Board()
+        self.board = self.board_class()
         self.board.setup()
 
     @foreach(no_pieces_cases)
     def test_init(self, loc_label):
-        fresh_board = Board()
+        fresh_board = self.board_class()
         loc = Location(loc_label)
         value = fresh_board[loc]
         self.assertIsNone(value)
@@ -156,6 +160,88 @@ class TestBoard(unittest.TestCase):
         self.assertIsInstance(iterator, collections.Iterator)
         self.assertEqual(y_labels, '87654321')
 
+    def test_eq_and_hash(self):
+        other = self.board_class()
+        other.setup()
+        self.assertEqual(self.board, other)
+        self.assertEqual(hash(self.board), hash(other))
+        self.assertEqual(self.board.zobrist_key,
+                         self.board.compute_zobrist_key())
+        knight = other.pop_piece(Location('b1'))
+        self.assertNotEqual(self.board, other)
+        other[Location('b1')] = knight
+        self.assertEqual(self.board, other)
+        self.assertEqual(hash(self.board), hash(other))
+        self.assertNotEqual(self.board, self.board_class())
+
+    def test_is_path_clear(self):
+        path = [Location('a3'), Location('b4'), Location('c5')]
+        self.assertTrue(self.board.is_path_clear(path))
+        self.assertTrue(self.board.is_path_clear([]))
+        path.append(Location('d7'))
+        self.assertFalse(self.board.is_path_clear(path))
+
+    def test_piece_counts(self):
+        self.assertEqual(self.board.get_piece_count('P'), 8)
+        self.assertEqual(self.board.get_piece_count('n'), 2)
+        knight = self.board.pop_piece(Location('b8'))
+        self.board[Location('d2')] = knight
+        self.assertEqual(self.board.get_piece_count('n'), 2)
+        self.assertEqual(self.board.get_piece_count('P'), 7)
+        del self.board[Location('d2')]
+        self.assertEqual(self.board.get_piece_count('n'), 1)
+        self.board.set_fen_placement('4k3/8/8/8/8/8/8/Q3K3')
+        self.assertEqual(
+            [self.board.get_piece_count(symbol) for symbol in 'KQkqPp'],
+            [1, 1, 1, 0, 0, 0])
+
+    def test_is_mask_clear(self):
+        mask = sum(1 << Location(label).index for label in ['a3', 'b4', 'c5'])
+        self.assertTrue(self.board.is_mask_clear(mask))
+        self.assertTrue(self.board.is_mask_clear(0))
+        mask |= 1 << Location('d7').index
+        self.assertFalse(self.board.is_mask_clear(mask))
+
+
+class TestBitboardBoard(TestBoard):
+
+    board_class = BitboardBoard
+
+    def _mask(self, *loc_labels):
+        return sum(1 << Location(label).index for label in loc_labels)
+
+    def test_masks_after_setup(self):
+        self.assertEqual(self.board.occupied, (1 << 16) - 1 | ((1 << 16) - 1) << 48)
+        self.assertEqual(self.board.get_color_mask(False), (1 << 16) - 1)
+        self.assertEqual(self.board.get_color_mask(True), ((1 << 16) - 1) << 48)
+        self.assertEqual(self.board.get_piece_mask('K'), self._mask('e1'))
+        self.assertEqual(self.board.get_piece_mask('n'), self._mask('b8', 'g8'))
+        self.assertEqual(self.board.get_piece_mask('Q'), self._mask('d1'))
+
+    def test_masks_follow_mutations(self):
+        piece_factory = PieceFactory()
+        knight = self.board.pop_piece(Location('g1'))
+        self.board[Location('f3')] = knight
+        self.board[Location('e7')] = piece_factory.create('Q')
+        del self.board[Location('a8')]
+        self.assertEqual(self.board.get_piece_mask('N'), self._mask('b1', 'f3'))
+        self.assertEqual(self.board.get_piece_mask('Q'), self._mask('d1', 'e7'))
+        self.assertEqual(self.board.get_piece_mask('p'),
+                         self._mask(*'a7 b7 c7 d7 f7 g7 h7'.split()))
+        self.assertEqual(self.board.get_piece_mask('r'), self._mask('h8'))
+        self.assertFalse(self.board.occupied & self._mask('g1', 'a8'))
+        self.assertTrue(self.board.occupied & self._mask('f3'))
+        self.assertFalse(self.board.get_color_mask(False) & self._mask('e7'))
+        self.assertEqual(
+            self.board.get_color_mask(True) | self.board.get_color_mask(False),
+            self.board.occupied)
+
+    def test_iter_piece_locations(self):
+        self.assertEqual(list(self.board.iter_piece_locations('R')),
+                         [Location('a1'), Location('h1')])
+        self.assertEqual(list(self.board.iter_piece_locations('k')),
+                         [Location('e8')])
+
 
 @expand
 class TestLocation(unittest.TestCase):
@@ -381,3 +467,23 @@ class TestLocation(unittest.TestCase):
         dst = Location(dst_label)
         with self.assertRaises(UserActionError):
             src.get_path(dst)
+
+    @foreach(init_and_basics_cases)
+    def test_interned(self, given_loc_label):
+        loc = Location(given_loc_label)
+        self.assertIs(Location(given_loc_label.lower()), loc)
+        self.assertIs(Location(given_loc_label.upper()), loc)
+        self.assertIs(Location.from_index(loc.index), loc)
+        self.assertIs(Location.from_xy(loc.x, loc.y), loc)
+
+    def test_index_order(self):
+        self.assertIs(Location.from_index(0), Location('a8'))
+        self.assertIs(Location.from_index(7), Location('h8'))
+        self.assertIs(Location.from_index(56), Location('a1'))
+        self.assertIs(Location.from_index(63), Location('h1'))
+        self.assertIs(Location.from_xy(4, 4), Location('e4'))
+
+    def test_pickle_keeps_canonical_instance(self):
+        loc = Location('e4')
+        self.assertIs(pickle.loads(pickle.dumps(loc)), loc)
+        self.assertIs(pickle.loads(pickle.dumps(loc, 2)), loc)
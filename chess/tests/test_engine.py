@@ -0,0 +1,193 @@
+import unittest
+
+from chess.engine import (
+    MATE_SCORE,
+    Searcher,
+    TranspositionTable,
+    evaluate,
+    search_parallel,
+)
+from chess.engine.transposition import (
+    EXACT,
+    LOWER_BOUND,
+    UPPER_BOUND,
+)
+from chess.session import ChessGameSession
+from chess.tests.test_movegen import make_session
+from chess.tests.test_session import get_state
+
+
+class TestEvaluate(unittest.TestCase):
+
+    def test_initial_position_is_balanced(self):
+        session = ChessGameSession()
+        session.setup()
+        self.assertEqual(evaluate(session), 0)
+
+    def test_score_is_from_the_side_to_move_point_of_view(self):
+        placement = {'e1': 'K', 'e8': 'k', 'd4': 'Q'}
+        self.assertGreater(evaluate(make_session(placement)), 800)
+        self.assertLess(evaluate(make_session(placement, is_white_turn=False)),
+                        -800)
+
+
+class TestTranspositionTable(unittest.TestCase):
+
+    def setUp(self):
+        self.table = TranspositionTable(size_mb=1)
+        # keys which fall into the same bucket
+        self.key = 0x123456789abcdef0
+        self.other_key = self.key + (1 << 40)
+        self.third_key = self.key + (2 << 40)
+
+    def test_memory_cap(self):
+        for size_mb in (1, 3, 16):
+            table = TranspositionTable(size_mb=size_mb)
+            used = sum(len(arr) * arr.itemsize for arr in (
+                table._checks, table._infos, table._scores))
+            self.assertLessEqual(used, size_mb * 1024 * 1024)
+            self.assertGreater(used, size_mb * 1024 * 1024 // 2)
+
+    def test_store_and_probe(self):
+        self.assertIsNone(self.table.probe(self.key))
+        self.table.store(self.key, 1234, 5, LOWER_BOUND, -42)
+        self.assertEqual(self.table.probe(self.key), (1234, 5, LOWER_BOUND, -42))
+        self.assertIsNone(self.table.probe(self.other_key))
+
+    def test_depth_preferred_and_always_replace_slots(self):
+        self.table.store(self.key, 1, 6, EXACT, 10)
+        self.table.store(self.other_key, 2, 3, EXACT, 20)
+        self.table.store(self.third_key, 3, 2, UPPER_BOUND, 30)
+        # the deep entry is kept, the always-replace slot was overwritten
+        self.assertEqual(self.table.probe(self.key), (1, 6, EXACT, 10))
+        self.assertIsNone(self.table.probe(self.other_key))
+        self.assertEqual(self.table.probe(self.third_key),
+                         (3, 2, UPPER_BOUND, 30))
+        # deeper results replace the depth-preferred slot
+        self.table.store(self.other_key, 2, 7, EXACT, 20)
+        self.assertIsNone(self.table.probe(self.key))
+        self.assertEqual(self.table.probe(self.other_key), (2, 7, EXACT, 20))
+
+    def test_entries_of_older_searches_are_replaced(self):
+        self.table.store(self.key, 1, 6, EXACT, 10)
+        self.table.new_search()
+        self.table.store(self.other_key, 2, 1, EXACT, 20)
+        self.assertIsNone(self.table.probe(self.key))
+        self.assertEqual(self.table.probe(self.other_key), (2, 1, EXACT, 20))
+
+    def test_mixed_up_entries_are_not_returned(self):
+        table = TranspositionTable(size_mb=1, shared=True)
+        table.store(self.key, 1, 6, LOWER_BOUND, 10)
+        slot = (self.key & table._bucket_mask) * 2
+        # another writer's score landed in the slot
+        table._scores[slot] = -500
+        self.assertIsNone(table.probe(self.key))
+        table.store(self.key, 1, 6, LOWER_BOUND, 10)
+        # another writer's check and info landed in the slot
+        table.store(self.other_key, 2, 9, UPPER_BOUND, 20)
+        table._scores[slot] = 10
+        self.assertIsNone(table.probe(self.key))
+        self.assertIsNone(table.probe(self.other_key))
+
+    def test_clear(self):
+        for table in (self.table, TranspositionTable(size_mb=1, shared=True)):
+            table.store(self.key, 1, 6, EXACT, 10)
+            self.assertEqual(table.count_used_slots(), 1)
+            table.clear()
+            self.assertEqual(table.count_used_slots(), 0)
+            self.assertIsNone(table.probe(self.key))
+
+
+class TestSearcher(unittest.TestCase):
+
+    def setUp(self):
+        self.searcher = Searcher()
+
+    def test_finds_mate_in_one(self):
+        session = make_session({'g1': 'K', 'a1': 'R', 'g8': 'k',
+                                'f7': 'p', 'g7': 'p', 'h7': 'p'})
+        result = self.searcher.search(session, max_depth=3)
+        self.assertEqual(str(result.move), 'a1 a8')
+        self.assertEqual(result.score, MATE_SCORE - 1)
+
+    def test_captures_a_hanging_piece(self):
+        session = make_session({'e1': 'K', 'e8': 'k', 'c3': 'N', 'd5': 'q'})
+        result = self.searcher.search(session, max_depth=2)
+        self.assertEqual(str(result.move), 'c3 d5')
+
+    def test_session_is_left_unchanged(self):
+        session = ChessGameSession()
+        session.setup()
+        for move_spec in [['e2', 'e4'], ['d7', 'd5']]:
+            session.act(move_spec)
+        state_before = get_state(session)
+        key_before = session.zobrist_key
+        self.searcher.search(session, max_depth=3)
+        self.assertEqual(get_state(session), state_before)
+        self.assertEqual(session.zobrist_key, key_before)
+
+    def test_node_limit_stops_the_search(self):
+        session = ChessGameSession()
+        session.setup()
+        result = self.searcher.search(session, node_limit=2000)
+        self.assertIsNotNone(result.move)
+        self.assertGreaterEqual(result.depth, 1)
+        self.assertLess(result.nodes, 2000 + 512)
+
+    def test_table_is_reused_between_searches(self):
+        session = ChessGameSession()
+        session.setup()
+        self.searcher.search(session, max_depth=3)
+        self.assertGreater(self.searcher.table.count_used_slots(), 0)
+        first = Searcher(table=TranspositionTable(size_mb=1))
+        fresh_nodes = first.search(session, max_depth=3).nodes
+        self.assertLess(first.search(session, max_depth=3).nodes, fresh_nodes)
+
+    def test_repetition_is_a_draw(self):
+        session = ChessGameSession.from_fen('k7/8/8/8/8/8/1q6/7K w - - 0 1')
+        for move_spec in [['h1', 'g1'], ['a8', 'b8'], ['g1', 'h1'],
+                          ['b8', 'a8'], ['h1', 'g1'], ['a8', 'b8']]:
+            session.act(move_spec)
+        # a queen down, white escapes by repeating the position
+        result = self.searcher.search(session, max_depth=3)
+        self.assertEqual(str(result.move), 'g1 h1')
+        self.assertEqual(result.score, 0)
+
+    def test_fifty_move_rule_is_a_draw(self):
+        # a queen up, but any move (no capture nor pawn move is
+        # possible) ends the game by the fifty-move rule
+        session = ChessGameSession.from_fen('7k/8/8/8/8/8/8/KQ6 w - - 99 80')
+        self.assertEqual(self.searcher.search(session, max_depth=3).score, 0)
+        session = ChessGameSession.from_fen('7k/8/8/8/8/8/8/KQ6 w - - 90 80')
+        self.assertGreater(self.searcher.search(session, max_depth=3).score,
+                           500)
+
+    def test_no_move_when_mated(self):
+        session = make_session({'g1': 'K', 'a8': 'R', 'g8': 'k',
+                                'f7': 'p', 'g7': 'p', 'h7': 'p'},
+                               is_white_turn=False)
+        result = self.searcher.search(session, max_depth=2)
+        self.assertIsNone(result.move)
+        self.assertEqual(result.score, -MATE_SCORE)
+
+
+class TestSearchParallel(unittest.TestCase):
+
+    def test_finds_mate_in_one_and_fills_the_shared_table(self):
+        session = make_session({'g1': 'K', 'a1': 'R', 'g8': 'k',
+                                'f7': 'p', 'g7': 'p', 'h7': 'p'})
+        table = TranspositionTable(size_mb=1, shared=True)
+        result = search_parallel(session, workers=2, max_depth=3, table=table)
+        self.assertEqual(str(result.move), 'a1 a8')
+        self.assertIs(result.move._session, session)
+        self.assertEqual(result.score, MATE_SCORE - 1)
+        # the workers' results are visible in the parent process
+        self.assertGreater(table.count_used_slots(), 0)
+
+    def test_single_worker_searches_in_process(self):
+        session = ChessGameSession()
+        session.setup()
+        table = TranspositionTable(size_mb=1, shared=True)
+        result = search_parallel(session, workers=1, max_depth=2, table=table)
+        self.assertEqual(result.depth, 2)
+        self.assertIsNotNone(result.move)
@@ -0,0 +1,256 @@
+import unittest
+
+from chess.board_loc import Location
+from chess.exceptions import UserActionError
+from chess.move import (
+    ATTACK_FORBIDDEN,
+    CASTLING_IMPOSSIBLE,
+    INVALID_EN_PASSANT,
+    INVALID_PROMOTION,
+    INVALID_ROUTE,
+    KING_LEFT_IN_CHECK,
+    LEGAL,
+    NOT_OWN_PIECE,
+    NO_PIECE,
+    OWN_PIECE_ATTACKED,
+    PATH_BLOCKED,
+    SAME_LOCATION,
+    VALIDATION_MESSAGES,
+    KingsideCastlingMove,
+    NormalMove,
+    QueensideCastlingMove,
+)
+from chess.perft import REFERENCE_POSITIONS
+from chess.session import ChessGameSession
+
+
+def make_session(placement, is_white_turn=True, castling=False):
+    """
+    Make a session with pieces placed according to a
+    {<location label>: <piece symbol>} dict.
+    """
+    session = ChessGameSession()
+    for loc_label, symbol in placement.items():
+        session.board[Location(loc_label)] = session.board.create_piece(symbol)
+    session.is_white_turn = is_white_turn
+    for player in session.players.values():
+        player.queenside_castling_enabled = castling
+        player.kingside_castling_enabled = castling
+    return session
+
+
+def move_labels(session):
+    return sorted(str(move) for move in session.generate_legal_moves())
+
+
+class TestGenerateLegalMoves(unittest.TestCase):
+
+    def test_initial_position(self):
+        session = ChessGameSession()
+        session.setup()
+        labels = move_labels(session)
+        self.assertEqual(len(labels), 20)
+        self.assertIn('e2 e4', labels)
+        self.assertIn('g1 f3', labels)
+
+    def test_pinned_piece_cannot_leave_the_pin_line(self):
+        session = make_session({'e1': 'K', 'e2': 'R', 'e8': 'r', 'a8': 'k'})
+        rook_moves = [label for label in move_labels(session)
+                      if label.startswith('e2')]
+        self.assertEqual(rook_moves, ['e2 e3', 'e2 e4', 'e2 e5',
+                                      'e2 e6', 'e2 e7', 'e2 e8'])
+
+    def test_only_check_evasions_in_check(self):
+        session = make_session({'e1': 'K', 'a2': 'R', 'e8': 'r', 'a8': 'k'})
+        self.assertTrue(session.is_check())
+        self.assertEqual(move_labels(session), [
+            'a2 e2', 'e1 d1', 'e1 d2', 'e1 f1', 'e1 f2'])
+
+    def test_king_cannot_step_along_the_checking_ray(self):
+        session = make_session({'d1': 'K', 'a1': 'r', 'h8': 'k'})
+        self.assertEqual(move_labels(session), ['d1 c2', 'd1 d2', 'd1 e2'])
+
+    def test_promotions(self):
+        session = make_session({'b7': 'P', 'e1': 'K', 'h8': 'k', 'a8': 'n'})
+        pawn_moves = [label for label in move_labels(session)
+                      if label.startswith('b7')]
+        self.assertEqual(pawn_moves, [
+            'b7 a8 b', 'b7 a8 n', 'b7 a8 q', 'b7 a8 r',
+            'b7 b8 b', 'b7 b8 n', 'b7 b8 q', 'b7 b8 r'])
+
+    def test_en_passant(self):
+        session = make_session({'e5': 'P', 'd7': 'p', 'e1': 'K', 'e8': 'k'},
+                               is_white_turn=False)
+        session.act(['d7', 'd5'])
+        self.assertIn('e5 d6', move_labels(session))
+        session.act(['e5', 'd6'])
+        self.assertIsNone(session.board[Location('d5')])
+        self.assertEqual(session.board[Location('d6')].get_symbol(), 'P')
+
+    def test_en_passant_exposing_the_king_is_illegal(self):
+        session = make_session({'a5': 'K', 'e5': 'P', 'd7': 'p',
+                                'h5': 'r', 'e8': 'k'},
+                               is_white_turn=False)
+        session.act(['d7', 'd5'])
+        self.assertNotIn('e5 d6', move_labels(session))
+
+    def test_castlings(self):
+        session = make_session({'e1': 'K', 'a1': 'R', 'h1': 'R', 'e8': 'k'},
+                               castling=True)
+        labels = move_labels(session)
+        self.assertIn('0-0', labels)
+        self.assertIn('0-0-0', labels)
+
+    def test_no_castling_through_attacked_field(self):
+        session = make_session({'e1': 'K', 'a1': 'R', 'h1': 'R',
+                                'e8': 'k', 'f8': 'r'},
+                               castling=True)
+        labels = move_labels(session)
+        self.assertNotIn('0-0', labels)
+        self.assertIn('0-0-0', labels)
+        self.assertRaises(UserActionError, session.act, ['0-0'])
+
+    def test_no_castling_when_path_is_blocked(self):
+        session = make_session({'e1': 'K', 'a1': 'R', 'b1': 'N', 'h1': 'R',
+                                'e8': 'k'},
+                               castling=True)
+        labels = move_labels(session)
+        self.assertIn('0-0', labels)
+        self.assertNotIn('0-0-0', labels)
+
+
+class TestMoveExecution(unittest.TestCase):
+
+    def test_move_leaving_king_in_check_is_rejected(self):
+        session = make_session({'e1': 'K', 'e2': 'R', 'e8': 'r', 'a8': 'k'})
+        with self.assertRaises(UserActionError):
+            session.act(['e2', 'd2'])
+        self.assertEqual(session.board[Location('e2')].get_symbol(), 'R')
+        self.assertTrue(session.is_white_turn)
+
+    def test_promotion_defaults_to_queen(self):
+        session = make_session({'b7': 'P', 'e1': 'K', 'h8': 'k'})
+        session.act(['b7', 'b8'])
+        self.assertEqual(session.board[Location('b8')].get_symbol(), 'Q')
+
+    def test_rejected_promotion_is_left_unset(self):
+        session = make_session({'a7': 'K', 'b7': 'P', 'h7': 'r', 'h1': 'k'})
+        move = NormalMove(session, Location('b7'), Location('b8'))
+        self.assertRaises(UserActionError, move.execute)
+        self.assertIsNone(move.promotion)
+        self.assertEqual(session.board[Location('b7')].get_symbol(), 'P')
+
+    def test_unpromoted_pawn_is_not_legal(self):
+        session = ChessGameSession.from_fen('4k3/P7/8/8/8/8/8/4K3 w - - 0 1')
+        move = NormalMove(session, Location('a7'), Location('a8'))
+        self.assertFalse(move.is_legal())
+        self.assertEqual(move.validate(), INVALID_PROMOTION)
+        move = NormalMove(session, Location('a7'), Location('a8'),
+                          session.board.create_piece('Q'))
+        self.assertTrue(move.is_legal())
+        session.push(move)
+        self.assertEqual(session.board[Location('a8')].get_symbol(), 'Q')
+        self.assertEqual(move_labels(session), ['e8 d7', 'e8 e7', 'e8 f7'])
+
+    def test_chosen_promotion(self):
+        session = make_session({'b2': 'p', 'e1': 'K', 'h8': 'k'},
+                               is_white_turn=False)
+        session.act(['b2', 'b1', 'n'])
+        self.assertEqual(session.board[Location('b1')].get_symbol(), 'n')
+
+    def test_invalid_promotion_labels(self):
+        session = make_session({'e7': 'P', 'a1': 'K', 'h1': 'k'})
+        for label in ['qr', '', 'rb', 'qrbn', 'k', 'x']:
+            self.assertRaises(UserActionError, session.act,
+                              ['e7', 'e8', label])
+        self.assertEqual(session.board[Location('e7')].get_symbol(), 'P')
+        self.assertTrue(session.is_white_turn)
+
+    def test_capturing_a_rook_disables_castling(self):
+        session = make_session({'e1': 'K', 'h1': 'R', 'e8': 'k', 'h8': 'r'},
+                               castling=True)
+        session.act(['h1', 'h8'])
+        self.assertFalse(session.players[False].kingside_castling_enabled)
+
+    def test_every_generated_move_can_be_executed(self):
+        session = ChessGameSession()
+        session.setup()
+        for move_spec in [['e2', 'e4'], ['d7', 'd5'], ['e4', 'd5'],
+                          ['d8', 'd5'], ['b1', 'c3']]:
+            session.act(move_spec)
+        for move in list(session.generate_legal_moves()):
+            probe = ChessGameSession()
+            probe.setup()
+            for move_spec in [['e2', 'e4'], ['d7', 'd5'], ['e4', 'd5'],
+                              ['d8', 'd5'], ['b1', 'c3']]:
+                probe.act(move_spec)
+            probe.act(str(move).split())
+
+
+class TestMoveValidation(unittest.TestCase):
+
+    def test_validate_agrees_with_generate_legal_moves(self):
+        for _, fen, _ in REFERENCE_POSITIONS:
+            session = ChessGameSession.from_fen(fen)
+            legal = set(move.get_code()
+                        for move in session.generate_legal_moves())
+            queen = session.board.create_piece(
+                'Q' if session.is_white_turn else 'q')
+            for src_index in range(64):
+                src = Location.from_index(src_index)
+                for dst_index in range(64):
+                    dst = Location.from_index(dst_index)
+                    move = NormalMove(session, src, dst)
+                    if move.piece is not None and move.piece.symbol in 'Kk':
+                        # castlings are done with CastlingMove
+                        if abs(dst_index - src_index) == 2:
+                            continue
+                    if (move.piece is not None and
+                            move.piece.symbol in 'Pp' and dst.y in (0, 7)):
+                        # a pawn reaching the last row must be promoted
+                        self.assertFalse(move.is_legal(), (fen, str(move)))
+                        move = NormalMove(session, src, dst, queen)
+                    self.assertEqual(move.is_legal(),
+                                     move.get_code() in legal,
+                                     (fen, str(move)))
+            for move_class in (KingsideCastlingMove, QueensideCastlingMove):
+                move = move_class(session)
+                self.assertEqual(move.is_legal(),
+                                 move.get_code() in legal, (fen, str(move)))
+
+    def test_reason_codes(self):
+        session = make_session({'e1': 'K', 'e2': 'R', 'e8': 'r', 'a8': 'k',
+                                'b2': 'P', 'c3': 'n'})
+        cases = [
+            ('d4', 'd5', NO_PIECE),
+            ('a8', 'a7', NOT_OWN_PIECE),
+            ('e2', 'e2', SAME_LOCATION),
+            ('e2', 'd3', INVALID_ROUTE),
+            ('b2', 'b4', LEGAL),
+            ('e1', 'e3', INVALID_ROUTE),
+            ('b2', 'a3', INVALID_EN_PASSANT),
+            ('e2', 'e1', OWN_PIECE_ATTACKED),
+            ('e2', 'd2', KING_LEFT_IN_CHECK),
+            ('b2', 'c3', LEGAL),
+        ]
+        for src_label, dst_label, reason in cases:
+            move = NormalMove(session, Location(src_label), Location(dst_label))
+            self.assertEqual(move.validate(), reason, (src_label, dst_label))
+        session.board[Location('b3')] = session.board.create_piece('p')
+        move = NormalMove(session, Location('b2'), Location('b4'))
+        self.assertEqual(move.validate(), PATH_BLOCKED)
+        move = NormalMove(session, Location('b2'), Location('b3'))
+        self.assertEqual(move.validate(), ATTACK_FORBIDDEN)
+        self.assertEqual(KingsideCastlingMove(session).validate(),
+                         CASTLING_IMPOSSIBLE)
+
+    def test_execute_raises_with_the_reason_message(self):
+        session = make_session({'e1': 'K', 'e2': 'R', 'e8': 'r', 'a8': 'k'})
+        with self.assertRaises(UserActionError) as cm:
+            session.act(['e2', 'd2'])
+        self.assertEqual(
+            cm.exception.msg,
+            VALIDATION_MESSAGES[KING_LEFT_IN_CHECK])
+        with self.assertRaises(UserActionError) as cm:
+            session.act(['0-0'])
+        self.assertEqual(cm.exception.msg, KingsideCastlingMove.move_error_msg)
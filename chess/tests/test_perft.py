@@ -0,0 +1,36 @@
+import unittest
+
+from unittest_expander import (
+    expand,
+    foreach,
+)
+
+from chess.perft import (
+    REFERENCE_POSITIONS,
+    divide,
+    perft,
+)
+from chess.session import ChessGameSession
+
+
+@expand
+class TestPerft(unittest.TestCase):
+
+    max_nodes = 10000
+
+    @foreach(REFERENCE_POSITIONS)
+    def test_reference_position(self, name, fen, expected_counts):
+        session = ChessGameSession.from_fen(fen)
+        for depth, expected in enumerate(expected_counts, 1):
+            if expected > self.max_nodes:
+                break
+            self.assertEqual(perft(session, depth), expected,
+                             '{} at depth {}'.format(name, depth))
+
+    @foreach(REFERENCE_POSITIONS)
+    def test_divide_sums_up_to_perft(self, name, fen, expected_counts):
+        session = ChessGameSession.from_fen(fen)
+        results = divide(session, 2)
+        self.assertEqual(len(results), expected_counts[0])
+        self.assertEqual(sum(nodes for _, nodes in results),
+                         expected_counts[1])
@@ -0,0 +1,119 @@
+import StringIO
+import unittest
+
+from chess.exceptions import PgnError
+from chess.pgn import (
+    find_move,
+    iter_games,
+    iter_positions,
+)
+from chess.session import ChessGameSession
+from chess.tests.test_movegen import make_session
+
+
+OPERA_GAME = '''[Event "Paris"]
+[Site "Paris FRA"]
+[Date "1858.??.??"]
+[White "Paul Morphy"]
+[Black "Duke Karl / Count Isouard"]
+[Result "1-0"]
+
+1. e4 e5 2. Nf3 d6 3. d4 Bg4 {This is a weak move
+[already].} 4. dxe5 Bxf3 5. Qxf3 dxe5 6. Bc4 Nf6 7. Qb3 Qe7
+8. Nc3 (8. Qxb7 Qb4+ 9. Qxb4 Bxb4+) 8... c6 9. Bg5 b5 10. Nxb5 cxb5
+11. Bxb5+ Nbd7 12. O-O-O Rd8 13. Rxd7 Rxd7 14. Rd1 Qe6 15. Bxd7+ Nxd7
+16. Qb8+ Nxb8 17. Rd8# 1-0
+'''
+
+SHORT_GAME = '''[Event "Short"]
+[SetUp "1"]
+[FEN "4k3/1P6/8/8/8/8/8/4K3 w - - 0 1"]
+[Result "*"]
+
+1. b8=N Kf7 2. Kd2 $1 ; a comment
+*
+'''
+
+
+class TestIterGames(unittest.TestCase):
+
+    def test_games_are_split_and_parsed(self):
+        stream = StringIO.StringIO(OPERA_GAME + '\n' + SHORT_GAME)
+        games = list(iter_games(stream, chunk_size=7))
+        self.assertEqual(len(games), 2)
+        opera, short = games
+        self.assertEqual(opera.headers['White'], 'Paul Morphy')
+        self.assertEqual(len(opera.sans), 33)
+        self.assertEqual(opera.sans[:4], ['e4', 'e5', 'Nf3', 'd6'])
+        self.assertNotIn('Qxb7', opera.sans)
+        self.assertEqual(opera.result, '1-0')
+        self.assertEqual(short.sans, ['b8=N', 'Kf7', 'Kd2'])
+        self.assertEqual(short.result, '*')
+
+    def test_bad_tag_pair(self):
+        stream = StringIO.StringIO('[Event Paris]\n\n1. e4 *\n')
+        self.assertRaises(PgnError, list, iter_games(stream))
+
+    def test_bad_game_is_skipped_with_on_error(self):
+        bad_game = ('[Event "b" broken\n[Site "x"]\n\n'
+                    '1. e4 {a comment\n[not a tag]} e5 *\n')
+        stream = StringIO.StringIO(
+            OPERA_GAME + '\n' + bad_game + '\n' + SHORT_GAME)
+        errors = []
+        games = list(iter_games(stream, chunk_size=7, on_error=errors.append))
+        self.assertEqual([game.headers['Event'] for game in games],
+                         ['Paris', 'Short'])
+        self.assertEqual(len(errors), 1)
+        self.assertIsInstance(errors[0], PgnError)
+        self.assertIn('line 14', errors[0].msg)
+
+    def test_utf8_bom_is_skipped(self):
+        stream = StringIO.StringIO('\xef\xbb\xbf' + SHORT_GAME)
+        games = list(iter_games(stream))
+        self.assertEqual(games[0].headers['Event'], 'Short')
+        self.assertEqual(games[0].sans, ['b8=N', 'Kf7', 'Kd2'])
+
+
+class TestIterPositions(unittest.TestCase):
+
+    def replay(self, pgn):
+        game = next(iter_games(StringIO.StringIO(pgn)))
+        for session, move in iter_positions(game):
+            pass
+        return session
+
+    def test_opera_game(self):
+        session = self.replay(OPERA_GAME)
+        self.assertEqual(
+            session.to_fen(),
+            '1n1Rkb1r/p4ppp/4q3/4p1B1/4P3/8/PPP2PPP/2K5 b k - 1 17')
+        self.assertTrue(session.is_check())
+
+    def test_game_from_fen(self):
+        session = self.replay(SHORT_GAME)
+        self.assertEqual(session.to_fen(), '1N6/5k2/8/8/8/8/3K4/8 b - - 2 2')
+
+
+class TestFindMove(unittest.TestCase):
+
+    def test_disambiguation(self):
+        session = make_session({'a1': 'R', 'h1': 'R', 'e2': 'K', 'e8': 'k',
+                                'b6': 'N', 'b2': 'N'})
+        self.assertEqual(str(find_move(session, 'Rad1')), 'a1 d1')
+        self.assertEqual(str(find_move(session, 'Rhd1')), 'h1 d1')
+        self.assertEqual(str(find_move(session, 'N6d5')), 'b6 d5')
+        self.assertRaises(PgnError, find_move, session, 'Rd1')
+        self.assertRaises(PgnError, find_move, session, 'Nd4')
+
+    def test_en_passant_and_castling(self):
+        session = ChessGameSession.from_fen(
+            'r3k2r/8/8/3pP3/8/8/8/R3K2R w KQkq d6 0 1')
+        self.assertEqual(str(find_move(session, 'exd6')), 'e5 d6')
+        self.assertEqual(str(find_move(session, 'O-O')), '0-0')
+        self.assertEqual(str(find_move(session, '0-0-0+')), '0-0-0')
+
+    def test_bad_moves(self):
+        session = ChessGameSession.from_fen(
+            'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1')
+        for san in ['e5', 'Ke2', 'O-O', 'Zz9', 'e4=Q']:
+            self.assertRaises(PgnError, find_move, session, san)
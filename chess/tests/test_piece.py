@@ -116,11 +116,11 @@ class PieceTestCase(unittest.TestCase):
         white_first_move = Move(src=Location("b2"), dst=Location("b4"))
         black_first_move = Move(src=Location("g7"), dst=Location("g5"))
 
-        self.assertTrue(white_pawn._first_move(white_first_move))
-        self.assertFalse(white_pawn._first_move(black_first_move))
+        self.assertTrue(white_pawn._first_move(white_first_move.src))
+        self.assertFalse(white_pawn._first_move(black_first_move.src))
 
-        self.assertTrue(black_pawn._first_move(black_first_move))
-        self.assertFalse(black_pawn._first_move(white_first_move))
+        self.assertTrue(black_pawn._first_move(black_first_move.src))
+        self.assertFalse(black_pawn._first_move(white_first_move.src))
 
     def test_pawn_move(self):
         white_pawn = self.piece_factory.create('P')
@@ -353,4 +353,115 @@ class PieceTestCase(unittest.TestCase):
         self.assertItemsEqual(attacked_locations, valid_attacked_locations)
 
     def test_queen_attacked_locations(self):
-        pass
\ No newline at end of file
+        queen = self.piece_factory.create('Q')
+
+        attacked_locations = queen.get_attacked_locations(Location('b2'))
+        valid_attacked_locations = [
+            Location('a1'),
+            Location('c3'),
+            Location('d4'),
+            Location('e5'),
+            Location('f6'),
+            Location('g7'),
+            Location('h8'),
+            Location('a3'),
+            Location('c1'),
+            Location('b1'),
+            Location('b3'),
+            Location('b4'),
+            Location('b5'),
+            Location('b6'),
+            Location('b7'),
+            Location('b8'),
+            Location('a2'),
+            Location('c2'),
+            Location('d2'),
+            Location('e2'),
+            Location('f2'),
+            Location('g2'),
+            Location('h2'),
+        ]
+        self.assertItemsEqual(attacked_locations, valid_attacked_locations)
+
+    def test_knight_attacked_locations(self):
+        knight = self.piece_factory.create('n')
+
+        attacked_locations = knight.get_attacked_locations(Location('a1'))
+        valid_attacked_locations = [
+            Location('b3'),
+            Location('c2'),
+        ]
+        self.assertItemsEqual(attacked_locations, valid_attacked_locations)
+
+        attacked_locations = knight.get_attacked_locations(Location('e4'))
+        valid_attacked_locations = [
+            Location('d6'),
+            Location('f6'),
+            Location('g5'),
+            Location('g3'),
+            Location('f2'),
+            Location('d2'),
+            Location('c3'),
+            Location('c5'),
+        ]
+        self.assertItemsEqual(attacked_locations, valid_attacked_locations)
+
+    def test_king_attacked_locations(self):
+        king = self.piece_factory.create('K')
+
+        attacked_locations = king.get_attacked_locations(Location('h8'))
+        valid_attacked_locations = [
+            Location('g8'),
+            Location('g7'),
+            Location('h7'),
+        ]
+        self.assertItemsEqual(attacked_locations, valid_attacked_locations)
+
+    def test_pawn_attacked_locations(self):
+        white_pawn = self.piece_factory.create('P')
+        black_pawn = self.piece_factory.create('p')
+
+        self.assertItemsEqual(
+            white_pawn.get_attacked_locations(Location('e4')),
+            [Location('d5'), Location('f5')])
+        self.assertItemsEqual(
+            black_pawn.get_attacked_locations(Location('e4')),
+            [Location('d3'), Location('f3')])
+        self.assertItemsEqual(
+            white_pawn.get_attacked_locations(Location('a2')),
+            [Location('b3')])
+
+    def test_sliding_attack_mask_with_blockers(self):
+        rook = self.piece_factory.create('R')
+        occupied = sum(1 << Location(label).index
+                       for label in ['a4', 'c1', 'h8'])
+
+        attack_mask = rook.get_attack_mask(Location('a1'), occupied)
+        valid_attacked_locations = [
+            Location('a2'),
+            Location('a3'),
+            Location('a4'),
+            Location('b1'),
+            Location('c1'),
+        ]
+        self.assertEqual(
+            attack_mask,
+            sum(1 << loc.index for loc in valid_attacked_locations))
+
+    def test_routes_are_precomputed(self):
+        queen = self.piece_factory.create('Q')
+        move = Move(src=Location('b1'), dst=Location('e4'))
+        route = queen.get_route(move)
+        self.assertIs(queen.get_route(move), route)
+        self.assertIs(
+            PieceFactory().create('Q').get_route(move), route)
+        self.assertEqual([loc.loc_label for loc in route.path], ['c2', 'd3'])
+        self.assertEqual(route.path_mask,
+                         sum(1 << loc.index for loc in route.path))
+
+    def test_pawn_route_path_mask(self):
+        black_pawn = self.piece_factory.create('p')
+        route = black_pawn.get_route(
+            Move(src=Location('d7'), dst=Location('d5')))
+        self.assertTrue(route.attack_forbidden)
+        self.assertEqual(route.path_mask, 1 << Location('d6').index)
@@ -0,0 +1,89 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from chess.archive import (
+    ArchiveReader,
+    ArchiveWriter,
+)
+from chess.position_index import (
+    PositionIndex,
+    build_from_archive,
+    main,
+)
+from chess.session import (
+    INITIAL_FEN,
+    ChessGameSession,
+)
+
+
+class TestPositionIndex(unittest.TestCase):
+
+    games = [
+        [['e2', 'e4'], ['e7', 'e5'], ['g1', 'f3'], ['b8', 'c6']],
+        [['g1', 'f3'], ['b8', 'c6'], ['e2', 'e4'], ['e7', 'e5']],
+        [['d2', 'd4'], ['d7', 'd5']],
+    ]
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.archive_path = os.path.join(self.tmp_dir, 'games.cma')
+        self.index_path = os.path.join(self.tmp_dir, 'games.idx')
+        with ArchiveWriter(self.archive_path) as writer:
+            for move_specs in self.games:
+                writer.add_game(self.play(move_specs))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def play(self, move_specs):
+        session = ChessGameSession.from_fen(INITIAL_FEN)
+        for move_spec in move_specs:
+            session.act(move_spec)
+        return session
+
+    def test_build_and_find(self):
+        with ArchiveReader(self.archive_path) as reader:
+            with PositionIndex(self.index_path) as index:
+                self.assertEqual(build_from_archive(index, reader), 13)
+        with PositionIndex(self.index_path) as index:
+            initial_key = ChessGameSession.from_fen(INITIAL_FEN).zobrist_key
+            self.assertEqual(index.find_games(initial_key),
+                             [(0, 0), (1, 0), (2, 0)])
+            # reached by transposition
+            key = self.play(self.games[0]).zobrist_key
+            self.assertEqual(index.find_games(key), [(0, 4), (1, 4)])
+            key = self.play(self.games[2]).zobrist_key
+            self.assertEqual(index.find_games(key), [(2, 2)])
+            key = self.play([['a2', 'a3']]).zobrist_key
+            self.assertEqual(index.find_games(key), [])
+
+    def test_rebuild_replaces_the_positions(self):
+        for _ in range(2):
+            with ArchiveReader(self.archive_path) as reader:
+                with PositionIndex(self.index_path) as index:
+                    self.assertEqual(build_from_archive(index, reader), 13)
+        with PositionIndex(self.index_path) as index:
+            key = self.play(self.games[2]).zobrist_key
+            self.assertEqual(index.find_games(key), [(2, 2)])
+            index.add_game(7, [1])
+            index.clear()
+            index.commit()
+            self.assertEqual(index.find_games(key), [])
+            self.assertEqual(index.find_games(1), [])
+
+    def test_bench_on_empty_archive(self):
+        empty_archive_path = os.path.join(self.tmp_dir, 'empty.cma')
+        ArchiveWriter(empty_archive_path).close()
+        self.assertEqual(
+            main(['bench', self.index_path, empty_archive_path]), 1)
+
+    def test_keys_with_the_sign_bit(self):
+        big_key = (1 << 64) - 1
+        with PositionIndex(self.index_path) as index:
+            index.add_game(7, [big_key, 1 << 63, 1])
+            index.commit()
+            self.assertEqual(index.find_games(big_key), [(7, 0)])
+            self.assertEqual(index.find_games(1 << 63), [(7, 1)])
+            self.assertEqual(index.find_games(1), [(7, 2)])
@@ -0,0 +1,155 @@
+import unittest
+
+from unittest_expander import (
+    expand,
+    foreach,
+)
+
+from chess.board_loc import Location
+from chess.exceptions import UserActionError
+from chess.resolver import (
+    QueensPuzzleResolver,
+    QueensPuzzleSolver,
+    iter_solutions_parallel,
+    solve_parallel,
+)
+from chess.session import QueensPuzzleSession
+
+
+# numbers of solutions for boards of size 1, 2, 3...
+SOLUTION_COUNTS = [1, 0, 0, 2, 10, 4, 40, 92, 352, 724]
+
+
+def is_solution(solution):
+    size = len(solution)
+    return (sorted(solution) == range(size) and
+            len({x + y for y, x in enumerate(solution)}) == size and
+            len({x - y for y, x in enumerate(solution)}) == size)
+
+
+@expand
+class TestQueensPuzzleSolver(unittest.TestCase):
+
+    @foreach(list(enumerate(SOLUTION_COUNTS, 1)))
+    def test_count_solutions(self, size, expected_count):
+        solver = QueensPuzzleSolver(size)
+        self.assertEqual(solver.count_solutions(), expected_count)
+
+    @foreach(list(enumerate(SOLUTION_COUNTS[:8], 1)))
+    def test_iter_solutions(self, size, expected_count):
+        solver = QueensPuzzleSolver(size)
+        solutions = list(solver.iter_solutions())
+        self.assertEqual(len(solutions), expected_count)
+        self.assertEqual(len(set(solutions)), expected_count)
+        self.assertTrue(all(is_solution(solution) for solution in solutions))
+
+    def test_find_solution(self):
+        solver = QueensPuzzleSolver(12)
+        self.assertTrue(is_solution(solver.find_solution()))
+        self.assertIsNone(QueensPuzzleSolver(3).find_solution())
+
+    def test_find_solution_extending_placement(self):
+        solver = QueensPuzzleSolver()
+        solution = solver.find_solution([(3, 5), (0, 7)])
+        self.assertTrue(is_solution(solution))
+        self.assertEqual(solution[5], 3)
+        self.assertEqual(solution[7], 0)
+        self.assertIsNone(solver.find_solution([(0, 0), (2, 1)]))
+        self.assertIsNone(solver.find_solution([(0, 0), (4, 0)]))
+
+
+class TestQueensPuzzleResolver(unittest.TestCase):
+
+    def setUp(self):
+        self.resolver = QueensPuzzleResolver()
+
+    def test_reserve_and_release(self):
+        d5 = Location('d5')
+        self.assertEqual(self.resolver.count_usable_fields(), 64)
+        self.resolver.reserve_field(d5)
+        for loc_label in ['d5', 'd1', 'a5', 'h5', 'a8', 'g8', 'a2', 'h1']:
+            self.assertFalse(self.resolver.is_usable_field(Location(loc_label)))
+        for loc_label in ['c3', 'e7', 'b4', 'h2']:
+            self.assertTrue(self.resolver.is_usable_field(Location(loc_label)))
+        self.assertEqual(self.resolver.count_usable_fields(), 64 - 28)
+        self.resolver.release_field(d5)
+        self.assertEqual(self.resolver.count_usable_fields(), 64)
+        self.assertIsNone(self.resolver.get_last_reserved_field())
+
+    def test_iter_usable_fields(self):
+        for loc_label in ['a8', 'c7', 'e6']:
+            self.resolver.reserve_field(Location(loc_label))
+        usable = list(self.resolver.iter_usable_fields())
+        self.assertEqual(len(usable), self.resolver.count_usable_fields())
+        self.assertTrue(all(self.resolver.is_usable_field(loc) for loc in usable))
+        self.assertIn(Location('b4'), usable)
+        self.assertNotIn(Location('c5'), usable)
+
+    def test_is_solvable(self):
+        self.resolver.reserve_field(Location('a8'))
+        self.assertTrue(self.resolver.is_solvable())
+        self.resolver.reserve_field(Location('c7'))
+        self.assertFalse(self.resolver.is_solvable())
+        self.resolver.release_field(Location('c7'))
+        self.assertTrue(self.resolver.is_solvable())
+
+
+class TestQueensPuzzleSessionHint(unittest.TestCase):
+
+    def test_following_hints_solves_the_puzzle(self):
+        session = QueensPuzzleSession()
+        session.act('d5')
+        completed = False
+        while not completed:
+            hint = session.get_hint()
+            self.assertIsNotNone(hint)
+            completed = session.act(hint.loc_label)
+
+    def test_no_hint_when_unsolvable(self):
+        session = QueensPuzzleSession()
+        session.act('a8')
+        self.assertIsNotNone(session.get_hint())
+        session.act('c7')
+        self.assertIsNone(session.get_hint())
+
+
+@expand
+class TestParallelSolving(unittest.TestCase):
+
+    @foreach([1, 4, 5, 8])
+    def test_solve_parallel(self, size):
+        self.assertEqual(solve_parallel(size, workers=2),
+                         SOLUTION_COUNTS[size - 1])
+
+    def test_iter_solutions_parallel(self):
+        solutions = list(iter_solutions_parallel(8, workers=2))
+        self.assertItemsEqual(solutions,
+                              list(QueensPuzzleSolver(8).iter_solutions()))
+
+    @foreach([6, 7, 9])
+    def test_prefix_tasks_cover_all_solutions(self, size):
+        solver = QueensPuzzleSolver(size)
+        count = sum(weight * solver.count_from_prefix(prefix)
+                    for prefix, weight in solver.iter_prefixes(3))
+        self.assertEqual(count, SOLUTION_COUNTS[size - 1])
+
+
+class TestQueensPuzzleSessionUndo(unittest.TestCase):
+
+    def test_undo_and_remove(self):
+        session = QueensPuzzleSession()
+        session.act('a8')
+        session.act('c7')
+        self.assertFalse(session.is_solvable())
+        session.undo()
+        self.assertIsNone(session.board[Location('c7')])
+        self.assertTrue(session.is_solvable())
+        session.act('d7')
+        session.remove_queen('a8')
+        self.assertIsNone(session.board[Location('a8')])
+        session.act('a8')
+        self.assertRaises(UserActionError, session.remove_queen, 'b8')
+        session.undo()
+        session.undo()
+        self.assertRaises(UserActionError, session.undo)
+        self.assertEqual(session.count_usable_fields(), 64)
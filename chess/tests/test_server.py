@@ -0,0 +1,145 @@
+import asyncore
+import threading
+import unittest
+
+from chess.server import (
+    MAX_LOAD_MOVES,
+    SessionHost,
+    SessionServer,
+    main,
+    run_load,
+)
+
+
+class TestSessionHost(unittest.TestCase):
+
+    def setUp(self):
+        self.host = SessionHost()
+
+    def test_chess_session(self):
+        response = self.host.handle_request({'op': 'new', 'id': 'a'})
+        self.assertEqual(response, {'ok': True, 'session': 1, 'id': 'a'})
+        self.assertEqual(
+            self.host.handle_request(
+                {'op': 'act', 'session': 1, 'action': u'e2 e4'}),
+            {'ok': True, 'completed': False})
+        response = self.host.handle_request({'op': 'state', 'session': 1})
+        self.assertEqual(
+            response['fen'],
+            'rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b KQkq e3 0 1')
+        response = self.host.handle_request(
+            {'op': 'act', 'session': 1, 'action': 'e7 e4'})
+        self.assertFalse(response['ok'])
+        self.assertIn('error', response)
+        self.assertEqual(self.host.handle_request({'op': 'close', 'session': 1}),
+                         {'ok': True})
+        self.assertEqual(self.host.sessions, {})
+
+    def test_finished_game_is_closed(self):
+        session_id = self.host.handle_request({'op': 'new'})['session']
+        for action in ['f2 f3', 'e7 e5', 'g2 g4']:
+            self.host.handle_request(
+                {'op': 'act', 'session': session_id, 'action': action})
+        self.assertEqual(
+            self.host.handle_request(
+                {'op': 'act', 'session': session_id, 'action': 'd8 h4'}),
+            {'ok': True, 'completed': True, 'outcome': 'checkmate'})
+        self.assertEqual(self.host.sessions, {})
+
+    def test_queens_session(self):
+        session_id = self.host.handle_request(
+            {'op': 'new', 'kind': 'queens'})['session']
+        self.assertTrue(self.host.handle_request(
+            {'op': 'act', 'session': session_id, 'action': 'a1'})['ok'])
+        self.assertFalse(self.host.handle_request(
+            {'op': 'act', 'session': session_id, 'action': 'b2'})['ok'])
+        response = self.host.handle_request(
+            {'op': 'state', 'session': session_id})
+        self.assertEqual(response['placement'], '8/8/8/8/8/8/8/Q7')
+
+    def test_bad_requests(self):
+        for request in [[], {}, {'op': 'fly'},
+                        {'op': 'new', 'kind': 'go'},
+                        {'op': 'act', 'session': 7, 'action': 'e2 e4'},
+                        {'op': 'state', 'session': [1]},
+                        {'op': 'close'}]:
+            response = self.host.handle_request(request)
+            self.assertFalse(response['ok'], request)
+        session_id = self.host.handle_request({'op': 'new'})['session']
+        for action in [None, 42, u'e2 \u20ac4', 'e2 e4 e5 e6']:
+            response = self.host.handle_request(
+                {'op': 'act', 'session': session_id, 'action': action})
+            self.assertFalse(response['ok'], action)
+
+    def test_fields_of_wrong_types(self):
+        session_id = self.host.handle_request({'op': 'new'})['session']
+        for request in [{'op': []}, {'op': {}}, {'op': 1},
+                        {'op': 'new', 'kind': []},
+                        {'op': 'new', 'kind': {'a': 1}},
+                        {'op': 'state', 'session': True},
+                        {'op': 'state', 'session': float(session_id)},
+                        {'op': 'state', 'session': str(session_id)},
+                        {'op': 'close', 'session': {}},
+                        {'op': 'act', 'session': [], 'action': 'e2 e4'},
+                        {'op': 'act', 'session': session_id,
+                         'action': ['e2', 'e4']}]:
+            response = self.host.handle_request(request)
+            self.assertFalse(response['ok'], request)
+            self.assertIn('error', response)
+        self.assertIn(session_id, self.host.sessions)
+
+    def test_unexpected_errors_are_reported(self):
+        session_id = self.host.handle_request({'op': 'new'})['session']
+
+        def act(action):
+            raise ValueError('oops')
+
+        self.host.sessions[session_id].act = act
+        self.assertEqual(
+            self.host.handle_request(
+                {'op': 'act', 'session': session_id, 'action': 'e2 e4',
+                 'id': 3}),
+            {'ok': False, 'error': 'Internal error (ValueError).', 'id': 3})
+
+
+class TestSessionServer(unittest.TestCase):
+
+    def test_load_over_tcp(self):
+        socket_map = {}
+        server = SessionServer(port=0, socket_map=socket_map)
+        thread = threading.Thread(target=asyncore.loop,
+                                  kwargs={'timeout': 0.05, 'map': socket_map})
+        thread.start()
+        try:
+            stats = run_load(server.address, clients=3, sessions=2, moves=8)
+        finally:
+            for channel in socket_map.values():
+                channel.close()
+            thread.join()
+        self.assertEqual(stats['errors'], 0)
+        self.assertEqual(stats['sessions'], 6)
+        self.assertEqual(stats['moves'], 48)
+        self.assertEqual(server.session_host.sessions, {})
+
+    def test_load_with_games_ended_by_repetition(self):
+        socket_map = {}
+        server = SessionServer(port=0, socket_map=socket_map)
+        thread = threading.Thread(target=asyncore.loop,
+                                  kwargs={'timeout': 0.05, 'map': socket_map})
+        thread.start()
+        try:
+            stats = run_load(server.address, clients=2, sessions=2,
+                             moves=MAX_LOAD_MOVES)
+        finally:
+            for channel in socket_map.values():
+                channel.close()
+            thread.join()
+        self.assertEqual(stats['errors'], 0)
+        self.assertEqual(stats['sessions'], 4)
+        # each game ends by the threefold repetition (closed by the server)
+        self.assertEqual(stats['moves'], 4 * MAX_LOAD_MOVES)
+        self.assertEqual(server.session_host.sessions, {})
+
+    def test_too_many_moves_are_refused(self):
+        self.assertRaises(SystemExit, main,
+                          ['load', '--moves', str(MAX_LOAD_MOVES + 1)])
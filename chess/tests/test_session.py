@@ -0,0 +1,347 @@
+import random
+import unittest
+
+from chess.board_loc import Location
+from chess.exceptions import UserActionError
+from chess.session import (
+    CHECKMATE,
+    FIFTY_MOVE_RULE,
+    INITIAL_FEN,
+    INSUFFICIENT_MATERIAL,
+    SNAPSHOT_SIZE,
+    STALEMATE,
+    THREEFOLD_REPETITION,
+    ChessGameSession,
+)
+
+
+def get_state(session):
+    board = session.board
+    return (
+        [tuple(piece and piece.get_symbol() for piece in row)
+         for row in board.iter_rows()],
+        board.occupied,
+        board.get_color_mask(True),
+        board.get_color_mask(False),
+        sorted((symbol, board.get_piece_mask(symbol))
+               for symbol in 'PNBRQKpnbrqk'),
+        sorted((symbol, board.get_piece_count(symbol))
+               for symbol in 'PNBRQKpnbrqk'),
+        session.is_white_turn,
+        session.get_castling_rights(),
+        session.en_passant_target,
+        session.last_move,
+        session.halfmove_clock,
+        session.fullmove_number,
+        session.get_repetition_count(),
+    )
+
+
+class TestPushPop(unittest.TestCase):
+
+    def setUp(self):
+        self.session = ChessGameSession()
+        self.session.setup()
+
+    def test_push_pop_single_move(self):
+        state_before = get_state(self.session)
+        move = next(move for move in self.session.generate_legal_moves()
+                    if str(move) == 'e2 e4')
+        self.session.push(move)
+        self.assertFalse(self.session.is_white_turn)
+        self.assertEqual(self.session.en_passant_target, Location('e3'))
+        self.assertIs(self.session.last_move, move)
+        self.assertIs(self.session.pop(), move)
+        self.assertEqual(get_state(self.session), state_before)
+
+    def test_pop_after_act(self):
+        state_before = get_state(self.session)
+        self.session.act(['g1', 'f3'])
+        self.session.pop()
+        self.assertEqual(get_state(self.session), state_before)
+
+    def test_pop_restores_captures_castlings_and_en_passant(self):
+        for move_spec in [['e2', 'e4'], ['b8', 'c6'], ['g1', 'f3'],
+                          ['b7', 'b6'], ['f1', 'b5'], ['c8', 'b7'],
+                          ['e4', 'e5'], ['d7', 'd5']]:
+            self.session.act(move_spec)
+        states = [get_state(self.session)]
+        for move_spec in [['e5', 'd6'], ['d8', 'd6'], ['0-0'], ['0-0-0'],
+                          ['b5', 'c6'], ['b7', 'c6']]:
+            self.session.act(move_spec)
+            states.append(get_state(self.session))
+        self.assertEqual(self.session.get_castling_rights(), 0)
+        states.pop()
+        while states:
+            self.session.pop()
+            self.assertEqual(get_state(self.session), states.pop())
+
+    def test_random_walk_back_to_the_start(self):
+        rand = random.Random(1234)
+        states = []
+        for _ in range(120):
+            moves = list(self.session.generate_legal_moves())
+            if not moves:
+                break
+            states.append(get_state(self.session))
+            self.session.push(rand.choice(moves))
+        while states:
+            self.session.pop()
+            self.assertEqual(get_state(self.session), states.pop())
+
+
+class TestZobristKey(unittest.TestCase):
+
+    def setUp(self):
+        self.session = ChessGameSession()
+        self.session.setup()
+
+    def get_fresh_key(self):
+        probe = ChessGameSession()
+        for loc_index in range(64):
+            piece = self.session.board[Location.from_index(loc_index)]
+            if piece is not None:
+                probe.board[Location.from_index(loc_index)] = piece
+        probe.is_white_turn = self.session.is_white_turn
+        probe.set_castling_rights(self.session.get_castling_rights())
+        probe.en_passant_target = self.session.en_passant_target
+        probe.reset_zobrist_key()
+        return probe.zobrist_key
+
+    def test_incremental_key_matches_recomputed_key(self):
+        rand = random.Random(4321)
+        keys = []
+        for _ in range(100):
+            moves = list(self.session.generate_legal_moves())
+            if not moves:
+                break
+            keys.append(self.session.zobrist_key)
+            self.session.push(rand.choice(moves))
+            self.assertEqual(self.session.zobrist_key, self.get_fresh_key())
+        while keys:
+            self.session.pop()
+            self.assertEqual(self.session.zobrist_key, keys.pop())
+
+    def test_transposition_has_the_same_key(self):
+        other = ChessGameSession()
+        other.setup()
+        for move_spec in [['g1', 'f3'], ['g8', 'f6'], ['b1', 'c3']]:
+            self.session.act(move_spec)
+        for move_spec in [['b1', 'c3'], ['g8', 'f6'], ['g1', 'f3']]:
+            other.act(move_spec)
+        self.assertEqual(self.session.zobrist_key, other.zobrist_key)
+        self.assertEqual(self.session.board, other.board)
+
+    def test_side_castling_and_en_passant_change_the_key(self):
+        initial_key = self.session.zobrist_key
+        for move_spec in [['g1', 'f3'], ['g8', 'f6'], ['f3', 'g1'], ['f6', 'g8']]:
+            self.session.act(move_spec)
+        self.assertEqual(self.session.zobrist_key, initial_key)
+        self.session.act(['g1', 'f3'])
+        key_black_to_move = self.session.zobrist_key
+        self.session.act(['g8', 'f6'])
+        self.session.act(['h1', 'g1'])
+        self.session.act(['f6', 'g8'])
+        self.session.act(['g1', 'h1'])
+        # same pieces and side as after 1. Nf3, but no white kingside castling
+        self.assertNotEqual(self.session.zobrist_key, key_black_to_move)
+
+
+class TestFen(unittest.TestCase):
+
+    fens = [
+        INITIAL_FEN,
+        'r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1',
+        '8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1',
+        'rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8',
+        'rnbqkbnr/ppp1pppp/8/3pP3/8/8/PPPP1PPP/RNBQKBNR w Kq d6 0 3',
+    ]
+
+    def test_round_trip(self):
+        for fen in self.fens:
+            self.assertEqual(ChessGameSession.from_fen(fen).to_fen(), fen)
+
+    def test_from_fen_matches_setup(self):
+        session = ChessGameSession()
+        session.setup()
+        loaded = ChessGameSession.from_fen(INITIAL_FEN)
+        self.assertEqual(get_state(loaded), get_state(session))
+        self.assertEqual(loaded.zobrist_key, session.zobrist_key)
+        self.assertEqual(session.to_fen(), INITIAL_FEN)
+
+    def test_start_fen_is_recorded(self):
+        self.assertIsNone(ChessGameSession().start_fen)
+        session = ChessGameSession()
+        session.setup()
+        self.assertEqual(session.start_fen, INITIAL_FEN)
+        session = ChessGameSession.from_fen('4k3/8/8/8/8/8/4P3/4K3 w - -')
+        session.act(['e2', 'e4'])
+        self.assertEqual(session.start_fen, '4k3/8/8/8/8/8/4P3/4K3 w - - 0 1')
+        restored = ChessGameSession.restore(session.snapshot())
+        self.assertEqual(restored.start_fen, session.to_fen())
+
+    def test_clocks_follow_the_moves(self):
+        session = ChessGameSession.from_fen(INITIAL_FEN)
+        for move_spec in [['e2', 'e4'], ['g8', 'f6'], ['g1', 'f3'],
+                          ['f6', 'e4']]:
+            session.act(move_spec)
+        self.assertEqual(
+            session.to_fen(),
+            'rnbqkb1r/pppppppp/8/8/4n3/5N2/PPPP1PPP/RNBQKB1R w KQkq - 0 3')
+        session.pop()
+        self.assertEqual(
+            session.to_fen(),
+            'rnbqkb1r/pppppppp/5n2/8/4P3/5N2/PPPP1PPP/RNBQKB1R b KQkq - 2 2')
+
+    def test_short_fen_and_incremental_key(self):
+        session = ChessGameSession.from_fen('4k3/8/8/8/8/8/4P3/4K3 w - -')
+        self.assertEqual(session.to_fen(), '4k3/8/8/8/8/8/4P3/4K3 w - - 0 1')
+        session.act(['e2', 'e4'])
+        self.assertEqual(session.zobrist_key, ChessGameSession.from_fen(
+            session.to_fen()).zobrist_key)
+
+    def test_invalid_fens(self):
+        for fen in ['', 'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP w KQkq -',
+                    'rnbqkbnr/pppppppp/9/8/8/8/PPPPPPPP/RNBQKBNR w KQkq -',
+                    'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNX w KQkq -',
+                    INITIAL_FEN.replace(' w ', ' x '),
+                    INITIAL_FEN.replace('KQkq', 'KQxq'),
+                    INITIAL_FEN.replace(' 0 1', ' 0 one')]:
+            self.assertRaises(UserActionError, ChessGameSession.from_fen, fen)
+
+    def test_pawns_on_back_rows_are_rejected(self):
+        for fen in ['P3k3/8/8/8/8/8/8/4K3 w - - 0 1',
+                    '4k3/8/8/8/8/8/8/p3K3 b - - 0 1']:
+            self.assertRaises(UserActionError, ChessGameSession.from_fen, fen)
+
+    def test_bad_en_passant_targets_are_rejected(self):
+        for fen in [
+                # not on row 6 (white to move)
+                'rnbqkbnr/ppp1pppp/8/3pP3/8/8/PPPP1PPP/RNBQKBNR w KQkq d5 0 3',
+                'rnbqkbnr/pppp1ppp/8/8/4p3/8/PPPPPPPP/RNBQKBNR w KQkq e4 0 1',
+                # on row 3, but white is to move
+                'rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR w KQkq e3 0 1',
+                # no pawn in front of the target
+                'rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b KQkq d3 0 1']:
+            self.assertRaises(UserActionError, ChessGameSession.from_fen, fen)
+
+    def test_bad_move_counters_are_rejected(self):
+        for counters in ['-1 1', '0 0', '0 -3', '70000 1']:
+            fen = INITIAL_FEN.replace(' 0 1', ' ' + counters)
+            self.assertRaises(UserActionError, ChessGameSession.from_fen, fen)
+
+
+class TestSnapshot(unittest.TestCase):
+
+    def test_round_trip(self):
+        for fen in TestFen.fens[:4] + [
+                'rnbqkbnr/ppp1pppp/8/3pP3/8/8/PPPP1PPP/RNBQKBNR w Kq d6 0 3',
+                '8/8/8/8/4Pp2/8/8/k6K b - e3 0 61']:
+            session = ChessGameSession.from_fen(fen)
+            data = session.snapshot()
+            self.assertEqual(len(data), SNAPSHOT_SIZE)
+            restored = ChessGameSession.restore(data)
+            self.assertEqual(restored.to_fen(), fen)
+            self.assertEqual(restored.zobrist_key, session.zobrist_key)
+            self.assertEqual(get_state(restored), get_state(session))
+
+    def test_restored_game_goes_on(self):
+        session = ChessGameSession()
+        session.setup()
+        for move_spec in [['e2', 'e4'], ['d7', 'd5'], ['e4', 'e5'],
+                          ['f7', 'f5']]:
+            session.act(move_spec)
+        restored = ChessGameSession.restore(session.snapshot())
+        for probe in (session, restored):
+            probe.act(['e5', 'f6'])
+        self.assertEqual(restored.to_fen(), session.to_fen())
+        self.assertEqual(restored.zobrist_key, session.zobrist_key)
+
+    def test_invalid_snapshots(self):
+        data = ChessGameSession.from_fen(INITIAL_FEN).snapshot()
+        for bad_data in [data[:-1], data + '\0', '\xff' + data[1:],
+                         data[:32] + '\xff' + data[33:]]:
+            self.assertRaises(UserActionError, ChessGameSession.restore,
+                              bad_data)
+
+    def test_impossible_positions_are_rejected(self):
+        session = ChessGameSession.from_fen('4k3/8/8/8/8/8/8/4K3 w - - 0 1')
+        session.board[Location('a8')] = session.board.create_piece('P')
+        self.assertRaises(UserActionError, ChessGameSession.restore,
+                          session.snapshot())
+        for fen, target_label in [
+                # no pawn in front of the target
+                ('4k3/8/8/8/8/8/8/4K3 w - - 0 1', 'd6'),
+                # on a wrong row
+                ('4k3/8/8/3p4/8/8/8/4K3 w - - 0 1', 'd5'),
+                ('4k3/8/8/3p4/8/8/8/4K3 b - - 0 1', 'd6')]:
+            session = ChessGameSession.from_fen(fen)
+            session.en_passant_target = Location(target_label)
+            self.assertRaises(UserActionError, ChessGameSession.restore,
+                              session.snapshot())
+
+
+class TestGameEnd(unittest.TestCase):
+
+    def play(self, session, *move_labels):
+        completed = [session.act(label.split()) for label in move_labels]
+        self.assertFalse(any(completed[:-1]))
+        return completed[-1]
+
+    def test_game_goes_on(self):
+        session = ChessGameSession()
+        session.setup()
+        self.assertFalse(self.play(session, 'e2 e4'))
+        self.assertIsNone(session.get_outcome())
+
+    def test_checkmate(self):
+        session = ChessGameSession()
+        session.setup()
+        self.assertTrue(self.play(session, 'f2 f3', 'e7 e5', 'g2 g4', 'd8 h4'))
+        self.assertEqual(session.get_outcome(), CHECKMATE)
+        self.assertTrue(session.is_white_turn)
+
+    def test_stalemate(self):
+        session = ChessGameSession.from_fen('7k/8/5K2/6Q1/8/8/8/8 w - - 0 1')
+        self.assertTrue(self.play(session, 'g5 g6'))
+        self.assertEqual(session.get_outcome(), STALEMATE)
+
+    def test_threefold_repetition(self):
+        session = ChessGameSession()
+        session.setup()
+        cycle = ['g1 f3', 'g8 f6', 'f3 g1', 'f6 g8']
+        self.assertFalse(self.play(session, *cycle))
+        self.assertEqual(session.get_repetition_count(), 2)
+        self.assertTrue(self.play(session, *cycle))
+        self.assertEqual(session.get_outcome(), THREEFOLD_REPETITION)
+        session.pop()
+        self.assertEqual(session.get_repetition_count(), 2)
+        self.assertIsNone(session.get_outcome())
+
+    def test_fifty_move_rule(self):
+        session = ChessGameSession.from_fen(
+            'r3k3/8/8/8/8/8/8/4K2R w - - 98 80')
+        self.assertFalse(self.play(session, 'h1 h2'))
+        self.assertTrue(self.play(session, 'a8 a7'))
+        self.assertEqual(session.get_outcome(), FIFTY_MOVE_RULE)
+
+    def test_checkmate_wins_over_fifty_move_rule(self):
+        session = ChessGameSession.from_fen('6k1/5ppp/8/8/8/8/8/R5K1 w - - 99 80')
+        self.assertTrue(self.play(session, 'a1 a8'))
+        self.assertEqual(session.get_outcome(), CHECKMATE)
+
+    def test_insufficient_material(self):
+        cases = [
+            ('4k3/8/8/8/8/8/8/4K3 w - - 0 1', True),
+            ('4k3/8/8/8/8/8/8/2N1K3 w - - 0 1', True),
+            ('2b1k3/8/8/8/8/8/8/2B1K3 w - - 0 1', False),
+            ('2b1k3/8/8/8/8/8/8/3BK3 w - - 0 1', True),
+            ('4k3/8/8/8/8/8/8/1NN1K3 w - - 0 1', False),
+            ('4k3/8/8/8/8/8/4p3/4K3 w - - 0 1', False),
+        ]
+        for fen, expected in cases:
+            session = ChessGameSession.from_fen(fen)
+            self.assertEqual(session.is_material_insufficient(), expected, fen)
+        session = ChessGameSession.from_fen('4k3/8/8/8/8/8/3r4/2N1K3 w - - 0 1')
+        self.assertTrue(self.play(session, 'e1 d2'))
+        self.assertEqual(session.get_outcome(), INSUFFICIENT_MATERIAL)
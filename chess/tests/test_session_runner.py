@@ -0,0 +1,64 @@
+import json
+import StringIO
+import unittest
+
+from chess import main
+from chess.session import INITIAL_FEN
+from chess.session_runner import (
+    BatchError,
+    ChessGameBatchRunner,
+)
+from chess.ui import FenRenderer
+
+
+class TestChessGameBatchRunner(unittest.TestCase):
+
+    lines = [
+        'e2 e4', 'e7 e5', 'g1 f3', '',
+        '',
+        'd2 d4', 'e7 e5', 'd4 e6', 'b8 c6', '',
+        'b2 b4\n', 'g7 g5\n', 'c1 b2\n', 'f8 g7\n', 'b2 g7\n',
+    ]
+
+    def test_games_are_replayed_and_errors_collected(self):
+        runner = ChessGameBatchRunner(iter(self.lines))
+        errors = list(runner.iter_errors())
+        self.assertEqual(len(errors), 1)
+        self.assertEqual(errors[0][:3], (2, 3, 'd4 e6'))
+        self.assertEqual(runner.game_count, 3)
+        self.assertEqual(runner.move_count, 3 + 2 + 5)
+        self.assertEqual(runner.session.board.get_fen_placement(),
+                         'rnbqk1nr/ppppppBp/8/6p1/1P6/8/P1PPPPPP/RN1QKBNR')
+
+    def test_run_reports_json_errors_and_a_summary(self):
+        out = StringIO.StringIO()
+        errors = ChessGameBatchRunner(self.lines).run(out)
+        self.assertEqual(len(errors), 1)
+        self.assertIsInstance(errors[0], BatchError)
+        error_line, summary = out.getvalue().splitlines()
+        self.assertEqual(json.loads(error_line), {
+            'game_number': 2,
+            'move_number': 3,
+            'move': 'd4 e6',
+            'message': errors[0].message,
+        })
+        self.assertTrue(summary.startswith('3 games (1 with errors), 10 moves'))
+
+    def test_positions_are_logged_in_batches(self):
+        log = StringIO.StringIO()
+        runner = ChessGameBatchRunner(self.lines, FenRenderer(), log)
+        runner.run(StringIO.StringIO())
+        fens = log.getvalue().splitlines()
+        # each game's start position and the positions after its valid moves
+        self.assertEqual(len(fens), 3 + 10)
+        self.assertEqual(fens[0], INITIAL_FEN)
+        self.assertEqual(fens[4], INITIAL_FEN)
+        self.assertEqual(fens[-1].split()[0],
+                         'rnbqk1nr/ppppppBp/8/6p1/1P6/8/P1PPPPPP/RN1QKBNR')
+
+
+class TestMain(unittest.TestCase):
+
+    def test_log_options_require_batch(self):
+        for argv in [['--log', 'positions.log'], ['--log-format', 'json']]:
+            self.assertRaises(SystemExit, main, argv)
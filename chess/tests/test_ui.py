@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+import json
+import StringIO
+import unittest
+
+from chess.session_runner import (
+    ChessGameSessionRunner,
+    QueensPuzzleSessionRunner,
+)
+from chess.ui import (
+    BufferedSink,
+    Drawer,
+    FenRenderer,
+    JsonRenderer,
+    NullRenderer,
+)
+
+
+class CountingStream(StringIO.StringIO):
+
+    write_count = 0
+
+    def write(self, data):
+        self.write_count += 1
+        StringIO.StringIO.write(self, data)
+
+
+class TestDrawer(unittest.TestCase):
+
+    def setUp(self):
+        self.runner = ChessGameSessionRunner()
+        self.session = self.runner.session
+        self.session.setup()
+        self.out = CountingStream()
+
+    def test_frame_is_written_at_once(self):
+        Drawer(self.runner, self.out).show()
+        self.assertEqual(self.out.write_count, 1)
+        lines = self.out.getvalue().decode('utf-8').split(u'\n')
+        self.assertEqual(len(lines), 24)
+        self.assertEqual(lines[2], u'  | a | b | c | d | e | f | g | h |')
+        self.assertEqual(lines[4], u'8 | ♖ | ♘ | ♗ | ♕ | ♔ | ♗ | ♘ | ♖ | 8')
+        self.assertEqual(lines[16], u'2 | ♟ | ♟ | ♟ | ♟ | ♟ | ♟ | ♟ | ♟ | 2')
+        self.assertEqual(lines[10], u'5 |   |   |   |   |   |   |   |   | 5')
+
+    def test_only_changed_rows_are_rendered(self):
+        drawer = Drawer(self.runner, self.out)
+        drawer.show()
+        self.session.act(['e2', 'e4'])
+        rendered = []
+        renderer = drawer._renderer
+        original = renderer._get_unichr_symbol
+        renderer._get_unichr_symbol = lambda symbol: (
+            rendered.append(symbol) or original(symbol))
+        drawer.show()
+        # rows '4' and '2' only
+        self.assertEqual(len(rendered), 16)
+        frame = self.out.getvalue().decode('utf-8').split(u'\n')[23:]
+        self.assertEqual(frame[12], u'4 |   |   |   |   | ♟ |   |   |   | 4')
+        self.assertEqual(frame[16], u'2 | ♟ | ♟ | ♟ | ♟ |   | ♟ | ♟ | ♟ | 2')
+
+    def test_ansi_mode_redraws_changed_fields(self):
+        drawer = Drawer(self.runner, self.out, ansi=True)
+        drawer.show()
+        first_frame = self.out.getvalue()
+        self.assertTrue(first_frame.startswith('\x1b[2J\x1b[H'))
+        self.assertTrue(first_frame.endswith('\x1b[24;r\x1b[24;1H'))
+        self.session.act(['g1', 'f3'])
+        drawer.show()
+        self.assertEqual(
+            self.out.getvalue()[len(first_frame):].decode('utf-8'),
+            u'\x1b7\x1b[15;25H♞\x1b[19;29H \x1b8')
+        drawer.show()
+        drawer.close()
+        self.assertTrue(self.out.getvalue().endswith('\x1b8\x1b[r'))
+        self.assertEqual(self.out.write_count, 3)
+
+    def test_positions_are_written_in_batches(self):
+        drawer = Drawer(self.runner, self.out, renderer=FenRenderer(),
+                        batch_size=2)
+        drawer.show()
+        self.assertEqual(self.out.write_count, 0)
+        self.session.act(['e2', 'e4'])
+        drawer.show()
+        self.assertEqual(self.out.write_count, 1)
+        self.session.act(['e7', 'e5'])
+        drawer.show()
+        drawer.close()
+        self.assertEqual(self.out.write_count, 2)
+        self.assertEqual(self.out.getvalue().splitlines(), [
+            'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1',
+            'rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b KQkq e3 0 1',
+            'rnbqkbnr/pppp1ppp/8/4p3/4P3/8/PPPP1PPP/RNBQKBNR w KQkq e6 0 2',
+        ])
+
+    def test_null_renderer_writes_nothing(self):
+        drawer = Drawer(self.runner, self.out, renderer=NullRenderer())
+        drawer.show()
+        drawer.close()
+        self.assertEqual(self.out.write_count, 0)
+
+
+class TestRenderers(unittest.TestCase):
+
+    def test_json_renderer(self):
+        runner = ChessGameSessionRunner()
+        runner.session.setup()
+        runner.session.act(['g1', 'f3'])
+        rendered = JsonRenderer().render(runner.session)
+        self.assertTrue(rendered.endswith(u'\n'))
+        self.assertEqual(json.loads(rendered), {
+            'fen': 'rnbqkbnr/pppppppp/8/8/8/5N2/PPPPPPPP/RNBQKB1R b KQkq - 1 1',
+            'move': str(runner.session.last_move),
+        })
+
+    def test_fen_renderer_on_puzzle_session(self):
+        runner = QueensPuzzleSessionRunner()
+        runner.session.setup()
+        runner.session.act('b4')
+        self.assertEqual(FenRenderer().render(runner.session),
+                         u'8/8/8/8/1Q6/8/8/8\n')
+
+
+class TestBufferedSink(unittest.TestCase):
+
+    def test_texts_are_encoded_and_written_at_once(self):
+        out = CountingStream()
+        sink = BufferedSink(out, batch_size=3)
+        sink.write(u'a\n')
+        sink.write(u'\u265e\n')
+        sink.flush()
+        sink.flush()
+        self.assertEqual(out.write_count, 1)
+        self.assertEqual(out.getvalue().decode('utf-8'), u'a\n\u265e\n')
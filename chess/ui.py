@@ -1,5 +1,8 @@
+import json
 import sys
 
+from chess.session import ChessGameSession
+
 
 class UserInputMixin(object):
 
@@ -21,6 +24,138 @@ class UserInputMixin(object):
 
 class Drawer(object):
 
+    """
+    Shows the positions of the runner's session: each one is rendered
+    to text (see Renderer) which is written to a sink (see
+    BufferedSink).  By default, the board is drawn on the standard
+    output, each frame with a single write.
+    """
+
+    def __init__(self, session_runner, out=None, ansi=False,
+                 renderer=None, batch_size=1):
+        """
+        :param out: the stream to write to (default: sys.stdout)
+        :param ansi: whether the default renderer should use the ANSI
+                     mode (see UnicodeBoardRenderer)
+        :param renderer: Renderer (default: UnicodeBoardRenderer)
+        :param batch_size: the number of positions written at once
+        """
+        self._session_runner = session_runner
+        self._renderer = (renderer if renderer is not None
+                          else UnicodeBoardRenderer(ansi))
+        self._sink = BufferedSink(out, batch_size)
+
+    def show(self):
+        text = self._renderer.render(self._session_runner.session)
+        if text:
+            self._sink.write(text)
+
+    def close(self):
+        """
+        Write out everything still buffered (after the renderer's
+        closing text, if any).
+        """
+        text = self._renderer.close()
+        if text:
+            self._sink.write(text)
+        self._sink.flush()
+
+
+class BufferedSink(object):
+
+    """
+    Collects texts and writes them to a stream in batches, each batch
+    with a single write (encoded to the stream's encoding, or UTF-8).
+    """
+
+    def __init__(self, out=None, batch_size=1):
+        """
+        :param out: the stream to write to (default: sys.stdout)
+        :param batch_size: the number of texts written at once
+        """
+        self._out = out
+        self._batch_size = batch_size
+        self._texts = []
+
+    def write(self, text):
+        self._texts.append(text)
+        if len(self._texts) >= self._batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self._texts:
+            return
+        out = self._out or sys.stdout
+        text = u''.join(self._texts)
+        self._texts = []
+        out.write(text.encode(getattr(out, 'encoding', None) or 'utf-8',
+                              'replace'))
+        out.flush()
+
+
+class Renderer(object):
+
+    """
+    Renders positions of sessions to text.
+    """
+
+    def render(self, session):
+        """
+        :return: unicode (the position of the session)
+        """
+        raise NotImplementedError
+
+    def close(self):
+        """
+        :return: unicode (the text ending the output)
+        """
+        return u''
+
+
+class NullRenderer(Renderer):
+
+    def render(self, session):
+        return u''
+
+
+class FenRenderer(Renderer):
+
+    """
+    Renders a position as its FEN (for puzzle sessions: the piece
+    placement field only), on its own line.
+    """
+
+    def render(self, session):
+        return _get_fen(session).decode('ascii') + u'\n'
+
+
+class JsonRenderer(Renderer):
+
+    """
+    Renders a position as a JSON object on its own line: its FEN (see
+    FenRenderer) and the move which led to it (if known).
+    """
+
+    def render(self, session):
+        last_move = getattr(session, 'last_move', None)
+        return json.dumps({
+            'fen': _get_fen(session),
+            'move': str(last_move) if last_move is not None else None,
+        }) + u'\n'
+
+
+class UnicodeBoardRenderer(Renderer):
+
+    """
+    Draws the board with the unicode chess symbols.
+
+    Rendered rows are cached and only the rows whose pieces changed
+    are rendered again.  In the ANSI mode the first frame is drawn at
+    the top of the (cleared) terminal, the lines below it are made the
+    scrolling region, and later frames only rewrite the changed fields
+    in place, using cursor movement escape sequences.
+    """
+
     row_repr_pattern = u'{row_num} | {row} | {row_num}'
     field_sep = u' | '
     horizontal_line = u'  ' + u'-' * 33
@@ -42,42 +177,113 @@ class Drawer(object):
         'P': 9823,
     }
 
-    def __init__(self, session_runner):
-        self._board = session_runner.session.board
-        self._x_label_bar = self.x_label_pattern.format(
-            labels=self.field_sep.join(self._board.iter_x_labels()))
+    # the frame's first row of fields is its 5th line (see _get_frame())
+    # and the fields are 4 columns apart, starting at the 5th one
+    _first_row_line = 5
+    _first_field_column = 5
 
-    def show(self):
-        self._show_top()
-        for i, row in enumerate(self._board.iter_rows()):
-            self._show_row(i, row)
-        self._show_bottom()
-
-    def _show_row(self, i, row):
-        row_repr = self._get_repr_row(row)
-        print self.row_repr_pattern.format(
-            row_num=(8 - i),
-            row=self.field_sep.join(row_repr))
-        if i < 7:
-            print self.horizontal_line
-
-    def _show_top(self):
-        print
-        self._show_bar()
-
-    def _show_bottom(self):
-        self._show_bar()
-        print
-
-    def _show_bar(self):
-        print self.horizontal_line_border
-        print self._x_label_bar
-        print self.horizontal_line_border
-
-    def _get_repr_row(self, row):
-        return ((self._get_unichr_piece_symbol(piece) if piece
-                 else ' ')
-                for piece in row)
-
-    def _get_unichr_piece_symbol(self, piece):
-        return unichr(self.piece_symbol_unichr_index[piece.get_symbol()])
+    def __init__(self, ansi=False):
+        """
+        :param ansi: whether to use the ANSI mode
+        """
+        self._ansi = ansi
+        self._x_label_bar = None
+        self._row_count = None
+        # the symbol rows and the lines last rendered for them
+        self._symbol_rows = None
+        self._row_lines = {}
+        self._frame_drawn = False
+
+    def render(self, session):
+        board = session.board
+        if self._x_label_bar is None:
+            self._x_label_bar = self.x_label_pattern.format(
+                labels=self.field_sep.join(board.iter_x_labels()))
+            self._row_count = len(list(board.iter_y_labels()))
+            self._symbol_rows = [None] * self._row_count
+        symbol_rows = list(board.iter_symbol_rows())
+        if self._ansi and self._frame_drawn:
+            text = self._get_changed_fields(symbol_rows)
+        else:
+            text = self._get_frame(symbol_rows)
+            if self._ansi:
+                text = self._get_ansi_frame(text)
+            self._frame_drawn = True
+        self._symbol_rows = symbol_rows
+        return text
+
+    def close(self):
+        if self._ansi and self._frame_drawn:
+            # reset the scrolling region to the whole screen
+            return u'\x1b[r'
+        return u''
+
+    # non-public helpers:
+
+    def _get_frame(self, symbol_rows):
+        lines = [u'']
+        lines.extend(self._get_bar_lines())
+        for i, symbols in enumerate(symbol_rows):
+            lines.append(self._get_row_line(i, symbols))
+            if i < self._row_count - 1:
+                lines.append(self.horizontal_line)
+        lines.extend(self._get_bar_lines())
+        lines.append(u'')
+        return u'\n'.join(lines) + u'\n'
+
+    def _get_ansi_frame(self, frame):
+        frame_height = frame.count(u'\n')
+        return u''.join([
+            # clear the screen and move to its top left corner
+            u'\x1b[2J\x1b[H',
+            frame,
+            # scroll only the lines below the frame, and move there
+            u'\x1b[{};r'.format(frame_height + 1),
+            u'\x1b[{};1H'.format(frame_height + 1),
+        ])
+
+    def _get_changed_fields(self, symbol_rows):
+        parts = []
+        for i, (symbols, old_symbols) in enumerate(
+                zip(symbol_rows, self._symbol_rows)):
+            if symbols == old_symbols:
+                continue
+            for x, symbol in enumerate(symbols):
+                if symbol != old_symbols[x]:
+                    parts.append(u'\x1b[{};{}H{}'.format(
+                        self._first_row_line + 2 * i,
+                        self._first_field_column + 4 * x,
+                        self._get_unichr_symbol(symbol)))
+        if not parts:
+            return u''
+        # save the cursor position, and restore it afterwards
+        return u'\x1b7' + u''.join(parts) + u'\x1b8'
+
+    def _get_row_line(self, i, symbols):
+        key = (i, symbols)
+        line = self._row_lines.get(key)
+        if line is None:
+            if self._symbol_rows[i] is not None:
+                self._row_lines.pop((i, self._symbol_rows[i]), None)
+            line = self.row_repr_pattern.format(
+                row_num=(self._row_count - i),
+                row=self.field_sep.join(
+                    self._get_unichr_symbol(symbol) for symbol in symbols))
+            self._row_lines[key] = line
+        return line
+
+    def _get_bar_lines(self):
+        return [self.horizontal_line_border,
+                self._x_label_bar,
+                self.horizontal_line_border]
+
+    def _get_unichr_symbol(self, symbol):
+        if symbol is None:
+            return u' '
+        return unichr(self.piece_symbol_unichr_index[symbol])
+
+
+def _get_fen(session):
+    if isinstance(session, ChessGameSession):
+        return session.to_fen()
+    return session.board.get_fen_placement()
@@ -14,3 +14,11 @@ def critical_part():
         raise AssertionError(
             'This should not happen: an exception occurred in a '
             'critical code section!\n{}'.format(traceback.format_exc()))
+
+
+def per_second(count, elapsed):
+    """
+    :return: the rate of `count` events in `elapsed` seconds (0.0 if
+             no measurable time has elapsed)
+    """
+    return count / elapsed if elapsed else 0.0
@@ -0,0 +1,46 @@
+"""
+Zobrist hashing keys.
+
+A position key is the XOR of the keys of all (piece symbol, field)
+pairs, plus the side, castling and en passant keys for the parts of
+the position which are not on the board.  The keys are generated from
+a fixed seed, so they are the same in every process and on every run
+(keys can be stored on disk and compared across processes).
+"""
+
+import random
+
+
+_SEED = 0x5eedc4e55
+
+_random = random.Random(_SEED)
+
+
+def _random_key():
+    return _random.getrandbits(64)
+
+
+PIECE_KEYS = {symbol: [_random_key() for _ in range(64)]
+              for symbol in 'PNBRQKpnbrqk'}
+
+# XOR-ed in when it is black's turn
+SIDE_KEY = _random_key()
+
+
+def _make_castling_keys():
+    bit_keys = [_random_key() for _ in range(4)]
+    castling_keys = []
+    for castling_rights in range(16):
+        key = 0
+        for i, bit_key in enumerate(bit_keys):
+            if castling_rights & (1 << i):
+                key ^= bit_key
+        castling_keys.append(key)
+    return castling_keys
+
+
+# indexed by castling rights packed into an int (4 bits)
+CASTLING_KEYS = _make_castling_keys()
+
+# indexed by the en passant target's x (column)
+EN_PASSANT_KEYS = [_random_key() for _ in range(8)]
@@ -1,6 +1,8 @@
 #!/usr/bin/env python
 
+import sys
+
 import chess
 
 if __name__ == '__main__':
-    chess.main()
+    sys.exit(chess.main())